@@ -0,0 +1,87 @@
+"""
+Aircraft Sizing, Synthesis and Integration Support Tool (ASSIST).
+
+The public API is resolved lazily: ``import assist`` loads none of the
+modules below, nor NumPy, so worker processes that only need part of the
+package start quickly.  Each name is imported from its module the first time
+it is used::
+
+    import assist
+
+    aircraft = assist.Aircraft(...)    # imports assist.aircraft, and NumPy
+
+:class:`Fighter`, the OpenMDAO component, is not in ``__all__``, as it needs
+OpenMDAO to be installed.
+
+"""
+from importlib import import_module
+
+
+__version__ = '0.0.5'
+
+# Where each name of the public API is defined
+_API = dict(Aircraft='assist.aircraft',
+            Mission='assist.mission',
+            Segment='assist.mission',
+            FlightConditions='assist.mission',
+            Wing='assist.components',
+            Engine='assist.components',
+            Payload='assist.components',
+            Loadout='assist.components',
+            Atmosphere='assist.environment',
+            Cost='assist.cost',
+            LifeCycleCost='assist.lifecycle',
+            FleetMix='assist.fleet',
+            TimeHistory='assist.trajectory',
+            Feasibility='assist.feasibility',
+            Pipeline='assist.pipeline',
+            Batch='assist.pipeline',
+            Map='assist.pipeline',
+            Filter='assist.pipeline',
+            Screen='assist.pipeline',
+            Synthesize='assist.pipeline',
+            Size='assist.pipeline',
+            SizeEngine='assist.pipeline',
+            EstimateCost='assist.pipeline',
+            batched='assist.pipeline',
+            full_factorial='assist.pipeline',
+            sweep='assist.pipeline',
+            collect='assist.pipeline',
+            Checkpoint='assist.pipeline',
+            Sample='assist.pipeline',
+            Dual='assist.derivatives',
+            jacobian='assist.derivatives',
+            sizing_outputs='assist.derivatives',
+            sizing_partials='assist.derivatives',
+            EvaluationCache='assist.cache',
+            SurrogateCache='assist.surrogate',
+            GaussianProcess='assist.surrogate',
+            ResponseSurface='assist.surrogate',
+            NSGA2='assist.optimize',
+            UncertaintyAnalysis='assist.uncertainty',
+            Sensitivity='assist.sensitivity',
+            elasticities='assist.sensitivity',
+            Profiler='assist.instrument',
+            SharedTables='assist.shared',
+            model_tables='assist.shared',
+            Envelope='assist.envelope',
+            SizingService='assist.service',
+            TradeSurface='assist.trade',
+            trade_surface='assist.trade')
+
+_OPTIONAL_API = dict(Fighter='assist.openmdao_wrapper')
+
+__all__ = tuple(sorted(_API))
+
+
+def __getattr__(name):
+    module = _API.get(name) or _OPTIONAL_API.get(name)
+    if module is None:
+        raise AttributeError("module 'assist' has no attribute '{}'".format(name))
+    value = getattr(import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_API) | set(_OPTIONAL_API))
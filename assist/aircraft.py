@@ -1,11 +1,20 @@
 from __future__ import division, print_function
+from logging import DEBUG, getLogger
 from warnings import warn
 
 from numpy import (array, pi, exp, sqrt, log, max, argmin, cos, sin, abs,
-                   linspace, meshgrid, interp, unravel_index)
+                   linspace, meshgrid, interp, unravel_index, maximum,
+                   broadcast_arrays, stack, isnan, inf, nan, where, asarray, broadcast, empty, ndarray,
+                   broadcast_to, expand_dims, take_along_axis)
 
-from environment import Atmosphere
-from components import Wing, Engine
+from assist.environment import Atmosphere
+from assist.components import Wing, Engine, Loadout
+from assist.mission import Workspace
+from assist.feasibility import Feasibility, check_mission, check_design_point, check_sizing, check_sized
+from assist.util import argmin_select
+
+
+_log = getLogger(__name__)
 
 
 class Aircraft(object):
@@ -82,19 +91,23 @@ class Aircraft(object):
                          aircraft_type=aircraft_type,
                          design_mach=self.design_mach) if not isinstance(
                              wing, Wing) else wing
-        self.configuration = self.wing.configuration
+        self.configuration = self._configuration = self.wing.configuration
         self.engine = Engine(engine) if isinstance(
-            engine, basestring) else engine
+            engine, str) else engine
         self.num_engines = num_engines
         self._cd_r = {'takeoff': 0.02, 'landing': 0.02, 'cruise': 0.0}
 
-        # TODO: implement variable sweep analysis
-        self.variable_sweep = False
+        # Sweep flown, set to the angles of a variable-sweep wing's schedule
+        # while a segment picks the best of them, see Segment, and the angle
+        # the last segment picked at each wing loading
+        self.sweep = None
+        self._segment_sweep = None
 
         self.t_to_w = self._T_TO_W[aircraft_type]
 
         self.stores = [] if stores is None else stores
         self._stores = self.stores[:]
+        self._loadout = Loadout(self.stores)
 
         self.k_aero = k_aero
         self._cd_0 = kwargs.pop('cd_0', None)
@@ -102,6 +115,11 @@ class Aircraft(object):
 
         self._k_1 = kwargs.pop('k_1', None)
         self.k_2 = k_2
+
+        # Positions within the min/max bands of _CD_0 and _K_1 (0 for the min,
+        # 1 for the max), given by k_aero unless set
+        self.cd_0_band = kwargs.pop('cd_0_band', None)
+        self.k_1_band = kwargs.pop('k_1_band', None)
         self.m_critical = m_critical
 
         self.reverse_thrust = reverse_thrust
@@ -142,19 +160,71 @@ class Aircraft(object):
         return "<Aircraft {} ({}, {})>".format(self.type, str(self.wing), str(
             self.engine))
 
+    def _reset(self):
+        """
+        Puts the aircraft back in the state it was built in, before any
+        synthesis, with the maximum lift coefficient of its wing's current
+        inputs, e.g., to size other designs with the same objects.
+
+        """
+
+        self.configuration = self._configuration
+        self.t_to_w = self._T_TO_W[self.type]
+        self.stores = self._stores[:]
+        self.sweep = None
+        self._segment_sweep = None
+        # The aircraft keeps the CL_max of the configuration it was built in
+        configuration, self.wing.configuration = self.wing.configuration, self.configuration
+        self.cl_max = self.wing.cl_max
+        self.wing.configuration = configuration
+
+    @property
+    def loadout(self):
+        """
+        The :class:`Loadout` of the stores carried, rebuilt only when
+        ``stores`` changes.
+
+        """
+
+        if self._loadout.stores != tuple(self.stores):
+            self._loadout = Loadout(self.stores)
+        return self._loadout
+
+    @loadout.setter
+    def loadout(self, loadout):
+        self.stores = list(loadout.stores)
+        self._loadout = loadout
+
+    @property
+    def variable_sweep(self):
+        return self.wing.variable_sweep
+
+    def _sweep_ratios(self):
+        """
+        Ratios of the Mach number normal to the wing, of the induced drag
+        factor and of the maximum lift coefficient at the sweep flown to those
+        at the wing's reference sweep.
+
+        By simple sweep theory, the drag rise follows the Mach number normal to
+        the quarter-chord line, and sweeping the outer panels shortens the span,
+        so that the aspect ratio goes with the square of the cosine of the sweep.
+
+        """
+
+        wing = self.wing
+        cos_ratio = cos(self.sweep * pi / 180) / cos(wing.sweep * pi / 180)
+        return cos_ratio, 1 / (cos_ratio * cos_ratio), wing.sweep_factor(self.sweep) / wing.sweep_factor(wing.sweep)
+
     @property
     def payload(self):
-        total = 0
-        for store in self.stores:
-            total += store.weight
-        return total
+        return self.loadout.weight
 
     @property
     def cd_r(self):
         cd_r = 0.0
         if self.configuration in self._cd_r:
             cd_r += self._cd_r[self.configuration]
-        return cd_r + sum(store.cd_r for store in self.stores)
+        return cd_r + self.loadout.cd_r
 
     @property
     def cd_0(self):
@@ -163,26 +233,34 @@ class Aircraft(object):
         else:
             if getattr(self, 'mach', None) is None:
                 raise AttributeError("Must set the mach number")
+            if self.sweep is not None:
+                return self._cd_0_fxn(self.mach * self._sweep_ratios()[0])
             return self._cd_0_fxn(self.mach)
 
     def _cd_0_fxn(self, mach):
         min_cd_0 = self._cd_0_min(mach)
         max_cd_0 = self._cd_0_max(mach)
-        return min_cd_0 + (max_cd_0 - min_cd_0) * (1 - self.k_aero)
+        band = 1 - self.k_aero if self.cd_0_band is None else self.cd_0_band
+        return min_cd_0 + (max_cd_0 - min_cd_0) * band
 
     @property
     def k_1(self):
-        if self._k_1 is not None:
+        if self._k_1 is not None and self.sweep is None:
             return self._k_1
-        else:
-            if getattr(self, 'mach', None) is None:
-                raise AttributeError("Must set the mach number")
+        elif self._k_1 is None and getattr(self, 'mach', None) is None:
+            raise AttributeError("Must set the mach number")
+        elif self.sweep is None:
             return self._k_1_fxn(self.mach)
+        else:
+            mach_ratio, k_1_ratio, _ = self._sweep_ratios()
+            k_1 = self._k_1 if self._k_1 is not None else self._k_1_fxn(self.mach * mach_ratio)
+            return k_1 * k_1_ratio
 
     def _k_1_fxn(self, mach):
         min_k_1 = self._k_1_min(mach)
         max_k_1 = self._k_1_max(mach)
-        return min_k_1 + (max_k_1 - min_k_1) * (1 - self.k_aero)
+        band = 1 - self.k_aero if self.k_1_band is None else self.k_1_band
+        return min_k_1 + (max_k_1 - min_k_1) * band
 
     @property
     def best_cruise(self):
@@ -215,10 +293,19 @@ class Aircraft(object):
 
     def _synthesize(self, mission, wing_loading=None):
         """
-        Identifies a design point for a mission
+        Identifies a design point for a mission, or for the envelope of a
+        sequence of missions, see :meth:`_synthesize_missions`
+
+        Designs that cannot meet the mission are flagged in ``feasibility``
+        before the constraint curves are evaluated, and get NaN design points.
 
         """
+        if isinstance(mission, (list, tuple)):
+            return self._synthesize_missions(mission)
+
         self.mission = mission
+        if mission.stores is not None:
+            self.stores = list(mission.stores)
 
         wing_loadings = array(range(10, 300))
         thrust_loadings = []
@@ -226,68 +313,274 @@ class Aircraft(object):
 
         self.max_mach = 0
         self.max_speed = 0
+        for segment in mission.segments:
+            self.max_mach = maximum(self.max_mach, segment.mach)
+            self.max_speed = maximum(self.max_speed, segment.speed)
+
+        self.feasibility = check_mission(self, mission)
+        feasible = self.feasibility.feasible
+
+        if not feasible.any():
+            self._synthesis = {'w_to_s': wing_loadings, 't_to_w': thrust_loadings}
+            self.t_to_w_req = self.t_to_w = self.w_to_s = self.fuel_fraction = where(feasible, nan, nan)
+            self.weight_fractions = None
+            return
+
+        # Segments release their stores as they are flown, the aircraft is
+        # sized with all of them
+        loadout = self.loadout
+        workspace = Workspace.default()
+        self.weight_fractions = []
+        segment_sweeps = []
         for segment in mission.segments:
             self.mach = segment.mach
-            if segment.mach > self.max_mach:
-                self.max_mach = segment.mach
-            if segment.speed > self.max_speed:
-                self.max_speed = segment.speed
+            self._segment_sweep = None
             thrust_loadings.append(segment.thrust_to_weight_required(
                 aircraft=self,
                 wing_loading=wing_loadings,
-                prior_weight_fraction=weight_fraction))
-            weight_fraction *= segment.weight_fraction
-            print("Segment {} has a weight fraction of {}".format(
-                segment.kind, segment.weight_fraction))
-
+                prior_weight_fraction=weight_fraction,
+                workspace=workspace))
+            segment_sweeps.append(self._segment_sweep)
+            self.weight_fractions.append(segment.weight_fraction)
+            weight_fraction *= self.weight_fractions[-1]
+            if _log.isEnabledFor(DEBUG):
+                _log.debug("Segment %s has a weight fraction of %s", segment.kind, segment.weight_fraction,
+                           extra=dict(event='weight_fraction', segment=segment.kind,
+                                      weight_fraction=segment.weight_fraction))
+
+        self.loadout = loadout
         self.fuel_fraction = 1 - weight_fraction
 
         self._synthesis = {'w_to_s': wing_loadings,
                            't_to_w': thrust_loadings}
 
-        self.t_to_w_req = max(array(zip(*thrust_loadings)), 1)
-        idx = self.t_to_w_req.argmin()
+        self.t_to_w_req = _envelope(thrust_loadings)
 
-        self.t_to_w = self.t_to_w_req[idx]
-        self.w_to_s = wing_loadings[idx]
+        self.t_to_w, self.w_to_s = argmin_select(where(isnan(self.t_to_w_req), inf, self.t_to_w_req),
+                                                 self.t_to_w_req,
+                                                 wing_loadings)
 
-    def _size(self, mission, w_to=(1000, 60000), tol=10):
+        if self.variable_sweep:
+            # The sweep each segment is flown at, at the design point
+            key = where(isnan(self.t_to_w_req), inf, self.t_to_w_req)
+            self.sweep_schedule = [None if sweep is None else argmin_select(key, sweep) for sweep in segment_sweeps]
+
+        check_design_point(self, self.feasibility)
+        feasible = self.feasibility.feasible
+        if not feasible.all():
+            self.t_to_w = where(feasible, self.t_to_w, nan)
+            self.w_to_s = where(feasible, self.w_to_s, nan)
+
+    def _empty_weight_fraction(self, w_to):
         """
-        Sizes the aircraft for a given mission
+        Empty weight fraction at a takeoff weight, based on (Raymer, 1999) pp. 115
 
-        Empty Weight Fraction (we_to_w0) based on (Raymer, 1999) pp. 115
+        """
+
+        constant, power, _ = self._empty_weight_terms(w_to)
+        return constant + power
 
+    def _empty_weight_fraction_slope(self, w_to):
         """
+        Derivative of the empty weight fraction with respect to the takeoff
+        weight, see :meth:`_empty_weight_fraction`
 
-        if hasattr(w_to, '__iter__'):
-            w_to = array(range(w_to[0], w_to[1], tol))
+        """
 
+        _, power, c1 = self._empty_weight_terms(w_to)
+        return c1 * power / w_to
+
+    def _empty_weight_terms(self, w_to):
+        # The constant term of the empty weight fraction, the term that varies
+        # as w_to ** c1, and c1
         if self.type not in self._W_E_TO_W_TO_COEFFICIENTS:
             raise NotImplementedError(
                 "Aircraft type '{}' not implemented, " +
                 "only these have been implemented: {}".format(
                     self.type, self._W_E_TO_W_TO_COEFFICIENTS.keys()))
 
+        a, b, c1, c2, c3, c4, c5 = self._W_E_TO_W_TO_COEFFICIENTS[self.type]
+        k_vs = 1.04 if self.variable_sweep else 1.0
+
+        return a * k_vs, (b * w_to ** c1 * self.wing.aspect_ratio ** c2 *
+                          self.t_to_w ** c3 * self.w_to_s ** c4 * self.max_mach ** c5) * k_vs, c1
+
+    def _size(self, mission, w_to=(1000, 60000), tol=10):
+        """
+        Sizes the aircraft for a given mission, or for the most demanding of
+        a sequence of missions, see :meth:`_size_missions`
+
+        Designs whose fuel fraction cannot exceed the empty weight fraction
+        are flagged in ``feasibility`` before the weight grid is searched, and
+        get NaN weights, as do those whose solution is outside ``w_to``.
+
+        """
+
+        if isinstance(mission, (list, tuple)):
+            return self._size_missions(mission, w_to, tol)
+
+        if hasattr(w_to, '__iter__'):
+            w_to = array(range(w_to[0], w_to[1], tol))
+        w_to = array(w_to, ndmin=1)
+
         for segment in mission.segments:
             # TODO get updated weight fractions and drop payload analysis
             pass
 
-        wf_to_w0 = 1 - mission.segments[-1].prior_weight_fraction * \
-            mission.segments[-1].weight_fraction
+        self.feasibility = getattr(self, 'feasibility', None) or Feasibility()
+        check_sizing(self, w_to[-1], self.feasibility)
+        feasible = self.feasibility.feasible
 
-        a, b, c1, c2, c3, c4, c5 = self._W_E_TO_W_TO_COEFFICIENTS[self.type]
-        k_vs = 1.04 if self.variable_sweep else 1.0
+        if not feasible.any():
+            self.w_to = self.w_empty = where(feasible, nan, nan)
+        else:
+            wf_to_w0 = self.fuel_fraction
+            we_to_w0 = self._empty_weight_fraction(w_to)
 
-        we_to_w0 = (a + b * w_to ** c1 * self.wing.aspect_ratio ** c2 *
-                    self.t_to_w ** c3 * self.w_to_s ** c4 * self.max_mach ** c5
-                    ) * k_vs
+            w_to_calc = self.payload / (wf_to_w0 - we_to_w0)
 
-        w_to_calc = self.payload / (wf_to_w0 - we_to_w0)
+            w_to_grid, w_to_calc, we_to_w0 = argmin_select(abs(w_to_calc - w_to),
+                                                           w_to, w_to_calc, we_to_w0)
 
-        idx = array(abs(w_to_calc - w_to)).argmin()
+            # One Newton step on w_to = payload / (wf_to_w0 - we_to_w0(w_to)) from
+            # the nearest grid point, so that the solution (and its derivatives)
+            # varies smoothly with the design rather than in steps of tol
+            slope = w_to_calc * self._empty_weight_fraction_slope(w_to_grid) / (wf_to_w0 - we_to_w0)
+            self.w_to = w_to_grid + (w_to_calc - w_to_grid) / (1 - slope)
+            self.w_empty = self._empty_weight_fraction(self.w_to) * self.w_to
 
-        self.w_to = w_to_calc[idx]
-        self.w_empty = we_to_w0[idx] * self.w_to
+            check_sized(self, w_to[0], w_to[-1], self.feasibility)
+            feasible = self.feasibility.feasible
+            if not feasible.all():
+                self.w_to = where(feasible, self.w_to, nan)
+                self.w_empty = where(feasible, self.w_empty, nan)
+
+        self.engine.max_mach = self.max_mach
+        self.engine.max_thrust = self.t_to_w * self.w_to / self.num_engines
+        self.wing.area = self.w_to / self.w_to_s
+
+    def _synthesize_missions(self, missions):
+        """
+        Identifies the design point that meets every constraint of several
+        missions, e.g., ferry, strike and air superiority, i.e., the lowest
+        point of the joint envelope of their constraint curves.
+
+        The constraint curves of each mission are evaluated for every design
+        at once, as for a single mission.  Besides the design point, sets
+        ``design_mission`` and ``design_segment``, the indices of the mission
+        and segment whose constraint sets the thrust loading of each design,
+        and the ``_missions`` results of each mission for :meth:`_size_missions`.
+
+        """
+
+        self.missions = missions
+        t_to_w = self.t_to_w
+        stores = self.stores
+        results = []
+        for mission in missions:
+            # The cruise weight fractions depend on the thrust loading flown
+            self.t_to_w = t_to_w
+            self.stores = stores
+            self._synthesize(mission)
+            results.append(dict(mission=mission,
+                                synthesis=self._synthesis,
+                                t_to_w_req=self.t_to_w_req,
+                                fuel_fraction=self.fuel_fraction,
+                                weight_fractions=self.weight_fractions,
+                                max_mach=self.max_mach,
+                                max_speed=self.max_speed,
+                                feasibility=self.feasibility,
+                                stores=self.stores))
+        self.stores = stores
+        self._missions = results
+
+        self.max_mach = _envelope([result['max_mach'] for result in results])
+        self.max_speed = _envelope([result['max_speed'] for result in results])
+
+        # A design infeasible for a mission is infeasible for the set
+        self.feasibility = Feasibility()
+        for result in results:
+            feasibility = result['feasibility']
+            self.feasibility.code = self.feasibility.code | feasibility.code
+            self.feasibility.segment = where(self.feasibility.segment < 0, feasibility.segment,
+                                             self.feasibility.segment)
+
+        wing_loadings = results[0]['synthesis']['w_to_s']
+        self.t_to_w_req = _envelope([result['t_to_w_req'] for result in results])
+        self._synthesis = {'w_to_s': wing_loadings,
+                           't_to_w': [curve for result in results for curve in result['synthesis']['t_to_w']]}
+
+        key = where(isnan(_value(self.t_to_w_req)), inf, _value(self.t_to_w_req))
+        self.t_to_w, self.w_to_s = argmin_select(key, self.t_to_w_req, wing_loadings)
+
+        # The mission and segment whose curve is highest at the design point
+        index = expand_dims(key.argmin(-1), -1)
+        labels, required = [], []
+        for i, result in enumerate(results):
+            for j, curve in enumerate(result['synthesis']['t_to_w']):
+                curve = broadcast_to(asarray(_value(curve), dtype=float), key.shape)
+                required.append(take_along_axis(curve, index, -1)[..., 0])
+                labels.append((i, j))
+        if required:
+            driving = stack(broadcast_arrays(*required)).argmax(0)
+            self.design_mission = array([i for i, _ in labels])[driving]
+            self.design_segment = array([j for _, j in labels])[driving]
+        else:
+            self.design_mission = self.design_segment = -1
+        if key.ndim > 1:
+            self.design_mission = asarray(self.design_mission).reshape(-1, 1)
+            self.design_segment = asarray(self.design_segment).reshape(-1, 1)
+
+        check_design_point(self, self.feasibility)
+        feasible = self.feasibility.feasible
+        if not feasible.all():
+            self.t_to_w = where(feasible, self.t_to_w, nan)
+            self.w_to_s = where(feasible, self.w_to_s, nan)
+            self.design_mission = where(feasible, self.design_mission, -1)
+            self.design_segment = where(feasible, self.design_segment, -1)
+        self.fuel_fraction = results[0]['fuel_fraction']
+
+    def _size_missions(self, missions, w_to=(1000, 60000), tol=10):
+        """
+        Sizes the aircraft for the missions of :meth:`_synthesize_missions`,
+        to the largest takeoff weight any of them requires, given its fuel
+        fraction and stores.
+
+        Sets ``sizing_mission``, the index of the mission that sets the
+        takeoff weight of each design, and ``mission_w_to``, the takeoff
+        weight each mission alone would require.
+
+        """
+
+        stores = self.stores
+        feasibility = self.feasibility
+        weights, codes = [], []
+        for result in self._missions:
+            self.fuel_fraction = result['fuel_fraction']
+            self.stores = result['stores']
+            self.feasibility = Feasibility(feasibility.code, feasibility.segment)
+            self._size(result['mission'], w_to, tol)
+            weights.append(self.w_to)
+            codes.append(self.feasibility.code)
+
+        self.mission_w_to = weights
+        self.feasibility = Feasibility(feasibility.code, feasibility.segment)
+        for code in codes:
+            self.feasibility.code = self.feasibility.code | code
+        values = stack(broadcast_arrays(*[asarray(_value(weight), dtype=float) for weight in weights]))
+        self.sizing_mission = where(isnan(values).any(0), -1, where(isnan(values), -inf, values).argmax(0))
+
+        # NaN, i.e., infeasible, if infeasible for any mission
+        self.w_to = _envelope(weights)
+        self.w_empty = self._empty_weight_fraction(self.w_to) * self.w_to
+
+        # The fuel and stores of the mission the aircraft is sized for
+        fuel_fractions = broadcast_arrays(maximum(self.sizing_mission, 0),
+                                          *[asarray(_value(result['fuel_fraction']), dtype=float)
+                                            for result in self._missions])
+        self.fuel_fraction = take_along_axis(stack(fuel_fractions[1:]), expand_dims(fuel_fractions[0], 0), 0)[0]
+        self.fuel_fraction = where(self.sizing_mission < 0, nan, self.fuel_fraction)
+        self.stores = stores
 
         self.engine.max_mach = self.max_mach
         self.engine.max_thrust = self.t_to_w * self.w_to / self.num_engines
@@ -297,3 +590,21 @@ class Aircraft(object):
         for _ in range(repetitions):
             self._synthesize()
             self._size()
+
+
+def _envelope(curves):
+    # The largest thrust loading required at each wing loading, reduced in
+    # place rather than from a stacked copy of the curves
+    curves = [asarray(curve) if isinstance(curve, list) else curve for curve in curves]
+    if not all(isinstance(curve, (ndarray, float, int)) for curve in curves):
+        return max(stack(broadcast_arrays(*curves)), 0)
+    envelope = empty(broadcast(*curves).shape)
+    envelope[...] = curves[0]
+    for curve in curves[1:]:
+        maximum(envelope, curve, out=envelope)
+    return envelope
+
+
+def _value(x):
+    # The value of a dual, see assist.derivatives, or x
+    return getattr(x, 'value', x)
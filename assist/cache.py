@@ -0,0 +1,370 @@
+"""
+Persistent memoization of design evaluations.
+
+An :class:`EvaluationCache` stores the :data:`~assist.derivatives.SIZING_OUTPUTS`
+of each design in a SQLite file, keyed by a hash of the ``Aircraft``,
+``Wing``, ``Engine``, ``Payload`` and ``Mission`` objects it is built from, so
+a study rerun days later only evaluates the designs it has not seen before::
+
+    cache = EvaluationCache('evaluations.db')
+    results = cache(build, dict(k_aero=linspace(0, 1, 100)[:, None], cruise_speed=700), quantity=200)
+
+where ``build(design)`` returns an ``(aircraft, mission)`` pair, as for the
+stages of :mod:`assist.pipeline`; in a pipeline, wrap it in a
+:class:`~assist.pipeline.Map`::
+
+    Map(lambda batch: cache(build, batch.design(), quantity=200))
+
+Entries are tagged with the version of the model that computed them, see
+:func:`model_version`, and those of other versions are dropped when the cache
+is opened.  The least recently used entries are evicted once the cache grows
+past its size limits.  Any number of processes, e.g., the workers of a
+process pool, can read from and write to the same file.
+
+"""
+from __future__ import division
+import json
+import sqlite3
+from contextlib import contextmanager
+from glob import glob
+from hashlib import sha256
+from os import getpid
+from os.path import dirname, join
+from threading import Lock
+from time import time
+
+from numpy import asarray, broadcast, broadcast_to, concatenate, empty, ndarray, number, bool_
+
+from assist.cost import Cost
+from assist.derivatives import SIZING_OUTPUTS, sizing_outputs
+
+
+__all__ = ('EvaluationCache', 'fingerprint', 'model_version')
+
+
+# Modules whose source defines the results of an evaluation
+_MODEL_SOURCES = ('aircraft.py', 'mission.py', 'cost.py', 'environment.py', 'feasibility.py',
+                  'util.py', 'derivatives.py', join('components', '*.py'))
+
+# Largest number of keys in a single query, below SQLite's limit on parameters
+_QUERY_SIZE = 500
+
+_model_version = None
+
+
+def model_version():
+    """
+    Hash of the source of the modules that compute an evaluation, so cached
+    evaluations are invalidated whenever the model changes.
+
+    """
+
+    global _model_version
+    if _model_version is None:
+        digest = sha256()
+        root = dirname(__file__)
+        for pattern in _MODEL_SOURCES:
+            for path in sorted(glob(join(root, pattern))):
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+        _model_version = digest.hexdigest()[:16]
+    return _model_version
+
+
+def _walk(obj, rows, structure, values, active):
+    """
+    Appends the canonical serialization of ``obj`` to ``structure``, with a
+    placeholder for each number, and its numbers to ``values``, as blocks of
+    shape (1, size), or (rows, size) for arrays with a row per design.
+
+    """
+
+    if obj is None:
+        structure.append(b'N')
+    elif isinstance(obj, (bool, int, float, number, bool_)):
+        structure.append(b'#')
+        values.append(asarray(obj, dtype=float).reshape(1, 1))
+    elif isinstance(obj, ndarray) and obj.dtype.kind in 'biuf':
+        array = obj.astype(float)
+        if rows is not None and array.ndim >= 2 and array.shape[0] == rows:
+            shape, block = array.shape[1:], array.reshape(rows, -1)
+        else:
+            shape, block = array.shape, array.reshape(1, -1)
+        structure.append(b'#' if block.shape[1] == 1 else 'a{}'.format(shape).encode())
+        values.append(block)
+    elif isinstance(obj, ndarray):
+        _walk(obj.tolist(), rows, structure, values, active)
+    elif isinstance(obj, str):
+        structure.append('s{}:{}'.format(len(obj), obj).encode('utf-8'))
+    elif isinstance(obj, (list, tuple)):
+        structure.append(b'[')
+        for item in obj:
+            _walk(item, rows, structure, values, active)
+        structure.append(b']')
+    elif isinstance(obj, dict):
+        structure.append(b'{')
+        for key in sorted(obj, key=repr):
+            structure.append('k{!r}'.format(key).encode('utf-8'))
+            _walk(obj[key], rows, structure, values, active)
+        structure.append(b'}')
+    elif callable(obj):
+        # Functions are derived from the model data (e.g., interpolants of its
+        # tables), which the model version already accounts for
+        structure.append(b'c')
+    elif hasattr(obj, '__dict__'):
+        if id(obj) in active:
+            structure.append(b'^')
+            return
+        active.add(id(obj))
+        structure.append('<{}.{}'.format(type(obj).__module__.rpartition('.')[2], type(obj).__name__).encode())
+        for name, value in sorted(vars(obj).items()):
+            if not callable(value):
+                structure.append('.{}'.format(name).encode())
+                _walk(value, rows, structure, values, active)
+        structure.append(b'>')
+        active.discard(id(obj))
+    else:
+        raise TypeError("Cannot fingerprint {!r} of type {}".format(obj, type(obj).__name__))
+
+
+def fingerprint(objects, rows=None):
+    """
+    Content hash of ``objects``, e.g., an aircraft, its mission and the cost
+    inputs, as a hex string.
+
+    For a batch of ``rows`` designs, arrays with that many rows are taken to
+    hold one row per design, and a list with the hash of each design is
+    returned; a design gets the same hash on its own as in a batch.
+
+    """
+
+    structure, values = [], []
+    _walk(objects, rows, structure, values, set())
+    count = 1 if rows is None else rows
+    matrix = empty((count, 0))
+    if values:
+        matrix = concatenate([broadcast_to(block, (count, block.shape[1])) for block in values], 1)
+    # Adding zero turns -0.0 into 0.0, so both hash alike
+    matrix = matrix.astype('<f8') + 0.0
+
+    digest = sha256(b''.join(structure))
+    keys = []
+    for row in matrix:
+        key = digest.copy()
+        key.update(row.tobytes())
+        keys.append(key.hexdigest())
+    return keys[0] if rows is None else keys
+
+
+class EvaluationCache(object):
+    """
+    Evaluations of designs, stored in a SQLite database.
+
+    :param path: the database file, created if it does not exist
+    :param version: tag of the model the evaluations are computed with,
+                    defaults to :func:`model_version`
+    :param max_bytes: size of the stored outputs past which the least recently
+                      used entries are evicted
+    :param max_entries: number of entries past which the least recently used
+                        entries are evicted, unlimited if None
+    :param timeout: seconds to wait for another process to release the database
+
+    """
+
+    def __init__(self, path, version=None, max_bytes=256 * 1024 * 1024, max_entries=None, timeout=60.0):
+        self.path = path
+        self.version = model_version() if version is None else version
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.timeout = timeout
+
+        self.hits = 0
+        self.misses = 0
+
+        self._connection = None
+        self._pid = None
+        self._lock = Lock()
+        # Times the entries read were last used, not yet written to the database
+        self._accessed = {}
+
+        with self._transaction() as db:
+            db.execute("CREATE TABLE IF NOT EXISTS evaluations ("
+                       "key TEXT PRIMARY KEY, version TEXT NOT NULL, outputs TEXT NOT NULL, "
+                       "size INTEGER NOT NULL, accessed REAL NOT NULL)")
+            db.execute("CREATE INDEX IF NOT EXISTS evaluations_accessed ON evaluations (accessed)")
+            db.execute("DELETE FROM evaluations WHERE version != ?", (self.version,))
+
+    def __repr__(self):
+        return "<EvaluationCache '{}' ({} entries, {} hits, {} misses)>".format(
+            self.path, len(self), self.hits, self.misses)
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM evaluations").fetchone()[0]
+
+    def __getstate__(self):
+        # Each process opens its own connection
+        state = dict(self.__dict__)
+        state.update(_connection=None, _pid=None, _lock=None, _accessed={})
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = Lock()
+
+    def __call__(self, build, design, **kwargs):
+        """
+        The :data:`~assist.derivatives.SIZING_OUTPUTS` of ``build(design)``,
+        see :func:`~assist.derivatives.sizing_outputs`, from the cache where
+        possible.  The designs not found are evaluated in one batch and stored.
+
+        :returns: the outputs, as (N, 1) columns for a batch of designs given
+                  as (N, 1) columns, as floats for a single design
+
+        """
+
+        shape = broadcast(*[asarray(value) for value in design.values()]).shape
+        rows = shape[0] if len(shape) >= 2 else None
+        # The objects fingerprinted are those sized, unless only some of the designs are missing
+        objects = build(design)
+        built = lambda design: objects
+        keys = self.keys(built, design, rows, **kwargs)
+
+        if rows is None:
+            found = self.get([keys])
+            if keys not in found:
+                outputs = sizing_outputs(built, design, **kwargs)
+                found[keys] = dict((name, float(asarray(outputs[name]).ravel()[0])) for name in SIZING_OUTPUTS)
+                self.put(found)
+            return found[keys]
+
+        found = self.get(keys)
+        missing = [i for i, key in enumerate(keys) if key not in found]
+        if missing:
+            if len(missing) == rows:
+                outputs = sizing_outputs(built, design, **kwargs)
+            else:
+                subset = dict((name, value[missing] if asarray(value).ndim >= 2 and len(value) == rows else value)
+                              for name, value in design.items())
+                outputs = sizing_outputs(build, subset, **kwargs)
+            columns = dict((name, broadcast_to(outputs[name], (len(missing), 1))[:, 0]) for name in SIZING_OUTPUTS)
+            self.put(dict((keys[i], dict((name, float(columns[name][j])) for name in SIZING_OUTPUTS))
+                          for j, i in enumerate(missing)))
+            for j, i in enumerate(missing):
+                found[keys[i]] = dict((name, columns[name][j]) for name in SIZING_OUTPUTS)
+
+        results = dict((name, empty((rows, 1))) for name in SIZING_OUTPUTS)
+        for i, key in enumerate(keys):
+            for name in SIZING_OUTPUTS:
+                results[name][i, 0] = found[key][name]
+        return results
+
+    def keys(self, build, design, rows=None, **kwargs):
+        """
+        The :func:`fingerprint` of the objects ``build(design)`` returns and of
+        the cost inputs, a key per design for a batch of ``rows`` designs.
+
+        """
+
+        aircraft, mission = build(design)
+        cost_kwargs = dict(kwargs)
+        cost_kwargs.update((name, design[name]) for name in Cost._DEFAULTS if name in design)
+        return fingerprint((aircraft, mission, cost_kwargs), rows)
+
+    def get(self, keys):
+        """
+        The outputs stored under each of ``keys``, for the ones found, as a
+        dictionary.  Marks them as recently used, unless another process is
+        writing to the database, in which case they are marked with the next
+        :meth:`put` rather than waiting for it.
+
+        """
+
+        found = {}
+        now = time()
+        with self._transaction(write=False) as db:
+            for start in range(0, len(keys), _QUERY_SIZE):
+                chunk = keys[start:start + _QUERY_SIZE]
+                marks = ', '.join('?' * len(chunk))
+                query = "SELECT key, outputs FROM evaluations WHERE version = ? AND key IN ({})".format(marks)
+                found.update((key, json.loads(outputs)) for key, outputs in db.execute(query, [self.version] + chunk))
+            self._accessed.update((key, now) for key in found)
+        if found:
+            try:
+                with self._transaction(wait=False) as db:
+                    self._mark_accessed(db)
+            except sqlite3.OperationalError:
+                pass
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    def put(self, entries):
+        """
+        Stores the outputs of each key of ``entries``, a dictionary, then
+        evicts the least recently used entries past the size limits.
+
+        """
+
+        now = time()
+        rows = []
+        for key, outputs in entries.items():
+            text = json.dumps(outputs, sort_keys=True)
+            rows.append((key, self.version, text, len(text), now))
+        with self._transaction() as db:
+            self._mark_accessed(db)
+            db.executemany("INSERT OR REPLACE INTO evaluations (key, version, outputs, size, accessed) "
+                           "VALUES (?, ?, ?, ?, ?)", rows)
+            self._evict(db)
+
+    def clear(self):
+        with self._transaction() as db:
+            db.execute("DELETE FROM evaluations")
+
+    def _mark_accessed(self, db):
+        db.executemany("UPDATE evaluations SET accessed = ? WHERE key = ?",
+                       [(accessed, key) for key, accessed in self._accessed.items()])
+        self._accessed.clear()
+
+    def _evict(self, db):
+        entries, size = db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM evaluations").fetchone()
+        if self.max_entries is not None and entries > self.max_entries:
+            db.execute("DELETE FROM evaluations WHERE key NOT IN "
+                       "(SELECT key FROM evaluations ORDER BY accessed DESC, key LIMIT ?)", (self.max_entries,))
+        if size > self.max_bytes:
+            db.execute("DELETE FROM evaluations WHERE key IN "
+                       "(SELECT key FROM (SELECT key, SUM(size) OVER (ORDER BY accessed DESC, key) AS total "
+                       "FROM evaluations) WHERE total > ?)", (self.max_bytes,))
+
+    @property
+    def _db(self):
+        # Connections do not survive a fork, so a process pool worker opens its own
+        if self._connection is None or self._pid != getpid():
+            self._connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                               check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._pid = getpid()
+        return self._connection
+
+    @contextmanager
+    def _transaction(self, write=True, wait=True):
+        # Writers take the write lock up front, so concurrent writers wait for
+        # each other instead of failing to upgrade a read lock; readers take
+        # none, and do not wait for writers.  Without waiting, a writer fails
+        # at once if another process holds the write lock
+        with self._lock:
+            db = self._db
+            if not wait:
+                db.execute("PRAGMA busy_timeout = 0")
+            try:
+                db.execute("BEGIN IMMEDIATE" if write else "BEGIN DEFERRED")
+            finally:
+                if not wait:
+                    db.execute("PRAGMA busy_timeout = {}".format(int(self.timeout * 1000)))
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
@@ -1,6 +1,6 @@
-from wing import Wing
-from engine import Engine
-from payload import Payload
+from assist.components.wing import Wing
+from assist.components.engine import Engine
+from assist.components.payload import Payload, Loadout
 
 
-__all__ = ('Wing', 'Engine', 'Payload')
+__all__ = ('Wing', 'Engine', 'Payload', 'Loadout')
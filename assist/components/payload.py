@@ -1,18 +1,133 @@
 from __future__ import division
+from warnings import warn
 
+from numpy import asarray, broadcast_arrays, stack
 
-__all__ = ('Payload',)
+
+__all__ = ('Payload', 'Loadout')
 
 
 class Payload(object):
+    """
+    A store carried by the aircraft, e.g., crew, a gun, or missiles.
+
+    :param name: name of the store, segments may release it by name
+    :param weight: weight of each unit (lbm)
+    :param cd_r: drag coefficient of each unit
+    :param expendable: whether the store can be released during the mission
+    :param quantity: number of units carried, or a column of them for a batch
+                     of designs
+
+    :type weight: float
+    :type cd_r: float
+    :type quantity: int, array
+
+    """
+
     def __init__(self, name=None,
                  weight=0.0,
                  cd_r=0.0,
-                 expendable=False, *args, **kwargs):
+                 expendable=False,
+                 quantity=1, *args, **kwargs):
         self.name = name
         self.weight = weight
         self.cd_r = cd_r
         self.expendable = expendable
+        self.quantity = quantity
+
+        if len(kwargs) > 0:
+            warn("Unused kwargs: {}".format(kwargs.keys()))
 
     def __repr__(self):
-        return "<Payload {} ({} lbm)>".format(self.name, self.weight)
+        return "<Payload {} ({} x {} lbm)>".format(self.name, self.quantity, self.weight)
+
+    @property
+    def total_weight(self):
+        return self.weight * self.quantity
+
+    @property
+    def total_cd_r(self):
+        return self.cd_r * self.quantity
+
+
+class Loadout(object):
+    """
+    The stores an aircraft carries, with their weight and drag totals computed
+    once, from arrays of the weight, drag and quantity of each store, rather
+    than summed over the stores on every access.
+
+    Loadouts are not modified, releasing stores gives a new loadout, which is
+    kept so that releasing the same stores again is a lookup::
+
+        loadout = Loadout(stores)
+        loadout.weight, loadout.cd_r
+        loadout.without(['AMRAAMs']).weight
+
+    The quantities of the stores may be columns of a batch of designs, e.g.,
+    to study many loadouts at once; the totals then have their shape.
+
+    :param stores: the :class:`Payload` instances carried
+
+    """
+
+    def __init__(self, stores=()):
+        self.stores = tuple(stores)
+        self._released = {}
+
+        if self.stores:
+            self.unit_weights = asarray([store.weight for store in self.stores], dtype=float)
+            self.unit_drags = asarray([store.cd_r for store in self.stores], dtype=float)
+            self.quantities = stack(broadcast_arrays(*[asarray(store.quantity, dtype=float)
+                                                       for store in self.stores]))
+            per_store = (-1,) + (1,) * (self.quantities.ndim - 1)
+            self.weight = (self.unit_weights.reshape(per_store) * self.quantities).sum(0)[()]
+            self.cd_r = (self.unit_drags.reshape(per_store) * self.quantities).sum(0)[()]
+        else:
+            self.unit_weights = self.unit_drags = self.quantities = asarray([], dtype=float)
+            self.weight = self.cd_r = 0.0
+
+    def __repr__(self):
+        return "<Loadout {} stores ({} lbm)>".format(len(self.stores), self.weight)
+
+    def __len__(self):
+        return len(self.stores)
+
+    def __iter__(self):
+        return iter(self.stores)
+
+    def without(self, release):
+        """
+        The loadout left after releasing stores.
+
+        :param release: the stores released, as :class:`Payload` instances or
+                        their names
+
+        """
+
+        # Keyed by the stores and names themselves, which the key keeps alive,
+        # rather than by ids that others may take once they are freed
+        key = frozenset(release)
+        if key not in self._released:
+            names = set(item for item in release if isinstance(item, str))
+            self._released[key] = Loadout(store for store in self.stores
+                                          if store not in release and store.name not in names)
+        return self._released[key]
+
+    def schedule(self, segments):
+        """
+        The loadout carried during each segment, after the releases of that
+        segment and those before it, so the weight and drag of the stores
+        along a mission are, e.g.::
+
+            loadouts = loadout.schedule(mission.segments)
+            weights = stack(broadcast_arrays(*[loadout.weight for loadout in loadouts]))
+
+        """
+
+        loadouts = []
+        loadout = self
+        for segment in segments:
+            if segment.release is not None:
+                loadout = loadout.without(segment.release)
+            loadouts.append(loadout)
+        return loadouts
@@ -1,5 +1,6 @@
 from __future__ import division
-from numpy import sqrt, exp
+from warnings import warn
+from numpy import any, asarray, broadcast_arrays, stack, sqrt, exp
 from assist.util import verify_value
 from assist.environment import Atmosphere
 
@@ -11,7 +12,9 @@ class Wing(object):
     """
 
     :param flap_type: type of flap on wing (plain, single_slot)
-    :param sweep: quarter-chord sweep line (in degrees)
+    :param sweep: quarter-chord sweep line (in degrees), or for a variable-sweep
+                  wing, a list of the angles it can be swept to, the first of
+                  which is the reference the drag and lift estimates hold for
 
     """
     _AR_VS_MACH = {
@@ -31,7 +34,8 @@ class Wing(object):
                      configuration=[None, None, 'takeoff', 'n/a'],
                      taper_ratio=[0, 1, 1, 'unitless'],
                      flap_span=[0, 1, [0.3, 0.6], 'unitless'],
-                     k_aero=[0, 1, 0.5, 'unitless'])
+                     k_aero=[0, 1, 0.5, 'unitless'],
+                     cl_max_band=[0, 1, None, 'unitless'])
 
     _CL_MAX = {
         'none': {'takeoff': [0.9, 1.2],
@@ -51,16 +55,7 @@ class Wing(object):
     _SLAT_CL_DELTA = {'takeoff': 0.6, 'landing': 0.5}
 
     def __init__(self, **kwargs):
-        for k, v in self._DEFAULTS.items():
-            val = kwargs.pop(k, v[2])
-            if hasattr(val, '__iter__'):
-                for item in val:
-                    verify_value(k, item, v[0], v[1], v[3])
-            else:
-                verify_value(k, val, v[0], v[1], v[3])
-            if len(v) > 4:
-                k = v[4]
-            setattr(self, k, val)
+        self.update(**dict((k, kwargs.pop(k, v[2])) for k, v in self._DEFAULTS.items()))
 
         if not hasattr(
                 self,
@@ -77,8 +72,6 @@ class Wing(object):
         if len(kwargs) > 0:
             warn("Unused arguments: {}".format(kwargs.keys()))
 
-        self._reset()
-
     def __repr__(self):
         high_lift = "No Flaps" if self.flap_type == 'none' else self.flap_type
         if self.slats:
@@ -86,6 +79,24 @@ class Wing(object):
         return "<Wing (High Lift Devices {}, Configured for {})>".format(
             high_lift, self.configuration)
 
+    def update(self, **inputs):
+        """
+        Sets inputs of the wing, e.g., to the columns of another batch of
+        designs, checked against the same bounds as those it was built with,
+        and drops the estimates that depend on them.
+
+        """
+
+        for k, val in inputs.items():
+            if k not in self._DEFAULTS:
+                raise ValueError("{} is not an input of the wing".format(k))
+            v = self._DEFAULTS[k]
+            verify_value(k, val, v[0], v[1], v[3])
+            if len(v) > 4:
+                k = v[4]
+            setattr(self, k, val)
+        self._reset()
+
     def _reset(self):
         """
         Resets cached variables.
@@ -108,14 +119,46 @@ class Wing(object):
         self.configuration = 'cruise'
         return self
 
+    @property
+    def variable_sweep(self):
+        return isinstance(self._sweep, (list, tuple))
+
     @property
     def sweep(self):
-        if hasattr(self._sweep, '__iter__'):
-            raise NotImplementedError(
-                "Variable sweep functionality has not been implemented yet")
+        """
+        The sweep, the reference one of a variable-sweep wing.
+
+        """
+
+        if self.variable_sweep:
+            return self._sweep[0]
         else:
             return self._sweep
 
+    @property
+    def sweeps(self):
+        """
+        The angles the wing can be swept to, along the first axis.
+
+        """
+
+        if self.variable_sweep:
+            return stack(broadcast_arrays(*[asarray(sweep, dtype=float) for sweep in self._sweep]))
+        return asarray(self._sweep, dtype=float)[None]
+
+    @staticmethod
+    def sweep_factor(sweep):
+        """
+        Ratio of the maximum lift coefficient of a wing swept at the
+        quarter-chord (in degrees) to that of an unswept wing.
+
+        """
+
+        # Regressed from Fig. 5.3 in Raymer, 1999 (pp. 97)
+        return 2 - (0.00011029411764705700 * sweep * sweep +
+                    0.00014705882352927800 * sweep +
+                    1.00294117647059000000)
+
     @property
     def cl_max(self):
         if self.configuration in self._cl_max:
@@ -146,14 +189,16 @@ class Wing(object):
         flap_span = self.flap_span
         CL_MAX = self._CL_MAX
         k_aero = self.k_aero
+        # Position within the _CL_MAX ranges, given by k_aero unless set
+        band = k_aero if self.cl_max_band is None else self.cl_max_band
 
-        if self.aspect_ratio > 8:
+        if any(self.aspect_ratio > 8):
             warn(
                 "Estimates not valid for high aspect ratio wings, ideally AR "
                 +
-                "should be less than 8, you specified {}".format(aspect_ratio))
+                "should be less than 8, you specified {}".format(self.aspect_ratio))
 
-        if sweep > 60:
+        if any(sweep > 60):
             warn("Estimates not valid for sweeps > 60 degrees, " +
                  "you specified {}".format(sweep))
 
@@ -163,10 +208,10 @@ class Wing(object):
                     flap_type, CL_MAX.keys()))
 
         cl = CL_MAX['none'][configuration]
-        cl_max_unflapped = k_aero * (cl[1] - cl[0]) + cl[0]
+        cl_max_unflapped = band * (cl[1] - cl[0]) + cl[0]
 
         cl = CL_MAX[flap_type][configuration]
-        cl_max_flapped = k_aero * (cl[1] - cl[0]) + cl[0]
+        cl_max_flapped = band * (cl[1] - cl[0]) + cl[0]
 
         if self.slats:
             cl = self._SLAT_CL_DELTA[configuration]
@@ -176,10 +221,7 @@ class Wing(object):
         s_ratio = (2 + (taper_ratio - 1) * sum(flap_span)) * \
                   (flap_span[1] - flap_span[0]) / (1 + taper_ratio)
 
-        # Regressed from Fig. 5.3 in Raymer, 1999 (pp. 97)
-        sweep_factor = 2 - (0.00011029411764705700 * sweep * sweep +
-                            0.00014705882352927800 * sweep +
-                            1.00294117647059000000)
+        sweep_factor = self.sweep_factor(sweep)
 
         return sweep_factor * (0.85 + 0.1 * k_aero) * (
             cl_max_flapped * s_ratio + cl_max_unflapped * (1 - s_ratio))
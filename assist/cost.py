@@ -1,4 +1,5 @@
-from util import verify_value
+from numpy import where
+from assist.util import verify_value
 
 
 class Cost(object):
@@ -7,7 +8,8 @@ class Cost(object):
 
     Cost in constant 1999 U$D.
 
-    TODO: add life-cycle cost calculations (Raymer's is focused on commercial aircraft)
+    Operating and support costs over the service life are estimated by
+    :class:`~assist.lifecycle.LifeCycleCost`.
 
     """
 
@@ -63,11 +65,7 @@ class Cost(object):
         self.aircraft = aircraft
         for k, v in self._DEFAULTS.items():
             val = kwargs.pop(k, v[2])
-            if hasattr(val, '__iter__'):
-                for item in val:
-                    verify_value(k, item, v[0], v[1], v[3])
-            else:
-                verify_value(k, val, v[0], v[1], v[3])
+            verify_value(k, val, v[0], v[1], v[3])
             if len(v) > 4:
                 k = v[4]
             setattr(self, k, val)
@@ -76,24 +74,29 @@ class Cost(object):
     max_mach=[0.0, None, None, 'unitless'],
     num_engines=[1, None, 1, 'unitless'],
 
+    @property
+    def escalations(self):
+        """
+        Factors from 1999 dollars to those of ``year``, for aircraft, engines
+        and other parts and equipment.
+
+        """
+
+        if self.year in self._ESCALATIONS:
+            return tuple(self._ESCALATIONS[self.year])
+        return tuple(self._FUTURE_ESCALATIONS[name](self.year) for name in ('aircraft', 'engines', 'other'))
+
     # RDT&E + Fly Away cost
     def estimate_acquisition(self):
         w_e = self.aircraft.w_empty
         v = self.aircraft.max_speed
         q = self.quantity
 
-        if self.year in self._ESCALATIONS:
-            f_mfg = self._ESCALATIONS[self.year][0]
-            f_eng = self._ESCALATIONS[self.year][1]
-            f_oth = self._ESCALATIONS[self.year][2]
-        else:
-            f_mfg = self._FUTURE_ESCALATIONS['aircraft'](self.year)
-            f_eng = self._FUTURE_ESCALATIONS['engines'](self.year)
-            f_oth = self._FUTURE_ESCALATIONS['other'](self.year)
+        f_mfg, f_eng, f_oth = self.escalations
 
-        h_mult = self.materials_complexity
-        if self.stealth > 0.0:
-            h_mult *= 1.20 + 0.2 * self.stealth
+        h_mult = self.materials_complexity * where(self.stealth > 0.0,
+                                                   1.20 + 0.2 * self.stealth,
+                                                   1.0)
 
         h_e = h_mult * 7.070 * w_e ** 0.777 * v ** 0.894 * q ** 0.163
         h_t = h_mult * 8.710 * w_e ** 0.777 * v ** 0.696 * q ** 0.263
@@ -122,6 +125,9 @@ class Cost(object):
                                 c_eng * self.aircraft.num_engines * f_eng + \
                                 c_avionics * f_oth
 
+        # Production cost of each engine, e.g., for its maintenance
+        self.engine_cost = c_eng * f_eng
+
         self.acquisition_cost *= self.profit
 
         if self.spares:
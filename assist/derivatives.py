@@ -0,0 +1,447 @@
+"""
+Forward-mode derivatives of the sizing chain.
+
+A :class:`Dual` carries a value together with its derivatives with respect to
+a set of seeded inputs.  It overloads the numpy ufuncs and functions the
+models are written with, so evaluating the master equation, the empty weight
+regression and the cost equations on duals yields every partial derivative
+of the outputs in a single pass, instead of one finite difference per input::
+
+    values, partials = sizing_partials(build, dict(k_aero=0.5, cruise_speed=700), quantity=200)
+    partials['w_to', 'cruise_speed']
+
+where ``build(design)`` returns an ``(aircraft, mission)`` pair, as for the
+stages of :mod:`assist.pipeline`; batches of designs, as (N, 1) columns, get
+a derivative per design.
+
+Discrete choices, e.g., the design point on the wing loading grid, are made on
+the values, so the derivatives are those of the branch taken (the design wing
+loading moves in steps, its derivatives are zero).
+
+"""
+from __future__ import division
+import numpy
+from numpy import (asarray, broadcast_to, clip, cos, expand_dims, log, searchsorted, sign, sin,
+                   stack, take_along_axis, where, zeros)
+
+from assist.cost import Cost
+
+
+__all__ = ('Dual', 'seed', 'jacobian', 'sizing_outputs', 'sizing_partials', 'SIZING_OUTPUTS')
+
+
+SIZING_OUTPUTS = ('t_to_w', 'w_to_s', 'fuel_fraction', 'w_to', 'w_empty', 'wing_area', 'max_thrust',
+                  'acquisition_cost')
+
+
+class Dual(object):
+    """
+    A value and its derivatives with respect to each seeded input.
+
+    :param value: the value, a scalar or an array
+    :param deriv: the derivatives, with the seeds on the first axis, i.e., of
+                  shape (seeds,) + shape of ``value``, or broadcastable to it
+
+    """
+
+    def __init__(self, value, deriv):
+        self.value = asarray(value, dtype=float)
+        self.deriv = asarray(deriv, dtype=float)
+
+    def __repr__(self):
+        return "Dual({!r}, {!r})".format(self.value, self.deriv)
+
+    def __str__(self):
+        return str(self.value)
+
+    def __format__(self, spec):
+        return format(self.value, spec)
+
+    def __array__(self, *args, **kwargs):
+        raise TypeError("Cannot convert a Dual to an array, use its value")
+
+    def __bool__(self):
+        return bool(self.value)
+
+    __nonzero__ = __bool__
+
+    def __len__(self):
+        return len(self.value)
+
+    @property
+    def shape(self):
+        return self.value.shape
+
+    @property
+    def ndim(self):
+        return self.value.ndim
+
+    @property
+    def size(self):
+        return self.value.size
+
+    @property
+    def seeds(self):
+        return self.deriv.shape[0]
+
+    def full(self):
+        """
+        The derivatives broadcast to the full shape (seeds,) + shape of the value.
+
+        """
+
+        return broadcast_to(self.deriv, self.deriv.shape[:1] + self.value.shape)
+
+    def __getitem__(self, key):
+        key = key if isinstance(key, tuple) else (key,)
+        return Dual(self.value[key], self.full()[(slice(None),) + key])
+
+    def reshape(self, *shape):
+        value = self.value.reshape(*shape)
+        return Dual(value, self.full().reshape((self.seeds,) + value.shape))
+
+    def ravel(self):
+        return self.reshape(-1)
+
+    def copy(self):
+        return Dual(self.value.copy(), self.deriv.copy())
+
+    def argmin(self, axis=None):
+        return self.value.argmin(axis)
+
+    def argmax(self, axis=None):
+        return self.value.argmax(axis)
+
+    def any(self, axis=None):
+        return self.value.any(axis)
+
+    def all(self, axis=None):
+        return self.value.all(axis)
+
+    def max(self, axis=None, keepdims=False):
+        return _amax(self, axis, keepdims=keepdims)
+
+    def min(self, axis=None, keepdims=False):
+        return _amin(self, axis, keepdims=keepdims)
+
+    def sum(self, axis=None, keepdims=False):
+        return _sum(self, axis, keepdims=keepdims)
+
+    def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+        if method != '__call__' or 'out' in kwargs:
+            return NotImplemented
+
+        values = [_value(x) for x in inputs]
+        result = ufunc(*values, **kwargs)
+        if ufunc in _PIECEWISE_CONSTANT:
+            return result
+
+        ndim = asarray(result).ndim
+        derivs = [_deriv(x, ndim) for x in inputs]
+        if ufunc in _UNARY:
+            return Dual(result, _UNARY[ufunc](values[0], result, derivs[0]))
+        if ufunc in _BINARY:
+            return Dual(result, _BINARY[ufunc](values[0], values[1], result, derivs[0], derivs[1]))
+        raise TypeError("No derivative defined for numpy.{}".format(ufunc.__name__))
+
+    def __array_function__(self, func, types, args, kwargs):
+        if func in _FUNCTIONS:
+            return _FUNCTIONS[func](*args, **kwargs)
+        if func in _VALUE_FUNCTIONS:
+            return func(*[_values(arg) for arg in args], **kwargs)
+        return NotImplemented
+
+    # Operators go through the ufuncs above
+    def __add__(self, other):
+        return numpy.add(self, other)
+
+    def __radd__(self, other):
+        return numpy.add(other, self)
+
+    def __sub__(self, other):
+        return numpy.subtract(self, other)
+
+    def __rsub__(self, other):
+        return numpy.subtract(other, self)
+
+    def __mul__(self, other):
+        return numpy.multiply(self, other)
+
+    def __rmul__(self, other):
+        return numpy.multiply(other, self)
+
+    def __truediv__(self, other):
+        return numpy.true_divide(self, other)
+
+    def __rtruediv__(self, other):
+        return numpy.true_divide(other, self)
+
+    __div__, __rdiv__ = __truediv__, __rtruediv__
+
+    def __pow__(self, other):
+        return numpy.power(self, other)
+
+    def __rpow__(self, other):
+        return numpy.power(other, self)
+
+    def __neg__(self):
+        return numpy.negative(self)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        return numpy.absolute(self)
+
+    def __lt__(self, other):
+        return numpy.less(self, other)
+
+    def __le__(self, other):
+        return numpy.less_equal(self, other)
+
+    def __gt__(self, other):
+        return numpy.greater(self, other)
+
+    def __ge__(self, other):
+        return numpy.greater_equal(self, other)
+
+    def __eq__(self, other):
+        return numpy.equal(self, other)
+
+    def __ne__(self, other):
+        return numpy.not_equal(self, other)
+
+    __hash__ = None
+
+
+def _value(x):
+    return x.value if isinstance(x, Dual) else x
+
+
+def _values(arg):
+    if isinstance(arg, (list, tuple)):
+        return type(arg)(_value(x) for x in arg)
+    return _value(arg)
+
+
+def _deriv(x, ndim):
+    """
+    Derivatives of ``x`` lined up against a result of ``ndim`` dimensions (so
+    they broadcast after the seed axis), or zero for constants.
+
+    """
+
+    if not isinstance(x, Dual):
+        return 0.0
+    deriv = x.deriv
+    return deriv.reshape(deriv.shape[:1] + (1,) * (ndim + 1 - deriv.ndim) + deriv.shape[1:])
+
+
+def _axis(axis):
+    # Axis of the derivatives matching ``axis`` of the value
+    return axis + 1 if axis >= 0 else axis
+
+
+def _power(x, y, r, dx, dy):
+    deriv = 0.0
+    if not isinstance(dx, float):
+        deriv = y * x ** (y - 1) * dx
+    if not isinstance(dy, float):
+        deriv = deriv + r * log(where(x > 0, x, 1.0)) * dy
+    return deriv
+
+
+_UNARY = {numpy.negative: lambda x, r, dx: -dx,
+          numpy.positive: lambda x, r, dx: dx,
+          numpy.absolute: lambda x, r, dx: sign(x) * dx,
+          numpy.square: lambda x, r, dx: 2 * x * dx,
+          numpy.sqrt: lambda x, r, dx: dx / (2 * r),
+          numpy.exp: lambda x, r, dx: r * dx,
+          numpy.log: lambda x, r, dx: dx / x,
+          numpy.sin: lambda x, r, dx: cos(x) * dx,
+          numpy.cos: lambda x, r, dx: -sin(x) * dx,
+          numpy.tan: lambda x, r, dx: dx / (cos(x) * cos(x)),
+          numpy.arctan: lambda x, r, dx: dx / (1 + x * x),
+          numpy.reciprocal: lambda x, r, dx: -r * r * dx}
+
+_BINARY = {numpy.add: lambda x, y, r, dx, dy: dx + dy,
+           numpy.subtract: lambda x, y, r, dx, dy: dx - dy,
+           numpy.multiply: lambda x, y, r, dx, dy: dx * y + x * dy,
+           numpy.true_divide: lambda x, y, r, dx, dy: (dx - r * dy) / y,
+           numpy.power: _power,
+           numpy.maximum: lambda x, y, r, dx, dy: where(x >= y, dx, dy),
+           numpy.minimum: lambda x, y, r, dx, dy: where(x <= y, dx, dy)}
+
+# Ufuncs whose result does not vary continuously with their inputs
+_PIECEWISE_CONSTANT = frozenset((numpy.less, numpy.less_equal, numpy.greater, numpy.greater_equal,
+                                 numpy.equal, numpy.not_equal, numpy.logical_and, numpy.logical_or,
+                                 numpy.logical_not, numpy.isfinite, numpy.isnan, numpy.isinf,
+                                 numpy.sign, numpy.floor, numpy.ceil))
+
+# Functions that only depend on the values, e.g., to locate or select entries
+_VALUE_FUNCTIONS = frozenset((numpy.any, numpy.all, numpy.argmin, numpy.argmax, numpy.searchsorted,
+                              numpy.shape, numpy.ndim))
+
+_FUNCTIONS = {}
+
+
+def _implements(*functions):
+    def register(implementation):
+        for function in functions:
+            _FUNCTIONS[function] = implementation
+        return implementation
+    return register
+
+
+@_implements(numpy.where)
+def _where(condition, x, y):
+    condition = _value(condition)
+    value = where(condition, _value(x), _value(y))
+    return Dual(value, where(condition, _deriv(x, value.ndim), _deriv(y, value.ndim)))
+
+
+@_implements(numpy.broadcast_to)
+def _broadcast_to(array, shape, subok=False):
+    shape = tuple(shape) if hasattr(shape, '__iter__') else (shape,)
+    return Dual(broadcast_to(array.value, shape), _deriv(array, len(shape)))
+
+
+@_implements(numpy.broadcast_arrays)
+def _broadcast_arrays(*args, **kwargs):
+    shape = numpy.broadcast(*[_value(arg) for arg in args]).shape
+    return [numpy.broadcast_to(arg if isinstance(arg, Dual) else asarray(arg), shape) for arg in args]
+
+
+@_implements(numpy.stack)
+def _stack(arrays, axis=0, out=None, **kwargs):
+    arrays = list(arrays)
+    seeds = next(array.seeds for array in arrays if isinstance(array, Dual))
+    value = stack([_value(array) for array in arrays], axis)
+    derivs = [array.full() if isinstance(array, Dual) else zeros((seeds,) + asarray(array).shape)
+              for array in arrays]
+    return Dual(value, stack(derivs, _axis(axis)))
+
+
+@_implements(numpy.take_along_axis)
+def _take_along_axis(arr, indices, axis):
+    value = take_along_axis(arr.value, indices, axis)
+    return Dual(value, take_along_axis(arr.full(), indices[None], _axis(axis)))
+
+
+@_implements(numpy.expand_dims)
+def _expand_dims(a, axis):
+    return Dual(expand_dims(a.value, axis), expand_dims(a.deriv, _axis(axis)))
+
+
+@_implements(numpy.sum)
+def _sum(a, axis=None, dtype=None, out=None, keepdims=False, **kwargs):
+    deriv = a.full()
+    axes = tuple(range(1, deriv.ndim)) if axis is None else _axis(axis)
+    return Dual(a.value.sum(axis, keepdims=keepdims), deriv.sum(axes, keepdims=keepdims))
+
+
+def _extremum(locate):
+    def reduce(a, axis=None, out=None, keepdims=False, **kwargs):
+        if axis is None:
+            a, axis = a.ravel(), 0
+        picked = _take_along_axis(a, expand_dims(locate(a.value, axis), axis), axis)
+        if keepdims:
+            return picked
+        key = [slice(None)] * picked.ndim
+        key[axis] = 0
+        return picked[tuple(key)]
+    return reduce
+
+
+_amax = _implements(numpy.max, numpy.amax)(_extremum(numpy.argmax))
+_amin = _implements(numpy.min, numpy.amin)(_extremum(numpy.argmin))
+
+
+@_implements(numpy.interp)
+def _interp(x, xp, fp, left=None, right=None, period=None):
+    if isinstance(xp, Dual) or isinstance(fp, Dual) or left is not None or right is not None or period is not None:
+        return NotImplemented
+    xp, fp = asarray(xp, dtype=float), asarray(fp, dtype=float)
+    i = clip(searchsorted(xp, x.value, 'right'), 1, len(xp) - 1)
+    slope = (fp[i] - fp[i - 1]) / (xp[i] - xp[i - 1])
+    slope = where((x.value < xp[0]) | (x.value > xp[-1]), 0.0, slope)
+    return Dual(numpy.interp(x.value, xp, fp), slope * x.deriv)
+
+
+def seed(inputs, wrt=None):
+    """
+    Replaces the ``wrt`` entries of ``inputs`` (all of them by default) with
+    duals, each seeded with respect to itself.
+
+    :returns: the seeded inputs and the names of the seeds, in order
+
+    """
+
+    names = sorted(inputs) if wrt is None else list(wrt)
+    seeded = dict(inputs)
+    for i, name in enumerate(names):
+        value = asarray(inputs[name], dtype=float)
+        deriv = zeros((len(names),) + value.shape)
+        deriv[i] = 1.0
+        seeded[name] = Dual(value, deriv)
+    return seeded, names
+
+
+def jacobian(function, inputs, wrt=None):
+    """
+    Evaluates ``function(inputs)``, which returns a dictionary of outputs, and
+    its partial derivatives with respect to the ``wrt`` inputs in one pass.
+
+    :returns: the values of the outputs, and their partial derivatives as a
+              dictionary keyed by (output, input) pairs, shaped like the output
+
+    """
+
+    seeded, names = seed(inputs, wrt)
+    values, partials = {}, {}
+    for output, result in function(seeded).items():
+        values[output] = _value(result)
+        for i, name in enumerate(names):
+            if isinstance(result, Dual):
+                partials[output, name] = broadcast_to(result.deriv[i], result.shape).copy()
+            else:
+                partials[output, name] = zeros(asarray(result).shape)
+    return values, partials
+
+
+def sizing_outputs(build, design, **kwargs):
+    """
+    Synthesizes and sizes the aircraft ``build(design)`` returns, estimates
+    its acquisition cost, and returns the :data:`SIZING_OUTPUTS`.
+
+    The keyword arguments are passed on to :class:`Cost`, unless ``design``
+    has an entry of the same name.
+
+    """
+
+    aircraft, mission = build(design)
+    aircraft._synthesize(mission)
+    aircraft._size(mission)
+    aircraft.engine.size()
+    cost_kwargs = dict(kwargs)
+    cost_kwargs.update((name, design[name]) for name in Cost._DEFAULTS if name in design)
+    cost = Cost(aircraft=aircraft, **cost_kwargs).estimate_acquisition()
+    return dict(t_to_w=aircraft.t_to_w,
+                w_to_s=aircraft.w_to_s,
+                fuel_fraction=aircraft.fuel_fraction,
+                w_to=aircraft.w_to,
+                w_empty=aircraft.w_empty,
+                wing_area=aircraft.wing.area,
+                max_thrust=aircraft.engine.max_thrust * aircraft.num_engines,
+                acquisition_cost=cost)
+
+
+def sizing_partials(build, design, wrt=None, **kwargs):
+    """
+    The :func:`sizing_outputs` of ``build(design)`` and their partial
+    derivatives with respect to the ``wrt`` design variables, see
+    :func:`jacobian`.
+
+    """
+
+    return jacobian(lambda design: sizing_outputs(build, design, **kwargs), design, wrt)
@@ -0,0 +1,203 @@
+"""
+Performance envelopes of sized aircraft.
+
+:func:`envelope` evaluates the specific excess power, sustained turn rate and
+maximum load factor of a sized aircraft, or of a batch of them, over a grid of
+Mach numbers and altitudes, all at once rather than point by point::
+
+    aircraft._synthesize(mission)
+    aircraft._size(mission)
+    maps = envelope(aircraft, mach=linspace(0.1, 2.0, 500), altitude=linspace(0, 60000, 500))
+    maps.ps                  # (500, 500) array, altitudes by Mach numbers
+    maps.contour('ps', levels=[0, 200, 400, 600])
+
+Large grids can be split in chunks of altitudes evaluated on a thread pool,
+NumPy releases the GIL for the bulk of the work::
+
+    maps = envelope(aircraft, mach, altitude, chunk_size=64, threads=4)
+
+matplotlib is only imported to draw contours.
+
+"""
+from __future__ import division
+from copy import copy
+
+from numpy import asarray, broadcast_to, empty, errstate, inf, maximum, meshgrid, minimum, nan, sqrt, where
+
+from assist.environment import Atmosphere, G_0
+from assist.mission import FlightConditions, _master_equation
+
+
+__all__ = ('Envelope', 'envelope', 'MAPS')
+
+
+# Maps computed, see Envelope
+MAPS = ('ps', 'n_sustained', 'turn_rate', 'n_max', 'instantaneous_turn_rate')
+
+_KNOTS = 1.68780986  # ft/s
+
+
+class Envelope(object):
+    """
+    Maps of the performance of a sized aircraft over Mach numbers and altitudes,
+    each shaped (altitudes, Mach numbers), followed by the designs' axis for
+    a batch of designs.
+
+    :param mach: the Mach numbers of the grid
+    :param altitude: the altitudes of the grid (ft)
+    :param ps: specific excess power in level flight (ft/s)
+    :param n_sustained: largest load factor sustained without losing speed or
+                        altitude, NaN where level flight cannot be sustained
+    :param turn_rate: sustained turn rate (rad/s), NaN where level flight
+                      cannot be sustained
+    :param n_max: largest load factor, limited by the maximum lift
+                  coefficient or the structure
+    :param instantaneous_turn_rate: turn rate at the maximum load factor (rad/s)
+
+    """
+
+    def __init__(self, mach, altitude, ps, n_sustained, turn_rate, n_max, instantaneous_turn_rate):
+        self.mach = mach
+        self.altitude = altitude
+        self.ps = ps
+        self.n_sustained = n_sustained
+        self.turn_rate = turn_rate
+        self.n_max = n_max
+        self.instantaneous_turn_rate = instantaneous_turn_rate
+
+    def __repr__(self):
+        return "<Envelope {} altitudes x {} Mach numbers>".format(len(self.altitude), len(self.mach))
+
+    def __getitem__(self, name):
+        if name not in MAPS:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    @property
+    def shape(self):
+        return self.ps.shape
+
+    def contour(self, name='ps', levels=None, design=0, ax=None, **kwargs):
+        """
+        Draws the contours of a map against Mach number and altitude.
+
+        :param name: the map, one of :data:`MAPS`
+        :param levels: the values of the contours, chosen by matplotlib if None
+        :param design: the design plotted, for a batch of designs
+        :returns: the contour set drawn
+
+        The other keyword arguments are passed on to ``ax.contour``.
+
+        """
+
+        from matplotlib import pyplot
+
+        if ax is None:
+            ax = pyplot.figure().add_subplot(111)
+
+        values = self[name]
+        if values.ndim > 2:
+            values = values[..., design]
+        contours = ax.contour(self.mach, self.altitude, values, levels, **kwargs)
+        ax.clabel(contours, fontsize='small')
+        ax.set_xlabel('Mach')
+        ax.set_ylabel('Altitude (ft)')
+        ax.set_title(name)
+        return contours
+
+
+def envelope(aircraft, mach, altitude, weight_fraction=1.0, cl_max=None, n_limit=inf, chunk_size=None,
+             threads=0):
+    """
+    Evaluates the performance maps of a sized aircraft, see :class:`Envelope`.
+
+    :param aircraft: a sized aircraft, i.e., with its ``t_to_w`` and
+                     ``w_to_s`` set, or a batch of them
+    :param mach: the Mach numbers of the grid
+    :param altitude: the altitudes of the grid (ft)
+    :param weight_fraction: weight as a fraction of the takeoff weight
+    :param cl_max: maximum lift coefficient when maneuvering, that of the
+                   wing without flaps or slats if None
+    :param n_limit: structural limit of the load factor
+    :param chunk_size: altitudes evaluated at once, all of them if None
+    :param threads: threads evaluating the chunks, 0 to evaluate them in turn
+
+    :rtype: :class:`Envelope`
+
+    """
+
+    mach = asarray(mach, dtype=float)
+    altitude = asarray(altitude, dtype=float)
+    if cl_max is None:
+        cl_max = _clean_cl_max(aircraft.wing)
+
+    designs = asarray(aircraft.w_to_s * aircraft.t_to_w).size
+    shape = (len(altitude), len(mach)) + ((designs,) if designs > 1 else ())
+    maps = dict((name, empty(shape)) for name in MAPS)
+    atmosphere = Atmosphere()
+
+    def evaluate(rows):
+        _evaluate(aircraft, mach, altitude[rows], atmosphere, weight_fraction, cl_max, n_limit, designs,
+                  dict((name, values[rows]) for name, values in maps.items()))
+
+    chunk_size = chunk_size or len(altitude)
+    chunks = [slice(start, start + chunk_size) for start in range(0, len(altitude), chunk_size)]
+    if threads > 0 and len(chunks) > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(threads) as pool:
+            for _ in pool.map(evaluate, chunks):
+                pass
+    else:
+        for rows in chunks:
+            evaluate(rows)
+
+    return Envelope(mach, altitude, **maps)
+
+
+def _evaluate(aircraft, mach, altitude, atmosphere, beta, cl_max, n_limit, designs, out):
+    # The maps of a chunk of altitudes, written to out
+    m, h = meshgrid(mach, altitude)
+    conditions = FlightConditions(speed=m * atmosphere.speed_of_sound(h) / _KNOTS, altitude=h,
+                                  atmosphere=atmosphere)
+    expand = conditions._expand
+    speed, q = expand(conditions.speed), expand(conditions.dynamic_pressure)
+
+    w_to_s = aircraft.w_to_s
+    wing_loading = beta * w_to_s
+    available = aircraft.t_to_w
+
+    aircraft.configuration = None
+    mach = expand(conditions.mach)
+    alpha = aircraft.thrust_lapse(expand(conditions.altitude), mach)
+    cd_0 = aircraft._cd_0 if aircraft._cd_0 is not None else aircraft._cd_0_fxn(mach)
+    k_1 = aircraft._k_1 if aircraft._k_1 is not None else aircraft._k_1_fxn(mach)
+    k_2 = aircraft.k_2
+    cd_r = aircraft.cd_r
+
+    with errstate(invalid='ignore', divide='ignore'):
+        # Thrust loading required for level flight, against that available
+        level = _master_equation(beta, alpha, q, 1, w_to_s, cd_0, k_1, k_2, cd_r, 0)
+        ps = speed * (alpha / beta) * (available - level)
+
+        # Lift coefficient at which the drag takes all the thrust available
+        thrust = alpha * available / beta
+        c_l = (-k_2 + sqrt(k_2 * k_2 - 4 * k_1 * (cd_0 + cd_r - thrust * wing_loading / q))) / (2 * k_1)
+        n_max = minimum(cl_max * q / wing_loading, n_limit)
+        n_sustained = minimum(c_l * q / wing_loading, n_max)
+        n_sustained = where(n_sustained >= 1, n_sustained, nan)
+        turn_rate = G_0 * sqrt(n_sustained * n_sustained - 1) / speed
+        instantaneous = G_0 * sqrt(maximum(n_max * n_max - 1, 0)) / speed
+
+    for name, values in (('ps', ps), ('n_sustained', n_sustained), ('turn_rate', turn_rate), ('n_max', n_max),
+                         ('instantaneous_turn_rate', instantaneous)):
+        out[name][...] = broadcast_to(values, conditions.shape + (designs, 1)).reshape(out[name].shape)
+
+
+def _clean_cl_max(wing):
+    # Maximum lift coefficient of the wing without flaps or slats deployed
+    clean = copy(wing)
+    clean.flap_type = 'none'
+    clean.slats = False
+    clean.configuration = 'takeoff'
+    clean._reset()
+    return clean.cl_max
@@ -1,5 +1,5 @@
 from __future__ import division
-from math import exp, sqrt
+from numpy import any, exp, sqrt, where
 
 
 G_0 = 32.2
@@ -9,6 +9,8 @@ class Atmosphere(object):
     """
     Atmospheric calculations.
 
+    All the properties accept either scalar altitudes or arrays of them.
+
     :param density_sl: density at sea level (slugs/ft**3)
     :param temp_sl: temperature at sea level (degrees Fahrenheit)
 
@@ -30,47 +32,47 @@ class Atmosphere(object):
         Density as a function of altitude, in slugs/ft**3
 
         :param altitude: altitude in feet
-        :type altitude: float
+        :type altitude: float, array
 
-        :rtype: float
+        :rtype: float, array
 
         """
 
-        if altitude < 36089:
-            return self.density_sl * (1 - altitude / 145442) ** 4.255876
-        elif altitude < 65617:
-            return density_sl * 0.297076* exp((36089 - altitude) / 20806)
-        elif altitude <= 104987:
-            return density_sl * (0.978261 + altitude / 659515) ** -35.16319
-        raise ValueError("Altitude of {:.1f} is too high, maximum altitude allowed is 104,986 ft.".format(altitude))
+        self._verify_altitude(altitude)
+
+        return where(altitude < 36089,
+                     self.density_sl * (1 - altitude / 145442) ** 4.255876,
+                     where(altitude < 65617,
+                           self.density_sl * 0.297076 * exp((36089 - altitude) / 20806),
+                           self.density_sl * (0.978261 + altitude / 659515) ** -35.16319))
 
     def temperature(self, altitude):
         """
         Temperature as a function of altitude, in degrees Rankine
 
         :param altitude: altitude in feet
-        :type altitude: float
+        :type altitude: float, array
 
-        :rtype: float
+        :rtype: float, array
 
         """
 
-        if altitude < 36089:
-            return self.temperature_sl_rankine * (1 - altitude / 145442)
-        elif altitude < 65617:
-            return self.temperature_sl_rankine * 0.751865
-        elif altitude <= 104987:
-            return self.temperature_sl_rankine * (0.682457 + altitude / 945374)
-        raise ValueError("Altitude of {:.1f} is too high, maximum altitude allowed is 104,986 ft.".format(altitude))
+        self._verify_altitude(altitude)
+
+        return where(altitude < 36089,
+                     self.temperature_sl_rankine * (1 - altitude / 145442),
+                     where(altitude < 65617,
+                           self.temperature_sl_rankine * 0.751865,
+                           self.temperature_sl_rankine * (0.682457 + altitude / 945374)))
 
     def speed_of_sound(self, altitude):
         """
         Speed of Sound as a function of altitude, in ft/sec
 
         :param altitude: altitude in feet
-        :type altitude: float
+        :type altitude: float, array
 
-        :rtype: float
+        :rtype: float, array
 
         """
 
@@ -80,7 +82,10 @@ class Atmosphere(object):
         temperature = self.temperature(altitude)
         t = (temperature - 419.67) / 1540
 
-        if t < 0:
-            return 1.40107995826834
+        return where(t < 0, 1.40107995826834,
+                     0.131099998803052 * t * t * t - 0.21091027609333 * t * t + 0.00781004072769065 * t + 1.40107995826834)
 
-        return 0.131099998803052 * t * t * t - 0.21091027609333 * t * t + 0.00781004072769065 * t + 1.40107995826834
+    @staticmethod
+    def _verify_altitude(altitude):
+        if any(altitude > 104987):
+            raise ValueError("Altitude of {} is too high, maximum altitude allowed is 104,986 ft.".format(altitude))
@@ -0,0 +1,157 @@
+"""
+Feasibility analysis of designs.
+
+Cheap bound checks flag the designs (or batch rows) that cannot close before
+the constraint curves and the weight sizing are evaluated, so that the rest of
+the evaluation can be skipped for them, and record why.
+
+Reasons are bit flags, combined in an integer code per design; a code of zero
+means no check failed.
+
+"""
+from __future__ import division
+from numpy import asarray, logical_not, where
+
+from assist.mission import MAX_T_TO_W
+
+
+__all__ = ('Feasibility', 'check_mission', 'check_design_point', 'check_sizing', 'check_sized',
+           'describe', 'THRUST', 'TAKEOFF', 'LANDING', 'FUEL', 'ENVELOPE', 'WEIGHT', 'WEIGHT_RANGE')
+
+
+THRUST = 1
+TAKEOFF = 2
+LANDING = 4
+FUEL = 8
+ENVELOPE = 16
+WEIGHT = 32
+WEIGHT_RANGE = 64
+
+_REASONS = ((THRUST, "segment requires more than the maximum thrust loading at any wing loading"),
+            (TAKEOFF, "takeoff thrust cannot overcome ground friction and drag"),
+            (LANDING, "landing ground roll cannot stop the aircraft"),
+            (FUEL, "segment weight fraction outside (0, 1]"),
+            (ENVELOPE, "no wing loading meets every constraint below the maximum thrust loading"),
+            (WEIGHT, "fuel fraction does not exceed the empty weight fraction at any takeoff weight"),
+            (WEIGHT_RANGE, "takeoff weight solution outside the sizing bounds"))
+
+
+def describe(code):
+    """
+    The reasons encoded in a single feasibility code.
+
+    :rtype: list of str
+
+    """
+
+    return [reason for flag, reason in _REASONS if int(code) & flag]
+
+
+class Feasibility(object):
+    """
+    Infeasibility codes of a design, or of every design in a batch.
+
+    :param code: combined reason flags, zero for designs that passed every check
+    :param segment: index of the first mission segment found infeasible, -1 if none
+
+    """
+
+    def __init__(self, code=0, segment=-1):
+        self.code = asarray(code)
+        self.segment = asarray(segment)
+
+    def __repr__(self):
+        if self.code.ndim == 0:
+            return "<Feasibility {}>".format('; '.join(self.reasons) or 'feasible')
+        return "<Feasibility {} of {} designs feasible>".format(self.feasible.sum(), self.feasible.size)
+
+    @property
+    def feasible(self):
+        return self.code == 0
+
+    @property
+    def reasons(self):
+        """
+        Reasons for a single design, or a list of them for a batch.
+
+        """
+
+        if self.code.ndim == 0:
+            return describe(self.code)
+        return [describe(code) for code in self.code.ravel()]
+
+    def flag(self, infeasible, reason, segment=-1):
+        """
+        Records ``reason`` for the designs where ``infeasible`` is true.
+
+        """
+
+        first = infeasible & (self.segment < 0) if segment >= 0 else False
+        self.segment = where(first, segment, self.segment)
+        self.code = self.code | where(infeasible, reason, 0)
+        return self
+
+
+def check_mission(aircraft, mission, feasibility=None):
+    """
+    Bounds each segment's thrust loading and weight fraction before any
+    constraint curve is evaluated.
+
+    Restores the aircraft's loadout and configuration when done.
+
+    """
+
+    feasibility = Feasibility() if feasibility is None else feasibility
+    loadout, configuration = aircraft.loadout, aircraft.configuration
+
+    try:
+        weight_fraction = 1.0
+        for i, segment in enumerate(mission.segments):
+            bound = segment.thrust_to_weight_bound(aircraft, prior_weight_fraction=weight_fraction)
+            if 'takeoff' in segment.kind:
+                reason = TAKEOFF
+            elif 'land' in segment.kind:
+                reason = LANDING
+            else:
+                reason = THRUST
+            feasibility.flag(logical_not(bound < MAX_T_TO_W), reason, i)
+
+            fraction = segment.weight_fraction
+            feasibility.flag(logical_not((fraction > 0) & (fraction <= 1)), FUEL, i)
+            weight_fraction = weight_fraction * fraction
+    finally:
+        aircraft.loadout, aircraft.configuration = loadout, configuration
+
+    return feasibility
+
+
+def check_design_point(aircraft, feasibility):
+    """
+    Flags designs whose constraint envelope has no point below the maximum thrust loading.
+
+    """
+
+    return feasibility.flag(logical_not(aircraft.t_to_w < MAX_T_TO_W), ENVELOPE)
+
+
+def check_sizing(aircraft, w_to_max, feasibility):
+    """
+    Flags designs that cannot close at any takeoff weight up to ``w_to_max``.
+
+    The empty weight fraction regressions decrease with takeoff weight, so if
+    the fuel fraction does not exceed it at the heaviest weight, it never does.
+    Designs already found infeasible (NaN results) are left as they are.
+
+    """
+
+    margin = aircraft.fuel_fraction - aircraft._empty_weight_fraction(w_to_max)
+    return feasibility.flag(margin <= 0, WEIGHT)
+
+
+def check_sized(aircraft, w_to_min, w_to_max, feasibility):
+    """
+    Flags designs whose takeoff weight solution falls outside the sizing bounds.
+
+    """
+
+    return feasibility.flag((aircraft.w_to <= w_to_min) | (aircraft.w_to >= w_to_max), WEIGHT_RANGE)
@@ -0,0 +1,204 @@
+"""
+Fleets made of several sized designs.
+
+A :class:`FleetMix` takes per-design results already computed, e.g., the
+columns :func:`~assist.pipeline.collect` returns for a sweep, and evaluates
+whether candidate fleets cover a set of missions and what they cost, for
+thousands of candidate mixes at once, each a row of aircraft counts::
+
+    results = collect(Pipeline(designs, Synthesize(build), Size(build), EstimateCost(build, quantity=200)))
+    fleet = FleetMix(unit_cost=results['acquisition_cost'] / 200,
+                     operating_cost=operating_npv_per_aircraft,
+                     capable=[[True, True, False], [False, True, True]],
+                     required=[4, 10, 6])
+    fleet.evaluate(fleet.mixes(20))           # cost, covered and shortfall of each mix
+    counts, cost = fleet.cheapest()           # by integer programming
+
+Each mission needs ``required`` aircraft of the designs capable of flying it,
+and an aircraft is assigned to one mission at most.  A mix covers the
+missions if such an assignment exists, i.e., if every set of missions needs
+no more aircraft than the mix has of the designs flying any of them (Hall's
+condition), which is evaluated for every mix and set of missions at once.
+
+"""
+from __future__ import division
+
+from numpy import (arange, asarray, concatenate, eye, flatnonzero, full, inf, isfinite, maximum, minimum, unravel_index,
+                   where, zeros)
+
+
+__all__ = ('FleetMix',)
+
+
+# Missions of a fleet at most, the sets of missions are enumerated
+MAX_MISSIONS = 16
+
+# Bytes of the (mixes, sets of missions) arrays a chunk of mixes is evaluated
+# in, about, so that chunks hold fewer mixes the more missions there are
+CHUNK_BYTES = 64 * 2 ** 20
+
+
+class FleetMix(object):
+    """
+    Candidate fleets of sized designs, and the missions they must cover.
+
+    :param unit_cost: acquisition cost of an aircraft of each design
+    :param capable: whether each design can fly each mission, shaped
+                    (designs, missions)
+    :param required: aircraft each mission needs
+    :param operating_cost: cost of operating an aircraft of each design,
+                           e.g., the net present value of its life-cycle
+                           cost, see :class:`~assist.lifecycle.LifeCycleCost`
+    :param available: aircraft of each design available at most, unlimited
+                      if None
+    :param names: names of the designs, for reports
+
+    Designs whose cost is not finite, e.g., that did not close, are not
+    available.
+
+    """
+
+    def __init__(self, unit_cost, capable, required, operating_cost=0.0, available=None, names=None):
+        self.capable = asarray(capable, dtype=bool)
+        designs, missions = self.capable.shape
+        if missions > MAX_MISSIONS:
+            raise ValueError("Fleets cover {} missions at most, not {}".format(MAX_MISSIONS, missions))
+        self.unit_cost = asarray(unit_cost, dtype=float).reshape(-1) + zeros(designs)
+        self.operating_cost = asarray(operating_cost, dtype=float).reshape(-1) + zeros(designs)
+        self.required = asarray(required, dtype=float).reshape(-1) + zeros(missions)
+        self.available = full(designs, inf) if available is None else asarray(available, dtype=float) + zeros(designs)
+        self.names = list(names) if names is not None else ['design {}'.format(i) for i in range(designs)]
+
+        finite = isfinite(self.unit_cost + self.operating_cost)
+        self.available[~finite] = 0
+        self._costs = where(finite, self.unit_cost, 0.0), where(finite, self.operating_cost, 0.0)
+        self.capable = self.capable & (self.available > 0)[:, None]
+        uncovered = flatnonzero((self.required > 0) & ~self.capable.any(0))
+        if len(uncovered):
+            raise ValueError("No available design can fly missions {}".format(list(uncovered)))
+
+        # Every set of missions, a row each, with the designs flying any of them
+        subsets = (arange(1, 2 ** missions)[:, None] >> arange(missions)) & 1
+        self._demand = subsets @ self.required
+        self._reach = (subsets @ self.capable.T) > 0
+
+    def __repr__(self):
+        return "<FleetMix {} designs, {} missions>".format(*self.capable.shape)
+
+    @property
+    def cost_per_aircraft(self):
+        # Zero for the designs not available
+        return self._costs[0] + self._costs[1]
+
+    def mixes(self, max_count):
+        """
+        Every mix of up to ``max_count`` aircraft of each design (a scalar,
+        or one per design), a row each.
+
+        """
+
+        counts = minimum(asarray(max_count) + zeros(len(self.unit_cost)), self.available).astype(int) + 1
+        return asarray(unravel_index(arange(int(counts.prod())), tuple(counts))).T
+
+    def evaluate(self, mixes, chunk_size=None):
+        """
+        The ``cost``, ``acquisition_cost`` and ``operating_cost`` of mixes of
+        aircraft, each a row of counts per design, whether they ``covered``
+        the missions, and their ``shortfall``, the aircraft they miss for the
+        set of missions they cover worst.
+
+        Mixes are evaluated ``chunk_size`` at a time, as many as fit in
+        :data:`CHUNK_BYTES` if None.
+
+        """
+
+        mixes = asarray(mixes, dtype=float)
+        if chunk_size is None:
+            # The product of the mixes and the sets of missions, and the shortfall
+            chunk_size = max(CHUNK_BYTES // (2 * 8 * len(self._demand)), 1)
+        shortfall = concatenate([self._shortfall(mixes[start:start + chunk_size]).max(1)
+                                 for start in range(0, len(mixes), chunk_size)] or [zeros(0)])
+        acquisition, operating = mixes @ self._costs[0], mixes @ self._costs[1]
+        within = (mixes <= self.available).all(1)
+        return dict(cost=acquisition + operating, acquisition_cost=acquisition, operating_cost=operating,
+                    covered=(shortfall <= 0) & within, shortfall=maximum(shortfall, 0))
+
+    def cheapest(self, method='milp'):
+        """
+        The mix covering the missions at the lowest cost.
+
+        :param method: 'milp' to solve the integer program exactly, with
+                       :func:`scipy.optimize.milp`, or 'greedy' to add the
+                       aircraft that covers the most per dollar until the
+                       missions are covered, then drop those not needed
+        :returns: the count of aircraft of each design, and their cost
+
+        """
+
+        if method == 'milp':
+            counts = self._milp()
+        elif method == 'greedy':
+            counts = self._greedy()
+        else:
+            raise ValueError("Search method '{}' is not one of 'milp' or 'greedy'".format(method))
+        return counts, float(counts @ self.cost_per_aircraft)
+
+    def _shortfall(self, mixes):
+        # Aircraft missing for each set of missions, (mixes, sets)
+        return self._demand - mixes @ self._reach.T
+
+    def _deficit(self, mixes):
+        # Aircraft missing, summed over the sets of missions, decreases with
+        # every aircraft added that flies a mission short of aircraft
+        return maximum(self._shortfall(mixes), 0).sum(1)
+
+    def _greedy(self):
+        designs = len(self.unit_cost)
+        counts = zeros(designs)
+        cost = self.cost_per_aircraft
+        deficit = self._deficit(counts[None])[0]
+        while deficit > 0:
+            candidates = counts + eye(designs)
+            gain = deficit - self._deficit(candidates)
+            gain[candidates.diagonal() > self.available] = 0
+            if not (gain > 0).any():
+                raise ValueError("The available aircraft cannot cover the missions")
+            value = where(gain > 0, gain / maximum(cost, 1e-12), -inf)
+            best = value.argmax()
+            counts[best] += 1
+            deficit -= gain[best]
+
+        # Aircraft not needed once the others were added, the dearest first
+        for design in cost.argsort()[::-1]:
+            while counts[design] > 0:
+                counts[design] -= 1
+                if self._shortfall(counts[None]).max() > 0:
+                    counts[design] += 1
+                    break
+        return counts.astype(int)
+
+    def _milp(self):
+        from scipy.optimize import Bounds, LinearConstraint, milp
+
+        # Variables: the count of each design, then the aircraft of each
+        # design assigned to each mission it can fly
+        designs, missions = self.capable.shape
+        pairs = flatnonzero(self.capable.ravel())
+        design_of, mission_of = unravel_index(pairs, self.capable.shape)
+        variables = designs + len(pairs)
+
+        cost = concatenate((self.cost_per_aircraft, zeros(len(pairs))))
+        assigned = zeros((designs, variables))
+        assigned[design_of, designs + arange(len(pairs))] = 1
+        assigned[arange(designs), arange(designs)] = -1
+        covering = zeros((missions, variables))
+        covering[mission_of, designs + arange(len(pairs))] = 1
+
+        result = milp(cost, integrality=1,
+                      bounds=Bounds(0, concatenate((self.available, full(len(pairs), inf)))),
+                      constraints=[LinearConstraint(assigned, -inf, 0),
+                                   LinearConstraint(covering, self.required, inf)])
+        if not result.success:
+            raise ValueError("The available aircraft cannot cover the missions: {}".format(result.message))
+        return result.x[:designs].round().astype(int)
+
@@ -0,0 +1,325 @@
+"""
+Instrumentation of the hot paths of sizing, aggregated over a sweep.
+
+A :class:`Profiler` times every call to the atmosphere, engine, wing,
+constraint, sizing, cost and pipeline code made while it is active, counts
+the hits and misses of the caches, and optionally profiles the calls with
+:mod:`cProfile` and their memory with :mod:`tracemalloc`::
+
+    with Profiler(profile=True, memory=True, events=logging.DEBUG) as profiler:
+        for batch in pipeline:
+            ...
+
+    profiler.report()['stages']['synthesize']     # calls, seconds, self_seconds
+    profiler.save('sweep.json')
+
+The methods are only wrapped while a profiler is active, so instrumentation
+costs nothing otherwise.  Timers are per process, so a profiler only sees the
+evaluations of a process pool's workers if it is entered in each of them.
+
+The model reports events, e.g., the weight fraction of each segment, through
+the ``assist`` loggers at the DEBUG level; ``events`` captures those at or
+above the given level in the report.
+
+"""
+from __future__ import division
+import json
+import os
+from cProfile import Profile
+from importlib import import_module
+from logging import Handler, getLogger
+from pstats import Stats
+from threading import local
+from time import perf_counter
+
+from numpy import asarray, generic, ndarray
+
+
+__all__ = ('Profiler', 'STAGES', 'CACHES')
+
+
+# Methods timed, as (module, class, attribute, stage) tuples; stages nest, so
+# the time of a stage includes that of the stages it calls
+STAGES = (('assist.environment', 'Atmosphere', 'density', 'atmosphere'),
+          ('assist.environment', 'Atmosphere', 'temperature', 'atmosphere'),
+          ('assist.environment', 'Atmosphere', 'speed_of_sound', 'atmosphere'),
+          ('assist.environment', 'Atmosphere', 'specific_heat_ratio', 'atmosphere'),
+          ('assist.components.engine', 'Engine', 'thrust_lapse', 'engine.thrust_lapse'),
+          ('assist.components.engine', 'Engine', 'tsfc', 'engine.tsfc'),
+          ('assist.components.engine', 'Engine', 'size', 'engine.size'),
+          ('assist.components.wing', 'Wing', '_estimate_cl_max', 'wing.cl_max'),
+          ('assist.mission', 'Segment', 'thrust_to_weight_required', 'constraints'),
+          ('assist.mission', 'Segment', 'thrust_to_weight_bound', 'screening'),
+          ('assist.mission', 'FlightConditions', 'thrust_to_weight_required', 'constraints'),
+          ('assist.aircraft', 'Aircraft', '_synthesize', 'synthesize'),
+          ('assist.aircraft', 'Aircraft', '_size', 'size'),
+          ('assist.cost', 'Cost', 'estimate_acquisition', 'cost'),
+          ('assist.pipeline', 'Screen', 'process', 'pipeline.screen'),
+          ('assist.pipeline', 'Synthesize', 'process', 'pipeline.synthesize'),
+          ('assist.pipeline', 'Size', 'process', 'pipeline.size'),
+          ('assist.pipeline', 'SizeEngine', 'process', 'pipeline.size_engine'),
+          ('assist.pipeline', 'EstimateCost', 'process', 'pipeline.cost'))
+
+
+def _counters(cache, call):
+    # Caches that count their own hits and misses
+    hits, misses = cache.hits, cache.misses
+    result = call()
+    return result, cache.hits - hits, cache.misses - misses
+
+
+def _memoized(wing, call):
+    # The wing memoizes its maximum lift coefficient per configuration
+    hit = wing.configuration in wing._cl_max
+    return call(), int(hit), int(not hit)
+
+
+# Caches whose hit rates are counted, as (module, class, attribute, name, probe)
+CACHES = (('assist.components.wing', 'Wing', 'cl_max', 'wing.cl_max', _memoized),
+          ('assist.cache', 'EvaluationCache', 'get', 'evaluation', _counters),
+          ('assist.surrogate', 'SurrogateCache', '__call__', 'surrogate', _counters))
+
+# Functions listed in the report of a cProfile capture
+_TOP_FUNCTIONS = 25
+
+
+class Profiler(object):
+    """
+    Collects timers, call counters and cache hit rates of the model while
+    active, i.e., inside a ``with`` block, or between :meth:`start` and
+    :meth:`stop`.  A profiler can be reentered to aggregate several runs.
+
+    :param profile: whether to capture a :mod:`cProfile` profile of each
+                    outermost instrumented call, i.e., of each evaluation
+    :param memory: whether to trace the peak memory allocated by each
+                   outermost instrumented call with :mod:`tracemalloc`
+    :param events: level of the ``assist`` log records to capture as events,
+                   e.g., ``logging.DEBUG``, or None not to capture them
+
+    """
+
+    _active = None
+
+    def __init__(self, profile=False, memory=False, events=None):
+        self.profile = profile
+        self.memory = memory
+        self.events = events
+        self.stages = {}
+        self.caches = {}
+        self.peaks = {}
+        self.records = []
+        self.seconds = 0.0
+        self._stats = None
+        self._patches = []
+        self._local = local()
+
+    def __repr__(self):
+        return "<Profiler {} stages, {:.3f} s>".format(len(self.stages), self.seconds)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def start(self):
+        if Profiler._active is not None:
+            raise RuntimeError("Another profiler is already active")
+        Profiler._active = self
+
+        if self.memory:
+            import tracemalloc
+            self._tracing = not tracemalloc.is_tracing()
+            if self._tracing:
+                tracemalloc.start()
+        self._profile = Profile() if self.profile else None
+        if self.events is not None:
+            self._handler = _Capture(self.records, self.events)
+            self._logger = getLogger('assist')
+            self._level = self._logger.level
+            self._logger.addHandler(self._handler)
+            if self._logger.getEffectiveLevel() > self.events:
+                self._logger.setLevel(self.events)
+
+        for module, cls, attribute, stage in STAGES:
+            self._patch(module, cls, attribute, self._timed(stage))
+        for module, cls, attribute, name, probe in CACHES:
+            self._patch(module, cls, attribute, self._counted(name, probe))
+        self._started = perf_counter()
+
+    def stop(self):
+        self.seconds += perf_counter() - self._started
+        while self._patches:
+            owner, attribute, original = self._patches.pop()
+            setattr(owner, attribute, original)
+
+        if self.events is not None:
+            self._logger.removeHandler(self._handler)
+            self._logger.setLevel(self._level)
+        if self._profile is not None:
+            if self._stats is None:
+                self._stats = Stats(self._profile)
+            else:
+                self._stats.add(self._profile)
+        if self.memory and self._tracing:
+            import tracemalloc
+            tracemalloc.stop()
+        Profiler._active = None
+
+    @property
+    def stats(self):
+        """
+        The :class:`pstats.Stats` of the evaluations profiled, if any.
+
+        """
+
+        return self._stats
+
+    def report(self):
+        """
+        The measurements so far, as a JSON-serializable dictionary with:
+
+        * ``seconds``: time the profiler was active
+        * ``stages``: for each stage, the ``calls``, the total ``seconds``,
+          the ``self_seconds`` spent outside nested stages, and the number of
+          ``designs`` of the pipeline stages
+        * ``caches``: for each cache, the ``hits``, ``misses`` and ``hit_rate``
+        * ``memory``: for each stage called outermost, the largest and mean
+          peak allocation of its calls, in bytes, if memory was traced
+        * ``profile``: the functions with the most cumulative time, if profiled
+        * ``events``: the log records captured, if any
+
+        """
+
+        report = dict(seconds=self.seconds,
+                      stages=dict((stage, dict(timer)) for stage, timer in self.stages.items()),
+                      caches={})
+        for name, (hits, misses) in self.caches.items():
+            lookups = hits + misses
+            report['caches'][name] = dict(hits=hits, misses=misses, hit_rate=hits / lookups if lookups else None)
+        if self.memory:
+            report['memory'] = dict((stage, dict(calls=len(peaks), max_bytes=max(peaks),
+                                                 mean_bytes=sum(peaks) / len(peaks)))
+                                    for stage, peaks in self.peaks.items())
+        if self._stats is not None:
+            report['profile'] = _top_functions(self._stats, _TOP_FUNCTIONS)
+        if self.events is not None:
+            report['events'] = self.records
+        return report
+
+    def save(self, path):
+        """
+        Writes the :meth:`report` as JSON, atomically.
+
+        """
+
+        with open(path + '.tmp', 'w') as f:
+            json.dump(self.report(), f, indent=2, default=_jsonable)
+        os.replace(path + '.tmp', path)
+
+    def _patch(self, module, cls, attribute, wrap):
+        owner = getattr(import_module(module), cls)
+        original = owner.__dict__[attribute]
+        if isinstance(original, property):
+            wrapped = property(wrap(original.fget), original.fset, original.fdel, original.__doc__)
+        else:
+            wrapped = wrap(original)
+        self._patches.append((owner, attribute, original))
+        setattr(owner, attribute, wrapped)
+
+    def _timed(self, stage):
+        stages = self.stages
+        frames = self._local
+
+        def wrap(function):
+            def timed(*args, **kwargs):
+                stack = getattr(frames, 'stack', None)
+                if stack is None:
+                    stack = frames.stack = []
+                outermost = not stack
+                if outermost:
+                    self._begin()
+                stack.append(0.0)
+                start = perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    elapsed = perf_counter() - start
+                    nested = stack.pop()
+                    if stack:
+                        stack[-1] += elapsed
+                    timer = stages.get(stage)
+                    if timer is None:
+                        timer = stages[stage] = dict(calls=0, seconds=0.0, self_seconds=0.0)
+                    timer['calls'] += 1
+                    timer['seconds'] += elapsed
+                    timer['self_seconds'] += elapsed - nested
+                    if stage.startswith('pipeline.'):
+                        timer['designs'] = timer.get('designs', 0) + len(args[1])
+                    if outermost:
+                        self._end(stage)
+
+            timed.__wrapped__ = function
+            return timed
+
+        return wrap
+
+    def _counted(self, name, probe):
+        caches = self.caches
+
+        def wrap(function):
+            def counted(cache, *args, **kwargs):
+                result, hits, misses = probe(cache, lambda: function(cache, *args, **kwargs))
+                total_hits, total_misses = caches.get(name, (0, 0))
+                caches[name] = (total_hits + hits, total_misses + misses)
+                return result
+
+            counted.__wrapped__ = function
+            return counted
+
+        return wrap
+
+    def _begin(self):
+        if self.memory:
+            import tracemalloc
+            tracemalloc.reset_peak()
+            self._baseline = tracemalloc.get_traced_memory()[0]
+        if self._profile is not None:
+            self._profile.enable()
+
+    def _end(self, stage):
+        if self._profile is not None:
+            self._profile.disable()
+        if self.memory:
+            import tracemalloc
+            self.peaks.setdefault(stage, []).append(tracemalloc.get_traced_memory()[1] - self._baseline)
+
+
+class _Capture(Handler):
+    # Keeps the log records of the model, with their structured fields
+    _STANDARD = frozenset(vars(getLogger().makeRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+    def __init__(self, records, level):
+        Handler.__init__(self, level)
+        self.records = records
+
+    def emit(self, record):
+        event = dict(logger=record.name, level=record.levelname, message=record.getMessage())
+        event.update((key, value) for key, value in vars(record).items() if key not in self._STANDARD)
+        self.records.append(event)
+
+
+def _top_functions(stats, count):
+    rows = []
+    for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+        rows.append(dict(function=function, file=filename, line=line, calls=calls,
+                         seconds=own, cumulative_seconds=cumulative))
+    rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+    return rows[:count]
+
+
+def _jsonable(value):
+    if isinstance(value, (ndarray, generic)):
+        return asarray(value).tolist()
+    return str(value)
@@ -0,0 +1,204 @@
+"""
+Operating and support costs of a fleet over its service life, to complement
+the acquisition cost of :class:`~assist.cost.Cost`.
+
+A :class:`LifeCycleCost` evaluates the annual fuel, crew, maintenance and
+depreciation costs of sized designs for many fleet scenarios at once, as
+(design, scenario, year) cubes, and reduces them to net present values and
+totals over the service life, a chunk of scenarios at a time, so large
+scenario sets are only ever held as columns of numbers::
+
+    cost = Cost(aircraft=aircraft, quantity=200)
+    cost.estimate_acquisition()
+    life_cycle = LifeCycleCost(cost, service_life=25)
+
+    scenarios = dict(fleet_size=repeat([100, 200, 400], 1000),
+                     flight_hours=tile(linspace(200, 400, 1000), 3),
+                     fuel_price=3.0)
+    npv, total = life_cycle.reduce(scenarios)
+    npv['total']                             # (designs, scenarios)
+    life_cycle.cube(scenarios)['fuel']       # (designs, scenarios, years)
+
+Scenarios may also be streamed as batches, e.g.,
+``life_cycle.reduce(full_factorial(fleet_size=..., fuel_price=...))``.
+
+The estimates follow the operations and maintenance costs of Raymer, D.,
+"Aircraft Design: A Conceptual Approach," 3rd ed., AIAA, 1999, Sec. 18.5;
+costs are in the dollars of the acquisition cost's ``year``.
+
+"""
+from __future__ import division
+
+from numpy import arange, asarray, broadcast_arrays, broadcast_to, concatenate
+
+from assist.util import verify_value
+
+
+__all__ = ('LifeCycleCost', 'CATEGORIES', 'SCENARIO_INPUTS')
+
+
+# Annual costs estimated, see LifeCycleCost.cube
+CATEGORIES = ('fuel', 'crew', 'maintenance', 'depreciation')
+
+# Inputs that may vary between scenarios, with their defaults
+SCENARIO_INPUTS = dict(fleet_size=None,         # aircraft operated, the quantity produced if None
+                       flight_hours=300.0,      # flight hours per aircraft and year
+                       fuel_price=2.5,          # USD per gallon
+                       fuel_escalation=0.0,     # real growth of the fuel price per year
+                       discount_rate=0.03)      # real discount rate per year
+
+DEFAULT_CHUNK_SIZE = 1024
+
+
+class LifeCycleCost(object):
+    """
+    Annual operating and support costs of a fleet of sized aircraft.
+
+    :param cost: the :class:`~assist.cost.Cost` of the aircraft, its
+                 acquisition is estimated if it was not
+    :param service_life: years the fleet is operated and depreciated over
+    :param sortie_hours: flight hours of a sortie, i.e., of a mission of the
+                         sized fuel fraction
+    :param crew_size: crew per aircraft
+    :param crew_ratio: crews per aircraft
+    :param crew_salary: cost of a crew member per year (USD)
+    :param mmh_per_fh: maintenance man-hours per flight hour
+    :param r_maintenance: maintenance labor rate (USD per hour), the
+                          manufacturing rate of the cost if None
+    :param residual_value: value of an aircraft at the end of its service
+                           life, as a fraction of its cost
+    :param fuel_density: weight of a gallon of fuel (lbm)
+
+    """
+
+    _DEFAULTS = dict(service_life=[1, None, 25, 'yr'],
+                     sortie_hours=[0.0, None, 1.5, 'hr'],
+                     crew_size=[1, None, 1, 'n/a'],
+                     crew_ratio=[0.0, None, 1.5, 'unitless'],
+                     crew_salary=[0.0, None, 150000.0, 'USD'],
+                     mmh_per_fh=[0.0, None, 25.0, 'hr'],
+                     r_maintenance=[0.0, None, None, 'USD'],
+                     residual_value=[0.0, 1.0, 0.1, 'unitless'],
+                     fuel_density=[0.0, None, 6.7, 'lbm'])
+
+    def __init__(self, cost, **kwargs):
+        self.cost = cost
+        for k, v in self._DEFAULTS.items():
+            val = kwargs.pop(k, v[2])
+            verify_value(k, val, v[0], v[1], v[3])
+            setattr(self, k, val)
+        if kwargs:
+            raise TypeError("Unexpected arguments: {}".format(', '.join(sorted(kwargs))))
+
+        if getattr(cost, 'acquisition_cost', None) is None:
+            cost.estimate_acquisition()
+        f_mfg, _, f_oth = cost.escalations
+        if self.r_maintenance is None:
+            self.r_maintenance = cost.r_mfg * f_mfg
+
+        # Rates of each design, per flight hour or per aircraft and year
+        aircraft = cost.aircraft
+        num_engines = aircraft.num_engines
+        unit_cost = cost.acquisition_cost / cost.quantity
+        airframe_cost = unit_cost - cost.engine_cost * num_engines
+        self._fuel_per_hour = aircraft.fuel_fraction * aircraft.w_to / (self.sortie_hours * self.fuel_density)
+        self._materials_per_hour = f_oth * (3.3 * airframe_cost / 1e6 + 14.2 +
+                                            (58 * cost.engine_cost / 1e6 - 26.1) * num_engines)
+        self._depreciation = unit_cost * (1 - self.residual_value) / self.service_life
+        self.designs = asarray(self._fuel_per_hour * self._materials_per_hour * self._depreciation).size
+
+    def __repr__(self):
+        return "<LifeCycleCost {} designs over {} years>".format(self.designs, self.service_life)
+
+    def cube(self, scenarios=None, years=None):
+        """
+        The annual costs of each category, and their ``total``, shaped
+        (designs, scenarios, years), without the designs' axis for a single
+        design.
+
+        :param scenarios: a dictionary of the :data:`SCENARIO_INPUTS` that
+                          vary, each a scalar or a 1-D array of scenarios
+        :param years: the years evaluated, counted from 0 at entry into
+                      service, all years of the service life if None; costs
+                      are zero after the service life
+
+        """
+
+        years = arange(self.service_life) if years is None else asarray(years)
+        cube = dict((name, base[:, :, None] * growth[None]) for name, (base, growth) in
+                    self._annual(self._scenarios(scenarios or {}), years).items())
+        cube['total'] = sum(cube[name] for name in CATEGORIES)
+        if self.designs == 1:
+            cube = dict((name, values[0]) for name, values in cube.items())
+        return cube
+
+    def reduce(self, scenarios=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Net present values and totals over the service life of the costs of
+        each category, and of their ``total``, shaped (designs, scenarios),
+        without the designs' axis for a single design.
+
+        Costs are discounted from the end of each year.  Scenarios are taken
+        ``chunk_size`` at a time, and the years of each are reduced before
+        the designs are multiplied in, so the cubes are never evaluated.
+
+        :param scenarios: a dictionary of the :data:`SCENARIO_INPUTS` that
+                          vary, see :meth:`cube`, or an iterable of
+                          :class:`~assist.pipeline.Batch` of them
+        :returns: the net present values and the totals, each a dictionary
+                  keyed by category
+
+        """
+
+        if scenarios is None or isinstance(scenarios, dict):
+            every = self._scenarios(scenarios or {})
+            chunks = (dict((name, column[start:start + chunk_size]) for name, column in every.items())
+                      for start in range(0, len(every['fleet_size']), chunk_size))
+        else:
+            chunks = (dict((name, batch[name]) for name in batch.columns if name in SCENARIO_INPUTS)
+                      for batch in scenarios)
+
+        years = arange(self.service_life)
+        npv, total = {}, {}
+        for chunk in chunks:
+            columns = self._scenarios(chunk)
+            discount = (1 + columns['discount_rate'][:, None]) ** -(years + 1.0)
+            for name, (base, growth) in self._annual(columns, years).items():
+                npv.setdefault(name, []).append(base * (growth * discount).sum(-1))
+                total.setdefault(name, []).append(base * growth.sum(-1))
+
+        join = lambda parts: dict((name, concatenate(arrays, -1)) for name, arrays in parts.items())
+        npv, total = join(npv), join(total)
+        npv['total'] = sum(npv[name] for name in CATEGORIES)
+        total['total'] = sum(total[name] for name in CATEGORIES)
+        if self.designs == 1:
+            npv, total = [dict((name, values[0]) for name, values in parts.items()) for parts in (npv, total)]
+        return npv, total
+
+    def _annual(self, columns, years):
+        # The costs of each category in the first year, (designs, scenarios),
+        # and their growth over the years, (scenarios, years)
+        fleet, hours = columns['fleet_size'], columns['flight_hours']
+        design = lambda value: broadcast_to(asarray(value, dtype=float).reshape(-1), (self.designs,))[:, None]
+        shape = (self.designs, len(fleet))
+
+        in_service = (years < self.service_life) * 1.0
+        flat = broadcast_to(in_service, (len(fleet), len(years)))
+        escalated = (1 + columns['fuel_escalation'][:, None]) ** years * in_service
+
+        return dict(fuel=(fleet * hours * design(self._fuel_per_hour) * columns['fuel_price'], escalated),
+                    crew=(broadcast_to(fleet * (self.crew_ratio * self.crew_size * self.crew_salary), shape), flat),
+                    maintenance=(fleet * hours * (self.mmh_per_fh * self.r_maintenance +
+                                                  design(self._materials_per_hour)), flat),
+                    depreciation=(fleet * design(self._depreciation), flat))
+
+    def _scenarios(self, scenarios):
+        # The scenario inputs, as 1-D columns of a common length
+        unknown = set(scenarios) - set(SCENARIO_INPUTS)
+        if unknown:
+            raise ValueError("Unknown scenario inputs: {}".format(', '.join(sorted(unknown))))
+        values = dict(SCENARIO_INPUTS, fleet_size=self.cost.quantity)
+        values.update(scenarios)
+        names = sorted(values)
+        columns = broadcast_arrays(*[asarray(values[name], dtype=float).reshape(-1) for name in names])
+        return dict(zip(names, columns))
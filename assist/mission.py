@@ -1,7 +1,12 @@
 from __future__ import division
 from warnings import warn
-from numpy import sqrt, exp, power, linspace, interp, log, pi
-from environment import Atmosphere, G_0
+from threading import local
+
+from numpy import (any, sqrt, exp, power, linspace, log, pi, maximum, where, isfinite, isnan, inf, errstate,
+                   asarray, broadcast_arrays, broadcast, broadcast_to, take_along_axis, searchsorted,
+                   add, divide, empty, multiply, ndarray, number)
+from assist.environment import Atmosphere, G_0
+from assist.util import interp
 
 
 MAX_T_TO_W = 5
@@ -11,10 +16,15 @@ class Mission(object):
     """
     A mission as defined by a list of segments.
 
+    :param stores: the :class:`~assist.components.Payload` instances carried
+                   on this mission, if not those of the aircraft, e.g., to
+                   size for a ferry and a strike mission together
+
     """
 
-    def __init__(self, segments=None, atmosphere=None, *args, **kwargs):
+    def __init__(self, segments=None, atmosphere=None, stores=None, *args, **kwargs):
         self.atmosphere = Atmosphere() if atmosphere is None else atmosphere
+        self.stores = stores
 
         if segments is not None:
             self.segments = segments
@@ -76,35 +86,18 @@ class Segment(object):
         else:
             self._weight_fraction = kwargs.pop('weight_fraction', None)
 
-        self.altitude = altitude
-
         self.payload_released = payload_released
 
         self.atmosphere = Atmosphere() if atmosphere is None else atmosphere
 
-        self.density = self.atmosphere.density(altitude)
-
         self.release = release
 
-        if speed is not None:
-            self.speed = speed * 1.68780986  # kts to ft/s
-            self.mach = self.speed / self.atmosphere.speed_of_sound(altitude)
-
-        self.n = 1
-        if 'turn_rate' in kwargs:
-            turn_rate = kwargs.pop('turn_rate')
-            self.n = sqrt(1 + (turn_rate * self.speed / G_0) ** 2)
-        if 'turn_radius' in kwargs:
-            turn_radius = kwargs.pop('turn_radius')
-            n = sqrt(1 + (self.speed / turn_radius / G_0) ** 2)
-            if hasattr(self, 'n'):
-                self.n = max(n, self.n)
+        self._turn_rate = kwargs.pop('turn_rate', None)
+        self._turn_radius = kwargs.pop('turn_radius', None)
 
         self.climb_rate = kwargs.pop('climb_rate', 0)
         self.acceleration = kwargs.pop('acceleration', 0)
 
-        self.dynamic_pressure = 0.5 * self.density * self.speed * self.speed
-
         for key, defaults in self._DEFAULTS.items():
             if key in self.kind:
                 for var, default in defaults.items():
@@ -112,11 +105,47 @@ class Segment(object):
 
         if 'cruise' in self.kind or 'dash' in self.kind:
             self.range = kwargs.pop('range')
-            self.time = self.range / speed
 
         if len(kwargs) > 0:
             warn("Unused kwargs: {}".format(kwargs.keys()))
 
+        self.update(speed=speed, altitude=altitude)
+
+    def update(self, speed=None, altitude=None, **inputs):
+        """
+        Sets inputs of the segment, e.g., to the columns of another batch of
+        designs, and the flight conditions that follow from them.
+
+        :param speed: the speed at which the segment is to be flown (knots)
+        :param altitude: the altitude at which the segment will take place (ft)
+        :param inputs: the segment's other inputs, e.g., ``range`` (nmi) or
+                       ``field_length`` (ft)
+
+        """
+
+        if altitude is not None:
+            self.altitude = altitude
+        for name, value in inputs.items():
+            if not hasattr(self, name):
+                raise ValueError("Segment {} has no input {}".format(self.kind, name))
+            setattr(self, name, value)
+        if speed is not None:
+            self._knots = speed
+            self.speed = speed * 1.68780986  # kts to ft/s
+
+        self.density = self.atmosphere.density(self.altitude)
+        self.mach = self.speed / self.atmosphere.speed_of_sound(self.altitude)
+        self.dynamic_pressure = 0.5 * self.density * self.speed * self.speed
+
+        self.n = 1
+        if self._turn_rate is not None:
+            self.n = sqrt(1 + (self._turn_rate * self.speed / G_0) ** 2)
+        if self._turn_radius is not None:
+            self.n = maximum(sqrt(1 + (self.speed / self._turn_radius / G_0) ** 2), self.n)
+
+        if hasattr(self, 'range'):
+            self.time = self.range / self._knots
+
     @property
     def weight_fraction(self):
         if self._weight_fraction is not None:
@@ -134,52 +163,40 @@ class Segment(object):
         u = (self.aircraft.cd + self.aircraft.cd_r) / self.cl
         return exp(-(c1 / self.mach + c2) / self.atmosphere.speed_of_sound(altitude) * ())
 
-    def thrust_to_weight_required(self, aircraft, wing_loading, prior_weight_fraction=1):
-        if self.speed == 0:
-            return [0.0] * len(wing_loading) if hasattr(wing_loading, '__iter__') else 0.0
+    def _bind(self, aircraft, prior_weight_fraction):
+        """
+        Puts the aircraft in the state it flies this segment in, i.e., at this
+        segment's Mach number and without the stores released so far.
+
+        """
+
         self.aircraft = aircraft
         self.prior_weight_fraction = prior_weight_fraction
         self.afterburner = self.aircraft.engine.afterburner and 'dash' in self.kind
 
         aircraft.mach = self.mach
-        cd_0 = aircraft.cd_0
-        k_1 = aircraft.k_1
-        k_2 = aircraft.k_2
 
         if self.release is not None:
-            self.aircraft.stores = [store for store in self.aircraft.stores if store not in self.release]
+            aircraft.loadout = aircraft.loadout.without(self.release)
 
-        alpha = aircraft.thrust_lapse(self.altitude, self.mach)
-        beta = self.prior_weight_fraction
+    def _ground_roll(self):
+        """
+        Ground roll parameters of a takeoff or landing segment: the touchdown
+        (or lift-off) speed factor, maximum and ground roll lift coefficients,
+        the drag and friction parameter (xi) and the thrust lapse.
 
-        cd_r = aircraft.cd_r
+        """
+
+        aircraft = self.aircraft
+        alpha = aircraft.thrust_lapse(self.altitude, self.mach)
+        cd_chute = 0.0
 
-        t_to_w = None
         if 'takeoff' in self.kind:
             aircraft.takeoff
-            k_to = aircraft.k_to
-            cl_max = self.aircraft.cl_max
-            self.aircraft.cl = cl = cl_max / (k_to * k_to)
-            xi = self.aircraft.cd + cd_r - self.mu * self.aircraft.cl
-
-            t_to_w = linspace(0.01, MAX_T_TO_W, 200)
-
-            a = k_to * k_to * beta * beta / (self.density * G_0 * cl_max * alpha * t_to_w)
-            a = - (beta / (self.density * G_0 * xi)) * log(1 - xi / ((alpha * t_to_w / beta - self.mu) * cl))
-            b = self.time * k_to * sqrt(2 * beta / (self.density * cl_max))
-            c = self.field_length
-
-            w_to_s = power((-b + sqrt(b * b + 4 * a * c)) / (2 * a), 2)
-
-            self.aircraft._takeoff  = {'w_to_s': w_to_s, 't_to_w': t_to_w, 'a': a, 'b': b, 'c': c}
-
-            return interp(wing_loading, w_to_s, t_to_w)
-
-        if 'land' in self.kind:
+            k = aircraft.k_to
+        else:
             aircraft.landing
-            k_td = self.aircraft.k_td
-            cl_max = self.aircraft.cl_max
-            self.aircraft.cl = cl = cl_max / (k_td * k_td)
+            k = aircraft.k_td
 
             if aircraft.reverse_thrust:
                 alpha = -alpha
@@ -187,36 +204,379 @@ class Segment(object):
                 alpha = 0.0
 
             # assume drag chute
-            cd_chute = 0.0
-            if self.aircraft.drag_chute is not None:
-                drag_chute_diam = self.aircraft.drag_chute['diameter']
-                drag_chute_cd = self.aircraft.drag_chute['cd']
+            if aircraft.drag_chute is not None:
+                drag_chute_diam = aircraft.drag_chute['diameter']
+                drag_chute_cd = aircraft.drag_chute['cd']
                 try:
-                    wing_area = self.aircraft.wing.area
+                    wing_area = aircraft.wing.area
                 except AttributeError:
                     wing_area = 500
                     warn("Could not get an area for the wing (self.aircraft.wing.area), assuming 500 sqft")
                 cd_chute = drag_chute_cd * 0.25 * drag_chute_diam * drag_chute_diam * pi / wing_area
 
-            xi = self.aircraft.cd + cd_r - self.mu * self.aircraft.cl + cd_chute
+        cl_max = aircraft.cl_max
+        if aircraft.sweep is not None:
+            cl_max = cl_max * aircraft._sweep_ratios()[2]
+        aircraft.cl = cl = cl_max / (k * k)
+        xi = aircraft.cd + aircraft.cd_r - self.mu * aircraft.cl + cd_chute
+
+        return k, cl_max, cl, xi, alpha
+
+    def _ground_roll_curve(self):
+        """
+        Wing loading at which a takeoff or landing segment is flown within its
+        field length, at each of a grid of thrust loadings.
+
+        :returns: the wing loadings and the thrust loadings
+
+        """
+
+        beta = self.prior_weight_fraction
+
+        if 'takeoff' in self.kind:
+            k_to, cl_max, cl, xi, alpha = self._ground_roll()
+
+            t_to_w = linspace(0.01, MAX_T_TO_W, 200)
+
+            with errstate(invalid='ignore', divide='ignore'):
+                a = - (beta / (self.density * G_0 * xi)) * log(1 - xi / ((alpha * t_to_w / beta - self.mu) * cl))
+                b = self.time * k_to * sqrt(2 * beta / (self.density * cl_max))
+                c = self.field_length
+
+                w_to_s = power((-b + sqrt(b * b + 4 * a * c)) / (2 * a), 2)
+
+            # Thrust loadings that cannot overcome ground friction and drag
+            # never lift off, whatever the wing loading
+            lift_off = (alpha * t_to_w / beta - self.mu) * cl > maximum(xi, 0)
+            w_to_s = where(lift_off & isfinite(w_to_s), w_to_s, 0.0)
+
+            self.aircraft._takeoff  = {'w_to_s': w_to_s, 't_to_w': t_to_w, 'a': a, 'b': b, 'c': c}
+
+            return w_to_s, t_to_w
+
+        if 'land' in self.kind:
+            k_td, cl_max, cl, xi, alpha = self._ground_roll()
 
             t_to_w = linspace(0.01, MAX_T_TO_W, 200)
 
-            a = (beta / (self.density * G_0 * xi)) * log(1 + xi / ((self.mu + (alpha / beta) * t_to_w) * cl))
-            b = self.time * k_td * sqrt(2 * beta / (self.density * cl_max))
-            c = self.field_length
+            brake = (self.mu + (alpha / beta) * t_to_w) * cl
 
-            w_to_s = power((-b + sqrt(b * b + 4 * a * c)) / (2 * a), 2)
+            with errstate(invalid='ignore', divide='ignore'):
+                a = (beta / (self.density * G_0 * xi)) * log(1 + xi / brake)
+                b = self.time * k_td * sqrt(2 * beta / (self.density * cl_max))
+                c = self.field_length
+
+                w_to_s = power((-b + sqrt(b * b + 4 * a * c)) / (2 * a), 2)
+
+            # Without braking the aircraft cannot stop, whatever the wing loading
+            w_to_s = where((brake > 0) & isfinite(w_to_s), w_to_s, 0.0)
 
             self.aircraft._land = {'w_to_s': w_to_s, 't_to_w': t_to_w, 'a': a, 'b': b, 'c': c}
 
+            return w_to_s, t_to_w
+
+    def thrust_to_weight_required(self, aircraft, wing_loading, prior_weight_fraction=1, out=None, workspace=None):
+        """
+        Thrust loading required to fly this segment at each wing loading.
+
+        The Master Equation of the maneuver, cruise and climb segments is
+        evaluated in place, without temporary arrays, when given ``out``, an
+        array of the result's shape to write it to, or a :class:`Workspace`.
+
+        """
+
+        if not any(self.speed):
+            return [0.0] * len(wing_loading) if hasattr(wing_loading, '__iter__') else 0.0
+
+        self._bind(aircraft, prior_weight_fraction)
+        if aircraft.variable_sweep and aircraft.sweep is None:
+            # The sweep picked at each wing loading is the aircraft's, the
+            # segment may be flown by others
+            required, aircraft._segment_sweep = self._scheduled(
+                aircraft, wing_loading, lambda: self.thrust_to_weight_required(
+                    aircraft, wing_loading, prior_weight_fraction, workspace=workspace))
+            if out is not None:
+                out[...] = required
+                return out
+            return required
+
+        cd_0 = aircraft.cd_0
+        k_1 = aircraft.k_1
+        k_2 = aircraft.k_2
+
+        alpha = aircraft.thrust_lapse(self.altitude, self.mach)
+        beta = self.prior_weight_fraction
+
+        cd_r = aircraft.cd_r
+
+        if 'takeoff' in self.kind or 'land' in self.kind:
+            w_to_s, t_to_w = self._ground_roll_curve()
             return interp(wing_loading, w_to_s, t_to_w)
 
         aircraft.configuration = None
 
-        q = self.dynamic_pressure
-        c_l = self.n * beta * wing_loading / q
         excess_power = self.climb_rate / self.speed + self.acceleration / G_0
 
-        # Master Equation from Mattingly, 2002
-        return (beta / alpha) * (q / (beta * wing_loading) * (k_1 * c_l * c_l + k_2 * c_l + cd_0 + cd_r) + excess_power)
+        return _master_equation(beta, alpha, self.dynamic_pressure, self.n, wing_loading,
+                                cd_0, k_1, k_2, cd_r, excess_power, out, workspace)
+
+    def thrust_to_weight_bound(self, aircraft, prior_weight_fraction=1):
+        """
+        A lower bound on the thrust loading this segment requires at any wing
+        loading, cheap enough to screen designs before evaluating the
+        constraint curves of :meth:`thrust_to_weight_required`.
+
+        Leaves the aircraft in the same state that method would.
+
+        """
+
+        if not any(self.speed):
+            return 0.0
+
+        self._bind(aircraft, prior_weight_fraction)
+        if aircraft.variable_sweep and aircraft.sweep is None:
+            return self._scheduled(aircraft, 0.0, lambda: self.thrust_to_weight_bound(
+                aircraft, prior_weight_fraction))[0]
+
+        beta = self.prior_weight_fraction
+
+        if 'takeoff' in self.kind:
+            k_to, cl_max, cl, xi, alpha = self._ground_roll()
+            # Least thrust that overcomes ground friction and drag
+            return (beta / alpha) * (self.mu + maximum(xi, 0) / cl)
+
+        if 'land' in self.kind:
+            k_td, cl_max, cl, xi, alpha = self._ground_roll()
+            # Braking is linear in the thrust loading, so best at either end of the range
+            brake = maximum(self.mu + (alpha / beta) * 0.01, self.mu + (alpha / beta) * MAX_T_TO_W) * cl
+            return where(brake > maximum(-xi, 0), 0.0, inf)
+
+        cd_0 = aircraft.cd_0
+        k_1 = aircraft.k_1
+        k_2 = aircraft.k_2
+        cd_r = aircraft.cd_r
+        alpha = aircraft.thrust_lapse(self.altitude, self.mach)
+
+        aircraft.configuration = None
+
+        excess_power = self.climb_rate / self.speed + self.acceleration / G_0
+
+        # Master Equation at the lift coefficient for best lift-to-drag, sqrt(C_D0 / K_1)
+        return (beta / alpha) * (self.n * (2 * sqrt(k_1 * (cd_0 + cd_r)) + k_2) + excess_power)
+
+    def _scheduled(self, aircraft, wing_loading, evaluate):
+        """
+        Evaluates a segment flown by a variable-sweep wing at every angle of
+        its schedule at once, and picks the angle needing the least thrust.
+
+        The angles are put on a leading axis of the aircraft's ``sweep``, so
+        that the drag and lift estimates, and the thrust loading ``evaluate``
+        computes from them, are arrays over the angles rather than computed
+        once per angle.  The ground roll curves of the angles are reduced to
+        the largest wing loading at each thrust loading before they are
+        interpolated, once.
+
+        :returns: the thrust loading, and the sweep it is flown at
+
+        """
+
+        ground_roll = 'takeoff' in self.kind or 'land' in self.kind
+        sweeps = aircraft.wing.sweeps
+        # The angles lead the axes of the designs and the wing loadings
+        values = [wing_loading, self.prior_weight_fraction, self.dynamic_pressure, self.n, aircraft.cd_0,
+                  aircraft.k_1, aircraft.k_2, aircraft.cd_r, aircraft.thrust_lapse(self.altitude, self.mach)]
+        if ground_roll:
+            values += [aircraft.cl_max, self.field_length, self.mu, self.time]
+        ndim = max(broadcast(*values).ndim, sweeps.ndim - 1)
+        sweeps = sweeps.reshape(sweeps.shape[:1] + (1,) * (ndim + 1 - sweeps.ndim) + sweeps.shape[1:])
+
+        aircraft.sweep = sweeps
+        try:
+            if ground_roll and asarray(wing_loading).ndim == 1:
+                w_to_s, t_to_w = self._ground_roll_curve()
+            else:
+                required = asarray(evaluate(), dtype=float)
+        finally:
+            aircraft.sweep = None
+
+        if ground_roll and asarray(wing_loading).ndim == 1:
+            w_to_s = broadcast_to(w_to_s, broadcast(sweeps, w_to_s).shape)
+            best = where(isnan(w_to_s), -inf, w_to_s).argmax(0)[None]
+            required = interp(wing_loading, take_along_axis(w_to_s, best, 0)[0], t_to_w)
+            # The angle at the thrust loading the curve is interpolated to
+            sweep = take_along_axis(broadcast_to(sweeps, w_to_s.shape), best, 0)[0]
+            index = searchsorted(t_to_w, required).clip(0, len(t_to_w) - 1)
+            return required, take_along_axis(broadcast_to(sweep, index.shape[:-1] + sweep.shape[-1:]), index, -1)
+
+        best = where(isnan(required), inf, required).argmin(0)[None]
+        return (take_along_axis(required, best, 0)[0],
+                take_along_axis(broadcast_to(sweeps, required.shape), best, 0)[0])
+
+
+class FlightConditions(object):
+    """
+    A batch of flight conditions, e.g., the sustained turns, climbs and
+    accelerations of a maneuver envelope, with the quantities derived from
+    them computed for all the conditions at once rather than a
+    :class:`Segment` at a time::
+
+        conditions = FlightConditions(speed=linspace(300, 900, 1000),
+                                      altitude=15000,
+                                      turn_rate=radians(12))
+        t_to_w = conditions.thrust_to_weight_required(aircraft, wing_loadings)
+
+    The inputs broadcast against each other, the conditions have their
+    common shape.
+
+    :param speed: the speed of each condition (knots)
+    :param altitude: the altitude of each condition (ft)
+    :param turn_rate: the sustained turn rate (rad/s)
+    :param turn_radius: the turn radius (ft), the load factor is that of the
+                        tighter of the turn rate and radius
+    :param climb_rate: the rate of climb (ft/s)
+    :param acceleration: the longitudinal acceleration (ft/s**2)
+    :param atmosphere: the atmosphere instance that contains the sea level conditions, if None s provided, a standard one is created
+
+    """
+
+    def __init__(self, speed, altitude, turn_rate=0.0, turn_radius=inf, climb_rate=0.0, acceleration=0.0,
+                 atmosphere=None):
+        self.atmosphere = Atmosphere() if atmosphere is None else atmosphere
+
+        (speed, self.altitude, self.turn_rate, self.turn_radius,
+         self.climb_rate, self.acceleration) = broadcast_arrays(*[asarray(value, dtype=float) for value in (
+             speed, altitude, turn_rate, turn_radius, climb_rate, acceleration)])
+        self.shape = self.altitude.shape
+
+        self.speed = speed * 1.68780986  # kts to ft/s
+        self.density = self.atmosphere.density(self.altitude)
+        self.temperature = self.atmosphere.temperature(self.altitude)
+        # As Atmosphere.speed_of_sound, without looking the temperature up again
+        self.speed_of_sound = sqrt(1.4 * 1716.56 * self.temperature)
+        self.mach = self.speed / self.speed_of_sound
+        self.dynamic_pressure = 0.5 * self.density * self.speed * self.speed
+
+        with errstate(divide='ignore', invalid='ignore'):
+            self.n = maximum(sqrt(1 + (self.turn_rate * self.speed / G_0) ** 2),
+                             sqrt(1 + (self.speed / self.turn_radius / G_0) ** 2))
+            self.excess_power = self.climb_rate / self.speed + self.acceleration / G_0
+
+    def __repr__(self):
+        return "<FlightConditions {}>".format(self.shape)
+
+    def __len__(self):
+        return self.shape[0] if self.shape else 1
+
+    @property
+    def size(self):
+        return self.altitude.size
+
+    def thrust_to_weight_required(self, aircraft, wing_loading, prior_weight_fraction=1, out=None, workspace=None):
+        """
+        Thrust loading required to fly each condition, from the Master
+        Equation (Mattingly, 2002), in the cruise configuration with the
+        aircraft's current stores.
+
+        The conditions take the leading axes of the result, followed by the
+        designs and the wing loadings, i.e., for conditions of shape (C,),
+        designs of shape (N, 1) and wing loadings of shape (W,), the result is
+        shaped (C, N, W).
+
+        :param aircraft: the aircraft, or designs, flying the conditions
+        :param wing_loading: takeoff wing loadings (lbf/ft**2)
+        :param prior_weight_fraction: weight at each condition as a fraction
+                                      of the takeoff weight
+        :param out: array to write the result to, see
+                    :meth:`Segment.thrust_to_weight_required`
+        :param workspace: a :class:`Workspace`, to evaluate in place
+
+        """
+
+        aircraft.configuration = None
+
+        beta = prior_weight_fraction
+        mach = self._expand(self.mach)
+        cd_0 = aircraft._cd_0 if aircraft._cd_0 is not None else aircraft._cd_0_fxn(mach)
+        k_1 = aircraft._k_1 if aircraft._k_1 is not None else aircraft._k_1_fxn(mach)
+        alpha = aircraft.thrust_lapse(self._expand(self.altitude), mach)
+
+        return _master_equation(beta, alpha, self._expand(self.dynamic_pressure), self._expand(self.n),
+                                wing_loading, cd_0, k_1, aircraft.k_2, aircraft.cd_r,
+                                self._expand(self.excess_power), out, workspace)
+
+    def _expand(self, values):
+        # Conditions lead the design and wing loading axes
+        return values.reshape(self.shape + (1, 1))
+
+
+class Workspace(object):
+    """
+    Scratch arrays reused by the constraint evaluations, instead of allocating
+    temporaries on every call, e.g., across the segments of a mission and the
+    batches of a sweep.  Each thread has its own, see :meth:`default`.
+
+    """
+
+    _local = local()
+
+    def __init__(self):
+        self._buffers = {}
+
+    def __repr__(self):
+        return "<Workspace {} bytes>".format(sum(buffer.nbytes for buffer in self._buffers.values()))
+
+    @classmethod
+    def default(cls):
+        """
+        The workspace of the current thread.
+
+        """
+
+        workspace = getattr(cls._local, 'workspace', None)
+        if workspace is None:
+            workspace = cls._local.workspace = cls()
+        return workspace
+
+    def buffer(self, name, shape):
+        """
+        The scratch array ``name``, of the given shape, reallocated only when
+        the shape changes.
+
+        """
+
+        buffer = self._buffers.get(name)
+        if buffer is None or buffer.shape != shape:
+            buffer = self._buffers[name] = empty(shape)
+        return buffer
+
+
+def _master_equation(beta, alpha, q, n, wing_loading, cd_0, k_1, k_2, cd_r, excess_power, out=None,
+                     workspace=None):
+    # Master Equation from Mattingly, 2002
+    arguments = (beta, alpha, q, n, wing_loading, cd_0, k_1, k_2, cd_r, excess_power)
+    if (out is None and workspace is None) or not all(isinstance(value, _PLAIN) for value in arguments):
+        # Allocating, e.g., for duals, see assist.derivatives
+        c_l = n * beta * wing_loading / q
+        return (beta / alpha) * (q / (beta * wing_loading) * (k_1 * c_l * c_l + k_2 * c_l + cd_0 + cd_r) +
+                                 excess_power)
+
+    size = broadcast(*arguments).shape
+    if out is None:
+        out = empty(size)
+    work = (workspace or Workspace.default()).buffer('master_equation', size)
+
+    # Only the factors that do not depend on the wing loading are computed
+    # apart, they have a value per design at most
+    multiply(wing_loading, n * beta / q, out=work)  # c_l
+    multiply(work, k_1, out=out)
+    add(out, k_2, out=out)
+    multiply(out, work, out=out)
+    add(out, cd_0 + cd_r, out=out)
+    divide(q / beta, wing_loading, out=work)
+    multiply(out, work, out=out)
+    add(out, excess_power, out=out)
+    multiply(out, beta / alpha, out=out)
+    return out
+
+
+_PLAIN = (ndarray, float, int, number)
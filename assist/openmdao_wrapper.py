@@ -1,120 +1,203 @@
-from openmdao.main.api import Component
-from openmdao.lib.datatypes.api import Float
+"""
+OpenMDAO components wrapping the sizing and cost models.
+
+Inputs and outputs are vectors of ``vec_size`` designs, so that a whole
+population (e.g., a generation of an optimizer or a block of DOE cases) is
+synthesized and sized in a single call to ``compute``.
+
+"""
+from numpy import arange, broadcast_to
+from openmdao.api import ExplicitComponent
 
 from assist.environment import Atmosphere
 from assist.aircraft import Aircraft
 from assist.components import Wing, Engine, Payload
 from assist.mission import Mission, Segment
 from assist.cost import Cost
+from assist.derivatives import jacobian
+from assist.surrogate import SurrogateCache
+
+
+class Fighter(ExplicitComponent):
+    """
+    Sizes a fighter for a fixed mission profile and estimates its acquisition cost.
+
+    The wing, aircraft and mission are built once in ``setup``; each call only
+    sets the inputs of the wing and segments to the columns of the designs.
+
+    With a ``surrogate`` model, outputs are answered from a
+    :class:`~assist.surrogate.SurrogateCache` where its predicted error is
+    below ``surrogate_threshold``, partial derivatives are always those of the
+    full model.
+
+    """
+
+    # (name, default, units, description)
+    _INPUTS = (('k_aero', 0.5, None, "K-Factor for aerodynamic efficiency, higher is better"),
+               ('taper_ratio', 0.2, None, "The wing tip chord divided by the wing root chord"),
+               ('sweep', 30.0, 'deg', "Angle between wing's quarter-chord line and a line perpendicular to the free-stream"),
+               ('tofl', 1500.0, 'ft', "Takeoff Field Length"),
+               ('airfield_altitude', 0.0, 'ft', "Altitude at which the airfield is at"),
+               ('cruise_altitude', 30000.0, 'ft', "Altitude at which the aircraft is will cruise"),
+               ('cruise_speed', 700.0, 'kn', "Speed at which the aircraft will cruise"),
+               ('cruise_range', 150.0, 'nmi', "Distance the aircraft will cover in each cruise segment"),
+               ('dash_altitude', 30000.0, 'ft', "Altitude at which the aircraft is will perform the dash segment"),
+               ('dash_speed', 1492.0, 'kn', "Speed at which the aircraft will dash"),
+               ('dash_range', 100.0, 'nmi', "Distance the aircraft will cover in each dash segment"),
+               ('ldgfl', 1500.0, 'ft', "Landing Field Length"),
+               ('landing_speed', 150.0, 'kn', "Speed the aircraft will fly when touching down"),
+               ('stealth', 0.1, None, "Degree of stealthiness required"),
+               ('materials_complexity', 1.0, None, "Degree of difficulty with working with selected materials"),
+               ('avionics_weight_fraction', 0.0, None, "Amount of avionics from a nominal amount"),
+               ('avionics_complexity', 0.25, None, "Degree of complexity of the avionics in the aircraft"))
+
+    # (name, units, description)
+    _OUTPUTS = (('togw', 'lbm', "Take-off Gross Weight"),
+                ('wing_area', 'ft**2', "Wing Area"),
+                ('thrust', 'lbf', "Maximum Thrust produced by the engines"),
+                ('acq_cost', None, "Estimated acquisition cost (fly away cost) for the program, in millions of USD"))
+
+    # Mission profile: kind, fixed arguments, and arguments taken from the inputs
+    _MISSION = (('warmup', dict(speed=0, time=60), dict(altitude='airfield_altitude')),
+                ('takeoff', dict(speed=150), dict(altitude='airfield_altitude', field_length='tofl')),
+                ('climb', dict(speed=500), dict(altitude='airfield_altitude')),
+                ('cruise', dict(release=[()]), dict(altitude='cruise_altitude', speed='cruise_speed',
+                                                    range='cruise_range')),
+                ('descend', dict(speed=1000), dict(altitude='dash_altitude')),
+                ('dash', dict(), dict(altitude='dash_altitude', speed='dash_speed', range='dash_range')),
+                ('climb', dict(speed=1000), dict(altitude='cruise_altitude')),
+                ('cruise', dict(speed=1050), dict(altitude='cruise_altitude', range='cruise_range')),
+                ('descend', dict(speed=1000), dict(altitude='airfield_altitude')),
+                ('land', dict(), dict(altitude='airfield_altitude', speed='landing_speed', field_length='ldgfl')))
+
+    def initialize(self):
+        self.options.declare('vec_size', types=int, default=1, desc="Number of designs evaluated per call")
+        self.options.declare('surrogate', default=None, allow_none=True,
+                             desc="GaussianProcess or ResponseSurface to answer queries from, None to always "
+                                  "evaluate the full model; assumes the discrete inputs do not change")
+        self.options.declare('surrogate_threshold', types=float, default=0.01,
+                             desc="Largest predicted error, relative to the output, answered by the surrogate")
+        self.options.declare('surrogate_path', types=str, default=None, allow_none=True,
+                             desc="File the surrogate's training set is loaded from and saved to")
+
+    def setup(self):
+        n = self.options['vec_size']
+
+        for name, default, units, desc in self._INPUTS:
+            self.add_input(name, val=default, shape=(n,), units=units, desc=desc)
+        self.add_discrete_input('quantity', val=Cost._DEFAULTS['quantity'][2], desc="Number of aircraft to manufacture")
+        self.add_discrete_input('cost_year', val=Cost._DEFAULTS['year'][2],
+                                desc="Year dollars for which to calculate the cost of the aircraft")
+
+        for name, units, desc in self._OUTPUTS:
+            self.add_output(name, shape=(n,), units=units, desc=desc)
+
+        # Designs are independent of each other, so the Jacobians are diagonal
+        self.declare_partials(of=[name for name, _, _ in self._OUTPUTS],
+                              wrt=[name for name, _, _, _ in self._INPUTS],
+                              rows=arange(n), cols=arange(n))
 
+        self._atmosphere = Atmosphere()
+        self._engine = Engine('ATJ', atmosphere=self._atmosphere)
+        self._stores = [Payload('Crew', weight=200),
+                        Payload('Cannon', weight=270),
+                        Payload('Ammunition Feed System', weight=405),
+                        Payload('Ammunition', weight=550),
+                        Payload('Casings', weight=198),
+                        Payload('AMRAAMs', weight=332, quantity=4, cd_r=0.005, expendable=True),
+                        Payload('AIM-9Xs', weight=188, quantity=2, cd_r=0.002, expendable=True)]
 
-class Fighter(Component):
-
-    k_aero = Float(0.5, iotype='in', low=0, high=1, desc="K-Factor for aerodynamic efficiency, higher is better")
-    taper_ratio = Float(0.2, iotype='in', low=0, high=1, desc="The wing tip chord divided by the wing root chord")
-    sweep = Float(30, iotype='in', low=0, high=55, units='deg', desc="Angle between wing's quarter-chord line and a line perpendicular to the free-stream")
-
-    tofl = Float(1500, iotype='in', low=0, units='ft', desc="Takeoff Field Length")
-    airfield_altitude = Float(0, iotype='in', low=0, units='ft', desc="Altitude at which the airfield is at")
-
-    cruise_altitude = Float(30000, iotype='in', low=1000, units='ft', desc="Altitude at which the aircraft is will cruise")
-    cruise_speed = Float(700, iotype='in', low=0, units='knot', desc="Speed at which the aircraft will cruise")
-    cruise_range = Float(150, iotype='in', low=0, units='nmi', desc="Distance the aircraft will cover in each cruise segment")
-
-    dash_altitude = Float(30000, iotype='in', low=1000, units='ft', desc="Altitude at which the aircraft is will perform the dash segment")
-    dash_speed = Float(1492, iotype='in', low=0, units='knot', desc="Speed at which the aircraft will dash")
-    dash_range = Float(100, iotype='in', low=0, units='nmi', desc="Distance the aircraft will cover in each dash segment")
-
-    ldgfl = Float(1500, iotype='in', low=0, units='ft', desc="Landing Field Length")
-    landing_speed = Float(150, iotype='in', low=0, units='knot', desc="Speed the aircraft will fly when touching down")
-
-    togw = Float(iotype='out', units='lbm', desc="Take-off Gross Weight")
-    wing_area = Float(iotype='out', units='ft**2', desc="Wing Area")
-    thrust = Float(iotype='out', units='lbf', desc="Maximum Thrust produced by the engines")
-
-    quantity = Int(iotype='in', low=0, desc="Number of aircraft to manufacture")
-    stealth = Float(iotype='in', low=0, high=1, desc="Degree of stealthiness required")
-    materials_complexity = Float(iotype='in', low=0, high=1, desc="Degree of difficulty with working with selected materials")
-    avionics_weight_fraction = Float(iotype='in', low=0, high=1, desc="Amount of avionics from a nominal amount")
-    avionics_complexity = Float(iotype='in', low=0, high=1, desc="Degree of complexity of the avionics in the aircraft")
-    cost_year = Int(iotype='in', low=1999, desc="Year dollars for which to calculate the cost of the aircraft")
-
-    acq_cost = Float(iotype='out', units='MUSD', desc="Estimated acquisition cost (fly away cost) for the program")
-
-    def execute(self):
-        wing = Wing(flap_type='single_slot',
-            configuration='landing',
-            slats=True,
-            k_aero=self.k_aero,
-            sweep=self.sweep,
-            flap_span=[0.2, 0.4],
-            taper_ratio=self.taper_ratio)
-
-        self.aircraft = Aircraft(wing=wing,
-                                 stores=[Payload('Crew', weight=200),
-                                         Payload('Cannon', weight=270),
-                                         Payload('Ammunition Feed System', weight=405),
-                                         Payload('Ammunition', weight=550),
-                                         Payload('Casings', weight=198),
-                                         Payload('AMRAAMs', weight=332, quantity=4, cd_r=0.005, expendable=True),
-                                         Payload('AIM-9Xs', weight=188, quantity=2, cd_r=0.002, expendable=True)],
-                                 drag_chute=None)#{'diameter': 15.6, 'cd': 1.4})
-
-        mission = Mission(segments=[Segment('warmup',
-                                            altitude=self.airfield_altitude,
-                                            speed=0,
-                                            time=60),
-                                    Segment('takeoff',
-                                            altitude=self.airfield_altitude,
-                                            speed=150,
-                                            field_length=self.tofl,
-                                            temperature=100),
-                                    Segment('climb',
-                                            altitude=self.airfield_altitude,
-                                            speed=500),
-                                    Segment('cruise',
-                                            altitude=self.cruise_altitude,
-                                            speed=self.cruise_speed,
-                                            range=self.cruise_range,
-                                            release=[()]),
-                                    Segment('descend',
-                                            altitude=self.dash_altitude,
-                                            speed=1000),
-                                    Segment('dash',
-                                            altitude=self.dash_altitude,
-                                            speed=self.dash_speed,
-                                            range=self.dash_range),
-                                    Segment('climb',
-                                            altitude=self.cruise_altitude,
-                                            speed=1000),
-                                    Segment('cruise',
-                                            altitude=self.cruise_altitude,
-                                            speed=1050,
-                                            range=self.cruise_range),
-                                    Segment('descend',
-                                            altitude=self.airfield_altitude,
-                                            speed=1000),
-                                    Segment('land',
-                                            altitude=self.airfield_altitude,
-                                            speed=self.landing_speed,
-                                            field_length=self.ldgfl)])
-
-        self.aircraft._synthesize(mission)
-        self.aircraft._size(mission)
-
-        self.togw = self.aircraft.w_to
-        self.wing_area = self.aircraft.wing.area
-        self.thrust = self.aircraft.engine.max_thrust * self.aircraft.num_engines
+        self._wing = Wing(flap_type='single_slot',
+                          configuration='landing',
+                          slats=True,
+                          flap_span=[0.2, 0.4])
+        self._aircraft = Aircraft(wing=self._wing,
+                                  engine=self._engine,
+                                  stores=list(self._stores),
+                                  drag_chute=None)  # {'diameter': 15.6, 'cd': 1.4}
+
+        defaults = dict((name, default) for name, default, _, _ in self._INPUTS)
+        segments = []
+        for kind, fixed, variable in self._MISSION:
+            kwargs = dict(fixed)
+            kwargs.update((argument, defaults[name]) for argument, name in variable.items())
+            segments.append(Segment(kind, atmosphere=self._atmosphere, **kwargs))
+        self._mission = Mission(segments=segments, atmosphere=self._atmosphere)
+
+        self._surrogate = None
+        if self.options['surrogate'] is not None:
+            self._surrogate = SurrogateCache(lambda design: self._evaluate(design, self._discrete_inputs),
+                                             inputs=[name for name, _, _, _ in self._INPUTS],
+                                             outputs=[name for name, _, _ in self._OUTPUTS],
+                                             model=self.options['surrogate'],
+                                             threshold=self.options['surrogate_threshold'],
+                                             path=self.options['surrogate_path'])
+
+    def compute(self, inputs, outputs, discrete_inputs=None, discrete_outputs=None):
+        n = self.options['vec_size']
+        if self._surrogate is None:
+            results = self._evaluate(self._design(inputs), discrete_inputs)
+        else:
+            self._discrete_inputs = discrete_inputs
+            results = self._surrogate(self._design(inputs))
+        for name, _, _ in self._OUTPUTS:
+            outputs[name] = broadcast_to(results[name], (n, 1))[:, 0]
+
+    def cleanup(self):
+        # Saves the samples the surrogate learned since it last saved them
+        ExplicitComponent.cleanup(self)
+        if getattr(self, '_surrogate', None) is not None:
+            self._surrogate.flush()
+
+    def compute_partials(self, inputs, partials, discrete_inputs=None):
+        """
+        Partial derivatives of every output with respect to every input, from
+        a single forward-mode evaluation, see :mod:`assist.derivatives`.
+
+        """
+
+        n = self.options['vec_size']
+        _, derivatives = jacobian(lambda design: self._evaluate(design, discrete_inputs),
+                                  self._design(inputs))
+        for key, value in derivatives.items():
+            partials[key] = broadcast_to(value, (n, 1))[:, 0]
+
+    def build(self, design):
+        """
+        The aircraft and mission for a design, a dictionary of input values or
+        of (N, 1) columns of them, e.g., for the stages of :mod:`assist.pipeline`.
+
+        They are the objects built in ``setup``, set to the design, so that
+        building another design changes them too.
+
+        """
+
+        self._wing.update(k_aero=design['k_aero'], sweep=design['sweep'], taper_ratio=design['taper_ratio'])
+        self._aircraft._reset()
+        for segment, (_, _, variable) in zip(self._mission.segments, self._MISSION):
+            segment.update(**dict((argument, design[name]) for argument, name in variable.items()))
+        return self._aircraft, self._mission
+
+    def _design(self, inputs):
+        return dict((name, inputs[name][:, None]) for name, _, _, _ in self._INPUTS)
+
+    def _evaluate(self, design, discrete_inputs):
+        aircraft, mission = self.build(design)
+        aircraft._synthesize(mission)
+        aircraft._size(mission)
 
         cost = Cost(aircraft=aircraft,
-                    stealth=self.stealth,
-                    avionics_complexity=self.avionics_complexity,
-                    materials_complexity=self.materials_complexity,
-                    avionics_weight=self.avionics_weight_fraction,
-                    quantity=self.quantity,
-                    year=self.cost_year)
-
-        self.acq_cost = cost.estimate_acquisition() / 1e6
+                    stealth=design['stealth'],
+                    avionics_complexity=design['avionics_complexity'],
+                    materials_complexity=design['materials_complexity'],
+                    avionics_weight=design['avionics_weight_fraction'],
+                    quantity=discrete_inputs['quantity'],
+                    year=discrete_inputs['cost_year'])
+
+        return dict(togw=aircraft.w_to,
+                    wing_area=aircraft.wing.area,
+                    thrust=aircraft.engine.max_thrust * aircraft.num_engines,
+                    acq_cost=cost.estimate_acquisition() / 1e6)
 
 
 # class AircraftSizing(Component):
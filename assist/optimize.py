@@ -0,0 +1,406 @@
+"""
+Multi-objective optimization of designs.
+
+:class:`NSGA2` searches a box of design variables for the Pareto front of a
+set of outputs, e.g., takeoff gross weight, acquisition cost and fuel
+fraction.  Each generation is evaluated as one batch of (N, 1) columns, so
+the model runs vectorized over the whole population::
+
+    optimizer = NSGA2(partial(sizing_outputs, build, quantity=200),
+                      bounds=dict(k_aero=(0.2, 0.9), cruise_speed=(500, 900)),
+                      objectives=('w_to', 'acquisition_cost', 'fuel_fraction'),
+                      population=100, seed=0, checkpoint='nsga2.npz')
+    front = optimizer.run(generations=50)
+
+where ``build(design)`` returns an ``(aircraft, mission)`` pair, as for the
+stages of :mod:`assist.pipeline`.  The evaluation can also be an
+:class:`~assist.cache.EvaluationCache`, e.g., ``partial(cache, build,
+quantity=200)``.
+
+Designs whose outputs are not finite (e.g., designs that do not close) or
+that violate the ``constraints`` rank behind every feasible design, see Deb,
+K., et al., "A Fast and Elitist Multiobjective Genetic Algorithm: NSGA-II,"
+IEEE Transactions on Evolutionary Computation, Vol. 6, No. 2, 2002.
+
+"""
+from __future__ import division
+import json
+from collections import namedtuple
+from multiprocessing import Pool
+from os import replace
+from os.path import exists
+from time import time
+
+from numpy import (abs, all, any, arange, argsort, array_split, asarray, broadcast_to, clip, column_stack,
+                   concatenate, empty, full, inf, isfinite, lexsort, load, maximum, ones, savez,
+                   sqrt, sum, where, zeros)
+from numpy.random import default_rng
+
+
+__all__ = ('NSGA2', 'Generation', 'non_dominated_sort', 'crowding_distance')
+
+
+Generation = namedtuple('Generation', ('generation', 'evaluations', 'seconds', 'evaluations_per_second',
+                                       'feasible', 'front_size', 'hypervolume', 'distance'))
+Generation.__doc__ = """
+Progress of an optimization after a generation.
+
+:param evaluations: designs evaluated so far
+:param seconds: time spent evaluating this generation
+:param feasible: fraction of the population that is feasible
+:param front_size: designs on the first front
+:param hypervolume: estimated fraction of the box between the ideal and
+                    reference points dominated by the first front
+:param distance: mean distance, in normalized objectives, from the first
+                 front to the previous generation's first front
+
+"""
+
+# Quasi-random points the hypervolume is estimated with
+_HYPERVOLUME_SAMPLES = 2 ** 13
+
+
+def non_dominated_sort(objectives, violation=None):
+    """
+    The front each design belongs to, 0 for non-dominated designs.
+
+    With constraint violations, a feasible design dominates every infeasible
+    one, and an infeasible design dominates those with larger violations.
+
+    :param objectives: (N, M) array, to be minimized
+    :param violation: (N,) array of constraint violations, 0 if feasible
+
+    """
+
+    n = len(objectives)
+    violation = zeros(n) if violation is None else violation
+    f, g = objectives[:, None, :], objectives[None, :, :]
+    pareto = all(f <= g, -1) & any(f < g, -1)
+    feasible = violation == 0
+    dominates = where(feasible[:, None] & feasible[None, :], pareto,
+                      violation[:, None] < violation[None, :])
+
+    rank = full(n, -1)
+    remaining = ones(n, dtype=bool)
+    front = 0
+    while remaining.any():
+        dominated = any(dominates[remaining][:, remaining], 0)
+        current = arange(n)[remaining][~dominated]
+        rank[current] = front
+        remaining[current] = False
+        front += 1
+    return rank
+
+
+def crowding_distance(objectives, rank):
+    """
+    The crowding distance of each design within its front, infinite for the
+    designs at the extremes of the front.
+
+    """
+
+    distance = zeros(len(objectives))
+    for front in range(rank.max() + 1):
+        members = arange(len(objectives))[rank == front]
+        values = objectives[members]
+        for j in range(values.shape[1]):
+            order = argsort(values[:, j], kind='stable')
+            ordered = values[order, j]
+            span = ordered[-1] - ordered[0]
+            gaps = full(len(members), inf)
+            if len(members) > 2 and span > 0:
+                gaps[1:-1] = (ordered[2:] - ordered[:-2]) / span
+            distance[members[order]] += gaps
+    return distance
+
+
+class NSGA2(object):
+    """
+    Non-dominated sorting genetic algorithm, with simulated binary crossover
+    and polynomial mutation.
+
+    :param evaluate: takes a dictionary of (N, 1) design columns and returns a
+                     dictionary of outputs that broadcast to (N, 1), must be
+                     picklable to use ``processes``
+    :param bounds: (lower, upper) bounds of each design variable
+    :param objectives: names of the outputs to minimize
+    :param constraints: (lower, upper) bounds on outputs, either may be None
+    :param population: number of designs per generation, rounded up to even
+    :param seed: seed of the random number generator
+    :param processes: number of worker processes the population is split
+                      across, 0 to evaluate it in this process
+    :param checkpoint: file the state is saved to after every generation, and
+                       resumed from, if it exists
+    :param callback: called with the :class:`Generation` record of each generation
+    :param crossover_index: distribution index of the crossover
+    :param mutation_index: distribution index of the mutation
+
+    """
+
+    def __init__(self, evaluate, bounds, objectives, constraints=None, population=100, seed=None,
+                 processes=0, checkpoint=None, callback=None, crossover_index=15.0, mutation_index=20.0):
+        self.evaluate = evaluate
+        self.variables = tuple(sorted(bounds))
+        self.lower = asarray([bounds[name][0] for name in self.variables], dtype=float)
+        self.upper = asarray([bounds[name][1] for name in self.variables], dtype=float)
+        self.objectives = tuple(objectives)
+        self.constraints = dict(constraints or {})
+        self.size = population + population % 2
+        self.processes = processes
+        self.checkpoint = checkpoint
+        self.callback = callback
+        self.crossover_index = crossover_index
+        self.mutation_index = mutation_index
+
+        self.rng = default_rng(seed)
+        self._pool = None
+
+        self.generation = 0
+        self.evaluations = 0
+        self.history = []
+        self.x = None
+
+        if checkpoint is not None and exists(checkpoint):
+            self.load(checkpoint)
+
+    def __repr__(self):
+        return "<NSGA2 {} designs, generation {}, {} evaluations>".format(self.size, self.generation,
+                                                                         self.evaluations)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Shuts down the worker processes, if any.
+
+        """
+
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def run(self, generations, initial=None):
+        """
+        Evolves the population until ``generations`` generations have been
+        evaluated in total, counting those of a resumed checkpoint.
+
+        :param initial: designs to warm start from, a dictionary of columns,
+                        e.g., the front of a previous run; the rest of the
+                        first generation is a Latin hypercube sample
+        :returns: the first front, see :meth:`front`
+
+        """
+
+        if self.x is None:
+            self._start(initial)
+        while self.generation < generations:
+            self._step()
+        return self.front()
+
+    def front(self):
+        """
+        The non-dominated designs, as a dictionary of (N, 1) design and output columns.
+
+        """
+
+        members = (self.rank == 0) & (self.violation == 0)
+        results = self.design(self.x[members])
+        results.update((name, column[members][:, None]) for name, column in self.outputs.items())
+        return results
+
+    def design(self, x):
+        """
+        Design columns of the points ``x`` of the unit box.
+
+        """
+
+        values = self.lower + x * (self.upper - self.lower)
+        return dict((name, values[:, j:j + 1]) for j, name in enumerate(self.variables))
+
+    def _start(self, initial):
+        x = empty((0, len(self.variables)))
+        if initial is not None:
+            values = column_stack([asarray(initial[name], dtype=float).ravel() for name in self.variables])
+            x = clip((values - self.lower) / (self.upper - self.lower), 0, 1)[:self.size]
+        # scipy.stats takes longer to import than the rest of the package, so
+        # workers that only evaluate designs never load it
+        from scipy.stats import qmc
+
+        sample = qmc.LatinHypercube(d=len(self.variables), seed=self.rng).random(self.size - len(x))
+        self.x = concatenate((x, sample))
+        self.outputs, self.violation, start = self._evaluate(self.x)
+        self.rank = non_dominated_sort(self._objectives(self.outputs), self.violation)
+        self.crowding = crowding_distance(self._objectives(self.outputs), self.rank)
+        self._reference = None
+        self._record(start, None)
+
+    def _step(self):
+        parents = self._select(self.size)
+        children = self._mutate(self._crossover(self.x[parents]))
+        outputs, violation, start = self._evaluate(children)
+
+        x = concatenate((self.x, children))
+        outputs = dict((name, concatenate((self.outputs[name], outputs[name]))) for name in self.outputs)
+        violation = concatenate((self.violation, violation))
+        objectives = self._objectives(outputs)
+        rank = non_dominated_sort(objectives, violation)
+        crowding = crowding_distance(objectives, rank)
+
+        # Best fronts first, the least crowded designs first within a front
+        survivors = lexsort((-crowding, rank))[:self.size]
+        previous = self._objectives(self.outputs)[(self.rank == 0) & (self.violation == 0)]
+        self.x, self.violation = x[survivors], violation[survivors]
+        self.outputs = dict((name, column[survivors]) for name, column in outputs.items())
+        self.rank = non_dominated_sort(self._objectives(self.outputs), self.violation)
+        self.crowding = crowding_distance(self._objectives(self.outputs), self.rank)
+        self._record(start, previous)
+
+    def _select(self, count):
+        # Binary tournaments on rank, then crowding distance
+        a, b = self.rng.integers(len(self.x), size=(2, count))
+        better = (self.rank[a] < self.rank[b]) | ((self.rank[a] == self.rank[b]) &
+                                                  (self.crowding[a] > self.crowding[b]))
+        return where(better, a, b)
+
+    def _crossover(self, parents, probability=0.9):
+        first, second = parents[0::2], parents[1::2]
+        u = self.rng.random(first.shape)
+        beta = where(u <= 0.5, (2 * u) ** (1 / (self.crossover_index + 1)),
+                     (1 / (2 * (1 - u))) ** (1 / (self.crossover_index + 1)))
+        # Each pair crosses over with the given probability, each variable with half of it
+        crossed = (self.rng.random((len(first), 1)) < probability) & (self.rng.random(first.shape) < 0.5)
+        beta = where(crossed, beta, 1.0)
+        mean, half = 0.5 * (first + second), 0.5 * (second - first)
+        return clip(concatenate((mean - beta * half, mean + beta * half)), 0, 1)
+
+    def _mutate(self, x):
+        u = self.rng.random(x.shape)
+        exponent = 1 / (self.mutation_index + 1)
+        below = 1 - x
+        delta = where(u < 0.5,
+                      (2 * u + (1 - 2 * u) * below ** (self.mutation_index + 1)) ** exponent - 1,
+                      1 - (2 * (1 - u) + 2 * (u - 0.5) * x ** (self.mutation_index + 1)) ** exponent)
+        mutated = self.rng.random(x.shape) < 1 / len(self.variables)
+        return clip(where(mutated, x + delta, x), 0, 1)
+
+    def _evaluate(self, x):
+        start = time()
+        design = self.design(x)
+        if self.processes > 1:
+            if self._pool is None:
+                self._pool = Pool(self.processes)
+            chunks = [dict((name, column[rows]) for name, column in design.items())
+                      for rows in array_split(arange(len(x)), self.processes) if len(rows) > 0]
+            parts = self._pool.map(self.evaluate, chunks)
+            results = dict((name, concatenate([broadcast_to(part[name], (len(chunk[self.variables[0]]), 1))[:, 0]
+                                               for part, chunk in zip(parts, chunks)]))
+                           for name in self._outputs())
+        else:
+            results = self.evaluate(design)
+            results = dict((name, broadcast_to(results[name], (len(x), 1))[:, 0].astype(float))
+                           for name in self._outputs())
+        self.evaluations += len(x)
+
+        violation = zeros(len(x))
+        for name, (lower, upper) in self.constraints.items():
+            if lower is not None:
+                violation += maximum(lower - results[name], 0) / maximum(abs(lower), 1)
+            if upper is not None:
+                violation += maximum(results[name] - upper, 0) / maximum(abs(upper), 1)
+        violation = where(isfinite(self._objectives(results)).all(1) & isfinite(violation), violation, inf)
+        return results, violation, start
+
+    def _outputs(self):
+        return tuple(self.objectives) + tuple(name for name in sorted(self.constraints)
+                                              if name not in self.objectives)
+
+    def _objectives(self, outputs):
+        return column_stack([outputs[name] for name in self.objectives])
+
+    def _record(self, start, previous):
+        seconds = time() - start
+        self.generation += 1
+        objectives = self._objectives(self.outputs)
+        feasible = self.violation == 0
+        front = objectives[(self.rank == 0) & feasible]
+
+        if self._reference is None and feasible.any():
+            # Normalize with the ranges of the first feasible population
+            ideal, nadir = objectives[feasible].min(0), objectives[feasible].max(0)
+            self._reference = ideal, maximum(nadir - ideal, 1e-12) * 1.1
+        hypervolume = distance = float('nan')
+        if self._reference is not None and len(front) > 0:
+            ideal, span = self._reference
+            normalized = (front - ideal) / span
+            hypervolume = _hypervolume(normalized)
+            if previous is not None and len(previous) > 0:
+                gaps = normalized[:, None, :] - ((previous - ideal) / span)[None, :, :]
+                distance = float(sqrt(sum(gaps * gaps, -1)).min(1).mean())
+
+        record = Generation(self.generation, self.evaluations, seconds, self.size / max(seconds, 1e-12),
+                            float(feasible.mean()), len(front), hypervolume, distance)
+        self.history.append(record)
+        if self.checkpoint is not None:
+            self.save(self.checkpoint)
+        if self.callback is not None:
+            self.callback(record)
+
+    def save(self, path):
+        """
+        Saves the state of the optimizer, replacing ``path`` atomically.
+
+        """
+
+        temporary = path + '.tmp'
+        reference = zeros((0, len(self.objectives))) if self._reference is None else column_stack(self._reference).T
+        with open(temporary, 'wb') as f:
+            savez(f, variables=asarray(self.variables), objectives=asarray(self.objectives),
+                  x=self.x, violation=self.violation, reference=reference,
+                  history=asarray(self.history, dtype=float).reshape(-1, len(Generation._fields)),
+                  rng=asarray(json.dumps(self.rng.bit_generator.state)),
+                  **dict(('output_' + name, column) for name, column in self.outputs.items()))
+        replace(temporary, path)
+
+    def load(self, path):
+        """
+        Resumes from the state saved by :meth:`save`.
+
+        """
+
+        with load(path) as data:
+            if tuple(data['variables']) != self.variables or tuple(data['objectives']) != self.objectives:
+                raise ValueError("Checkpoint '{}' is for variables {} and objectives {}".format(
+                    path, tuple(data['variables']), tuple(data['objectives'])))
+            self.x, self.violation = data['x'], data['violation']
+            self.outputs = dict((name[len('output_'):], data[name]) for name in data.files
+                                if name.startswith('output_'))
+            reference = data['reference']
+            self._reference = (reference[0], reference[1]) if len(reference) else None
+            self.history = [Generation(*[int(value) if name in ('generation', 'evaluations', 'front_size')
+                                         else float(value) for name, value in zip(Generation._fields, row)])
+                            for row in data['history']]
+            self.rng.bit_generator.state = json.loads(str(data['rng']))
+        self.generation = len(self.history)
+        self.evaluations = self.history[-1].evaluations if self.history else 0
+        self.rank = non_dominated_sort(self._objectives(self.outputs), self.violation)
+        self.crowding = crowding_distance(self._objectives(self.outputs), self.rank)
+        return self
+
+
+def _hypervolume(front):
+    # Fraction of quasi-random points of the unit box dominated by the front,
+    # the same points every generation
+    from scipy.stats import qmc
+
+    points = qmc.Sobol(d=front.shape[1], seed=0).random(_HYPERVOLUME_SAMPLES)
+    front = front[all(front < 1, 1)]
+    dominated = zeros(len(points), dtype=bool)
+    for start in range(0, len(front), 64):
+        block = front[start:start + 64]
+        dominated |= any(all(block[None, :, :] <= points[:, None, :], -1), 1)
+    return float(dominated.mean())
@@ -0,0 +1,703 @@
+"""
+Streaming evaluation of design sweeps.
+
+A sweep is a chain of stages, each one a generator that consumes batches of
+design variables and yields batches of results.  Only the batches in flight
+are ever held in memory, so the size of a sweep is bounded by time, not RAM::
+
+    designs = full_factorial(k_aero=linspace(0, 1, 100),
+                             cruise_speed=linspace(500, 900, 100),
+                             batch_size=512)
+
+    pipeline = Pipeline(designs,
+                        Screen(build),
+                        Synthesize(build),
+                        Size(build),
+                        Filter(has_weight_margin),
+                        SizeEngine(build),
+                        EstimateCost(build, quantity=200))
+
+    for batch in pipeline:
+        ...
+
+where ``build(design)`` returns an ``(aircraft, mission)`` pair whose inputs
+are taken from ``design``, a dictionary of column arrays of shape (N, 1) that
+broadcast against the wing-loading and weight grids of the sizing code.
+
+A :class:`Checkpoint` saves the progress of a long sweep to disk, so that a
+sweep that dies partway through is resumed where it stopped by running the
+same pipeline again::
+
+    pipeline = Pipeline(designs, ..., checkpoint=Checkpoint('sweep.checkpoint'))
+    results = collect(pipeline)
+
+"""
+from __future__ import division
+import json
+import os
+from itertools import islice
+from queue import Empty, Full, Queue
+from threading import Event, Thread
+from time import perf_counter
+
+from numpy import arange, array, asarray, broadcast_to, concatenate, load, prod, savez, unravel_index
+from numpy.random import SeedSequence, default_rng
+
+from assist.cost import Cost
+from assist.feasibility import Feasibility, check_mission
+
+
+__all__ = ('Batch', 'Pipeline', 'Checkpoint', 'Stage', 'Map', 'Filter', 'Screen', 'Synthesize', 'Size',
+           'SizeEngine', 'EstimateCost', 'Sample', 'batched', 'full_factorial', 'sweep',
+           'prefetch', 'collect', 'has_weight_margin', 'is_feasible')
+
+
+DEFAULT_BATCH_SIZE = 256
+
+# Results the model stages write onto the aircraft, as (column, attribute)
+# pairs, so objects rebuilt after a Filter can pick up where they left off
+_STATE = (('t_to_w', 't_to_w'),
+          ('w_to_s', 'w_to_s'),
+          ('fuel_fraction', 'fuel_fraction'),
+          ('max_mach', 'max_mach'),
+          ('max_speed', 'max_speed'),
+          ('w_to', 'w_to'),
+          ('w_empty', 'w_empty'),
+          ('wing_area', 'wing.area'),
+          ('max_mach', 'engine.max_mach'),
+          ('engine_max_thrust', 'engine.max_thrust'))
+
+
+class Batch(object):
+    """
+    A batch of designs, stored column-wise.
+
+    :param index: position of each design in the sweep
+    :param columns: design variables and results, one 1-D array per name
+
+    :type index: array
+    :type columns: dict
+
+    """
+
+    def __init__(self, index, columns):
+        self.index = asarray(index)
+        self.columns = columns
+        self.context = {}
+
+    def __repr__(self):
+        return "<Batch {} designs ({})>".format(len(self), ', '.join(sorted(self.columns)))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, name):
+        return name in self.columns
+
+    def __getitem__(self, name):
+        return self.columns[name]
+
+    def __setitem__(self, name, value):
+        self.columns[name] = broadcast_to(value, (len(self), 1))[:, 0].copy()
+
+    def design(self):
+        """
+        The columns as arrays of shape (N, 1), ready to broadcast against grids.
+
+        """
+
+        return dict((name, column[:, None]) for name, column in self.columns.items())
+
+    def take(self, mask):
+        """
+        A new batch with only the designs selected by ``mask``.
+
+        Objects cached in the context are dropped, they get rebuilt from the
+        remaining columns when a later stage needs them.
+
+        """
+
+        return Batch(self.index[mask],
+                     dict((name, column[mask]) for name, column in self.columns.items()))
+
+
+class Stage(object):
+    """
+    A step of a pipeline, transforms a stream of batches.
+
+    Subclasses implement :meth:`process`, which returns the transformed batch,
+    or ``None`` to drop it altogether.
+
+    """
+
+    def __call__(self, batches):
+        for batch in batches:
+            batch = self.process(batch)
+            if batch is not None and len(batch) > 0:
+                yield batch
+
+    def process(self, batch):
+        raise NotImplementedError
+
+
+class Map(Stage):
+    """
+    Adds the columns returned by ``function(batch)`` (a dictionary) to each batch.
+
+    """
+
+    def __init__(self, function):
+        self.function = function
+
+    def process(self, batch):
+        for name, value in self.function(batch).items():
+            batch[name] = value
+        return batch
+
+
+class Filter(Stage):
+    """
+    Keeps only the designs for which ``predicate(batch)`` is true, so that
+    downstream stages never evaluate the rest.
+
+    :param on_reject: called with a batch of the designs dropped, e.g., to log them
+
+    """
+
+    def __init__(self, predicate, on_reject=None):
+        self.predicate = predicate
+        self.on_reject = on_reject
+
+    def process(self, batch):
+        return _keep(batch, self.predicate(batch), self.on_reject)
+
+
+class _ModelStage(Stage):
+    def __init__(self, build, **kwargs):
+        self.build = build
+        self.kwargs = kwargs
+
+    def objects(self, batch):
+        if 'aircraft' not in batch.context:
+            design = batch.design()
+            aircraft, mission = self.build(design)
+            for column, attribute in _STATE:
+                if column in design:
+                    owner, _, name = attribute.rpartition('.')
+                    setattr(_resolve(aircraft, owner), name, design[column])
+            if 'infeasible' in design:
+                aircraft.feasibility = Feasibility(design['infeasible'], design['infeasible_segment'])
+            batch.context.update(aircraft=aircraft, mission=mission)
+        return batch.context['aircraft'], batch.context['mission']
+
+
+class Screen(_ModelStage):
+    """
+    Drops the designs that cannot meet their mission, see
+    :func:`~assist.feasibility.check_mission`, before any constraint curve is
+    evaluated for them.
+
+    Adds the ``infeasible`` and ``infeasible_segment`` columns, the reason
+    code and first infeasible segment of each design.
+
+    :param on_reject: called with a batch of the designs dropped, e.g., to log them
+
+    """
+
+    def __init__(self, build, on_reject=None):
+        _ModelStage.__init__(self, build)
+        self.on_reject = on_reject
+
+    def process(self, batch):
+        aircraft, mission = self.objects(batch)
+        _record(batch, check_mission(aircraft, mission))
+        return _keep(batch, is_feasible(batch), self.on_reject)
+
+
+class Synthesize(_ModelStage):
+    """
+    Finds the design point of each design, see :meth:`Aircraft._synthesize`.
+
+    Adds the ``t_to_w``, ``w_to_s``, ``fuel_fraction``, ``max_mach`` and
+    ``max_speed`` columns, and the ``infeasible`` and ``infeasible_segment``
+    columns, see :class:`Screen`.
+
+    """
+
+    def process(self, batch):
+        aircraft, mission = self.objects(batch)
+        aircraft._synthesize(mission, **self.kwargs)
+        _record(batch, aircraft.feasibility)
+        batch['t_to_w'] = aircraft.t_to_w
+        batch['w_to_s'] = aircraft.w_to_s
+        batch['fuel_fraction'] = aircraft.fuel_fraction
+        batch['max_mach'] = aircraft.max_mach
+        batch['max_speed'] = aircraft.max_speed
+        return batch
+
+
+class Size(_ModelStage):
+    """
+    Sizes each design, see :meth:`Aircraft._size`.
+
+    Adds the ``w_to``, ``w_empty``, ``wing_area`` and ``engine_max_thrust``
+    columns, the last the thrust of each engine, as well as ``weight_margin``,
+    the fuel fraction less the empty weight fraction, which must be positive
+    for the sizing to have a solution.
+    Updates the ``infeasible`` and ``infeasible_segment`` columns.
+
+    """
+
+    def process(self, batch):
+        aircraft, mission = self.objects(batch)
+        aircraft._size(mission, **self.kwargs)
+        _record(batch, aircraft.feasibility)
+        batch['w_to'] = aircraft.w_to
+        batch['w_empty'] = aircraft.w_empty
+        batch['wing_area'] = aircraft.wing.area
+        batch['engine_max_thrust'] = aircraft.engine.max_thrust
+        batch['weight_margin'] = aircraft.fuel_fraction - aircraft.w_empty / aircraft.w_to
+        return batch
+
+
+class SizeEngine(_ModelStage):
+    """
+    Scales the engine of each design, see :meth:`Engine.size`.
+
+    Adds the ``engine_weight``, ``engine_length`` and ``engine_diameter`` columns.
+
+    """
+
+    def process(self, batch):
+        aircraft, _ = self.objects(batch)
+        aircraft.engine.size()
+        batch['engine_weight'] = aircraft.engine.w
+        batch['engine_length'] = aircraft.engine.l
+        batch['engine_diameter'] = aircraft.engine.d
+        return batch
+
+
+class EstimateCost(_ModelStage):
+    """
+    Estimates the acquisition cost of each design, see :meth:`Cost.estimate_acquisition`.
+
+    The keyword arguments are passed on to :class:`Cost`, unless the batch has
+    a column of the same name.  Adds the ``acquisition_cost`` column.
+
+    """
+
+    def process(self, batch):
+        aircraft, _ = self.objects(batch)
+        design = batch.design()
+        kwargs = dict(self.kwargs)
+        kwargs.update((name, design[name]) for name in Cost._DEFAULTS if name in design)
+        batch['acquisition_cost'] = Cost(aircraft=aircraft, **kwargs).estimate_acquisition()
+        return batch
+
+
+class Pipeline(object):
+    """
+    A source of design batches chained through a sequence of stages.
+
+    :param source: iterable of :class:`Batch`, e.g., from :func:`full_factorial`
+    :param stages: the stages to apply, in order
+    :param prefetch: number of batches the source may produce ahead of the
+                     stages, on a background thread (0 to produce on demand)
+    :param checkpoint: a :class:`Checkpoint` to save the progress to, and
+                       resume from
+
+    """
+
+    def __init__(self, source, *stages, **kwargs):
+        self.source = source
+        self.stages = stages
+        self.prefetch = kwargs.pop('prefetch', 0)
+        self.checkpoint = kwargs.pop('checkpoint', None)
+        if len(kwargs) > 0:
+            raise TypeError("Unexpected arguments: {}".format(', '.join(kwargs)))
+
+    def __iter__(self):
+        checkpoint = self.checkpoint
+        if checkpoint is not None:
+            checkpoint.load()
+            if checkpoint.seed is not None and hasattr(self.source, 'seed'):
+                # The random designs of the run resumed
+                self.source.seed = checkpoint.seed
+            checkpoint.seed = getattr(self.source, 'seed', None)
+
+        batches = iter(self.source)
+        if checkpoint is not None:
+            batches = checkpoint._skip(batches)
+        if self.prefetch > 0:
+            batches = prefetch(batches, self.prefetch)
+        if checkpoint is not None:
+            batches = checkpoint._count(batches)
+        for stage in self.stages:
+            batches = stage(batches)
+        if checkpoint is not None:
+            batches = checkpoint._record(batches)
+        return iter(batches)
+
+
+class Checkpoint(object):
+    """
+    The progress of a :class:`Pipeline`, saved to a directory, from which a
+    pipeline over the same source and stages resumes after a crash.
+
+    The batches of the source are evaluated in order, so the progress is the
+    number of source batches fully evaluated, i.e., whose results were
+    consumed or which were filtered out.  It is saved with the results of
+    those batches, at most every ``interval`` seconds and when the pipeline is
+    done, stops, or fails; a resumed pipeline skips those batches of the
+    source without evaluating them, then replays the saved results before
+    the others, so that no design is missing or evaluated twice.  At most
+    ``interval`` seconds of work are lost to a crash.
+
+    Files are written to a temporary name and renamed, the progress last, so
+    that a crash while saving leaves the previous checkpoint intact.
+
+    The source must generate the same batches again, e.g., a
+    :func:`full_factorial` design, or a :class:`Sample` whose seed is saved
+    with the progress.  The stages must yield each batch before they take the
+    next one from the source, as those of this module do.
+
+    :param path: directory the checkpoint is kept in, created if needed
+    :param interval: seconds between saves, at least
+    :param overhead: largest fraction of the run time spent saving, saves are
+                     spaced further apart than ``interval`` if need be
+    :param columns: the columns of the results to save and replay, all of
+                    them if None
+    :param replay: whether a resumed pipeline yields the saved results first,
+                   rather than only those of the designs left
+    :param fsync: whether to flush the files to disk before renaming them, so
+                  that the checkpoint survives a power loss as well
+
+    """
+
+    _PROGRESS = 'progress.json'
+
+    def __init__(self, path, interval=60.0, overhead=0.005, columns=None, replay=True, fsync=True):
+        self.path = path
+        self.interval = interval
+        self.overhead = overhead
+        self.columns = None if columns is None else tuple(columns)
+        self.replay = replay
+        self.fsync = fsync
+        self.seconds = 0.0
+        self.saves = 0
+        self._reset()
+
+    def __repr__(self):
+        return "<Checkpoint {} ({} source batches{})>".format(self.path, self.position,
+                                                             ', done' if self.done else '')
+
+    def _reset(self):
+        self.position = 0
+        self.designs = 0
+        self.parts = []
+        self.seed = None
+        self.done = False
+        self._pending = []
+
+    @property
+    def exists(self):
+        return os.path.exists(os.path.join(self.path, self._PROGRESS))
+
+    def load(self):
+        """
+        Reads the progress saved, if any.
+
+        """
+
+        self._reset()
+        if self.exists:
+            with open(os.path.join(self.path, self._PROGRESS)) as f:
+                progress = json.load(f)
+            self.position = progress['position']
+            self.designs = progress['designs']
+            self.parts = progress['parts']
+            self.seed = progress['seed']
+            self.done = progress['done']
+        return self
+
+    def save(self):
+        """
+        Writes the results not saved yet, then the progress.
+
+        """
+
+        start = perf_counter()
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path)
+        if self._pending:
+            name = 'part-{:06d}.npz'.format(len(self.parts))
+            columns = dict((column, concatenate([batch[column] for batch in self._pending]))
+                           for column in self._pending[0])
+            self._write(name, lambda f: savez(f, **columns), 'wb')
+            self.parts.append(name)
+            self._pending = []
+        progress = dict(position=self.position, designs=self.designs, parts=self.parts, seed=self.seed,
+                        done=self.done)
+        self._write(self._PROGRESS, lambda f: json.dump(progress, f), 'w')
+        self.seconds += perf_counter() - start
+        self.saves += 1
+
+    def results(self):
+        """
+        The results saved, as :func:`collect` returns them.
+
+        """
+
+        return collect(self._replayed())
+
+    def _write(self, name, write, mode):
+        path = os.path.join(self.path, name)
+        with open(path + '.tmp', mode) as f:
+            write(f)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(path + '.tmp', path)
+
+    def _replayed(self):
+        for name in self.parts:
+            with load(os.path.join(self.path, name)) as part:
+                columns = dict((column, part[column]) for column in part.files)
+            index = columns.pop('index')
+            yield Batch(index, columns)
+
+    def _skip(self, batches):
+        # The source batches evaluated before are regenerated, but not evaluated
+        designs = 0
+        for _ in range(self.position):
+            batch = next(batches, None)
+            if batch is None:
+                break
+            designs += len(batch)
+        if designs != self.designs:
+            raise ValueError("Checkpoint '{}' is of another sweep, its first {} batches held {} designs, not {}"
+                             .format(self.path, self.position, self.designs, designs))
+        return batches
+
+    def _count(self, batches):
+        # Source batches taken by the stages so far
+        self._taken, self._taken_designs = self.position, self.designs
+        for batch in batches:
+            self._taken += 1
+            self._taken_designs += len(batch)
+            yield batch
+
+    def _record(self, batches):
+        if self.replay:
+            for batch in self._replayed():
+                yield batch
+
+        saved, cost = perf_counter(), 0.0
+        try:
+            for batch in batches:
+                yield batch
+                # Consumed, so the source batches taken so far are done
+                columns = dict((name, batch[name]) for name in (self.columns or batch.columns))
+                columns['index'] = batch.index
+                self._pending.append(columns)
+                self.position, self.designs = self._taken, self._taken_designs
+                if perf_counter() - saved >= max(self.interval, cost / self.overhead):
+                    seconds = self.seconds
+                    self.save()
+                    saved, cost = perf_counter(), self.seconds - seconds
+            self.position, self.designs = self._taken, self._taken_designs
+            self.done = True
+        finally:
+            self.save()
+
+
+def batched(rows, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Groups an iterable of designs, each a dictionary of design variables, into batches.
+
+    """
+
+    rows = iter(rows)
+    start = 0
+    while True:
+        chunk = list(islice(rows, batch_size))
+        if not chunk:
+            return
+        columns = dict((name, array([row[name] for row in chunk])) for name in chunk[0])
+        yield Batch(arange(start, start + len(chunk)), columns)
+        start += len(chunk)
+
+
+def full_factorial(batch_size=DEFAULT_BATCH_SIZE, **levels):
+    """
+    Enumerates every combination of the ``levels`` of each design variable,
+    generating the designs one batch at a time.
+
+    """
+
+    names = sorted(levels)
+    values = [asarray(levels[name]) for name in names]
+    shape = tuple(len(value) for value in values)
+    total = int(prod(shape))
+    for start in range(0, total, batch_size):
+        index = arange(start, min(start + batch_size, total))
+        subscripts = unravel_index(index, shape)
+        yield Batch(index, dict((name, value[subscript]) for name, value, subscript in
+                                zip(names, values, subscripts)))
+
+
+class Sample(object):
+    """
+    Designs drawn uniformly at random from the ``bounds``, (lower, upper), of
+    each design variable, a batch at a time::
+
+        designs = Sample(100000, seed=0, k_aero=(0.2, 0.9), cruise_speed=(500, 900))
+
+    Each batch is drawn from its own stream, spawned from the seed, so the
+    same seed gives the same designs whatever the batches drawn before.
+    Without a seed, one is drawn from the operating system and kept in
+    ``seed``, e.g., for a :class:`Checkpoint` to resume the same sample.
+
+    """
+
+    def __init__(self, samples, seed=None, batch_size=DEFAULT_BATCH_SIZE, **bounds):
+        self.samples = samples
+        self.seed = SeedSequence(seed).entropy
+        self.batch_size = batch_size
+        self.bounds = bounds
+
+    def __repr__(self):
+        return "<Sample {} designs of {}>".format(self.samples, ', '.join(sorted(self.bounds)))
+
+    def __len__(self):
+        return self.samples
+
+    def __iter__(self):
+        names = sorted(self.bounds)
+        lower = asarray([self.bounds[name][0] for name in names], dtype=float)
+        upper = asarray([self.bounds[name][1] for name in names], dtype=float)
+        for i, start in enumerate(range(0, self.samples, self.batch_size)):
+            index = arange(start, min(start + self.batch_size, self.samples))
+            rng = default_rng(SeedSequence(self.seed, spawn_key=(i,)))
+            values = lower + rng.random((len(index), len(names))) * (upper - lower)
+            yield Batch(index, dict((name, values[:, j]) for j, name in enumerate(names)))
+
+
+def sweep(batch_size=DEFAULT_BATCH_SIZE, **columns):
+    """
+    Slices columns of design variables (e.g., memory-mapped arrays) into batches.
+
+    """
+
+    total = len(next(iter(columns.values())))
+    for start in range(0, total, batch_size):
+        stop = min(start + batch_size, total)
+        yield Batch(arange(start, stop),
+                    dict((name, asarray(column[start:stop])) for name, column in columns.items()))
+
+
+_DONE = object()
+
+
+def prefetch(batches, depth=2):
+    """
+    Produces batches on a background thread, at most ``depth`` of them ahead of
+    the consumer; the producer blocks while the queue is full.
+
+    """
+
+    queue = Queue(maxsize=depth)
+    stop = Event()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            for batch in batches:
+                if not put((batch, None)):
+                    return
+            put((_DONE, None))
+        except Exception as error:
+            put((_DONE, error))
+
+    producer = Thread(target=produce)
+    producer.daemon = True
+    producer.start()
+
+    try:
+        while True:
+            try:
+                batch, error = queue.get(timeout=0.1)
+            except Empty:
+                continue
+            if batch is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield batch
+    finally:
+        stop.set()
+
+
+def collect(batches, columns=None):
+    """
+    Concatenates a stream of batches into one dictionary of arrays, with the
+    position of each design in the sweep under ``index``.
+
+    Only use it on sweeps that fit in memory, or to keep a few ``columns``.
+
+    """
+
+    index, results = [], {}
+    for batch in batches:
+        index.append(batch.index)
+        for name in (batch.columns if columns is None else columns):
+            results.setdefault(name, []).append(batch[name])
+    results = dict((name, concatenate(chunks)) for name, chunks in results.items())
+    results['index'] = concatenate(index) if index else arange(0)
+    return results
+
+
+def has_weight_margin(batch):
+    """
+    Filter predicate for designs that the sizing could close.
+
+    """
+
+    return batch['weight_margin'] > 0
+
+
+def is_feasible(batch):
+    """
+    Filter predicate for designs that passed every feasibility check so far.
+
+    """
+
+    return batch['infeasible'] == 0
+
+
+def _record(batch, feasibility):
+    batch['infeasible'] = feasibility.code
+    batch['infeasible_segment'] = feasibility.segment
+
+
+def _keep(batch, mask, on_reject=None):
+    mask = broadcast_to(mask, (len(batch),))
+    if mask.all():
+        return batch
+    if on_reject is not None:
+        on_reject(batch.take(~mask))
+    return batch.take(mask)
+
+
+def _resolve(obj, path):
+    for name in path.split('.') if path else ():
+        obj = getattr(obj, name)
+    return obj
@@ -0,0 +1,187 @@
+"""
+Local sensitivities of the sizing and cost outputs at a design point.
+
+:func:`elasticities` estimates the elasticity of each output with respect to
+each input, i.e., the percent change of the output per percent change of the
+input, by central differences.  Every perturbed design is stacked into one
+batch, so the whole report costs a single vectorized evaluation of the
+sizing chain rather than two per input::
+
+    report = elasticities(build, dict(k_aero=0.5, tofl=3000.0, cruise_range=150.0, dash_speed=1492.0),
+                          inputs=['k_aero', 'tofl', 'cruise_range', 'dash_speed', 'k_to', 'w_e_a', 'w_e_c1'],
+                          quantity=200)
+    report.ranked('w_to')      # the inputs moving the takeoff weight most, first
+    print(report.table())
+
+where ``build(design)`` returns an ``(aircraft, mission)`` pair, as for the
+stages of :mod:`assist.pipeline`.  The inputs are entries of the design, or
+inputs of the model applied to the objects ``build`` returns, see
+:data:`~assist.uncertainty.MODEL_INPUTS`, e.g., ``k_to`` or the factors on the
+coefficients of the empty weight regression, ``w_e_a`` to ``w_e_c5``.
+
+"""
+from __future__ import division
+from collections import namedtuple
+from functools import partial
+from multiprocessing import Pool
+
+from numpy import arange, array_split, asarray, broadcast_to, concatenate, isnan, ones
+
+from assist.derivatives import sizing_outputs
+from assist.uncertainty import MODEL_INPUTS, _Perturbed
+
+
+__all__ = ('elasticities', 'Sensitivity', 'Elasticity')
+
+
+Elasticity = namedtuple('Elasticity', ('input', 'elasticity', 'derivative', 'nominal'))
+Elasticity.__doc__ = """
+The sensitivity of an output to an input.
+
+:param elasticity: percent change of the output per percent change of the input
+:param derivative: change of the output per unit change of the input
+:param nominal: value of the input at the design point
+
+"""
+
+
+class Sensitivity(object):
+    """
+    Elasticities of the outputs of a design with respect to its inputs.
+
+    :param values: the nominal value of each output
+    :param inputs: the nominal value of each input
+    :param elasticity: the elasticities, keyed by (output, input) pairs
+    :param derivative: the derivatives, keyed by (output, input) pairs
+
+    """
+
+    def __init__(self, values, inputs, elasticity, derivative):
+        self.values = values
+        self.inputs = inputs
+        self.elasticity = elasticity
+        self.derivative = derivative
+
+    def __repr__(self):
+        return "<Sensitivity of {} outputs to {} inputs>".format(len(self.values), len(self.inputs))
+
+    def ranked(self, output):
+        """
+        The :class:`Elasticity` of ``output`` to each input, largest in
+        magnitude first; those that could not be estimated, e.g., because a
+        perturbed design did not close, are NaN and come last.
+
+        """
+
+        rows = [Elasticity(name, self.elasticity[output, name], self.derivative[output, name], nominal)
+                for name, nominal in self.inputs.items()]
+        return sorted(rows, key=lambda row: (isnan(row.elasticity), -abs(row.elasticity)))
+
+    def table(self, outputs=None):
+        """
+        The ranked elasticities of ``outputs`` (all of them by default), as text.
+
+        """
+
+        lines = []
+        for output in self.values if outputs is None else outputs:
+            lines.append("{} = {:.6g}".format(output, self.values[output]))
+            for row in self.ranked(output):
+                lines.append("  {:<24} {:>+10.4f}  ({:.6g} per unit, at {:.6g})"
+                             .format(row.input, row.elasticity, row.derivative, row.nominal))
+        return '\n'.join(lines)
+
+
+def elasticities(build, design, inputs=None, outputs=('w_to', 'acquisition_cost'), step=0.01, processes=0,
+                 **kwargs):
+    """
+    The :class:`Sensitivity` of the ``outputs`` of a design to its ``inputs``.
+
+    Each input is moved by a fraction ``step`` of its nominal value up and
+    down, and the nominal design and the perturbed ones are evaluated at once,
+    as one batch of ``2 * len(inputs) + 1`` designs.
+
+    :param build: returns the ``(aircraft, mission)`` pair of a design, must
+                  be picklable to use ``processes``
+    :param design: the design point, a dictionary of scalars
+    :param inputs: names of the inputs, entries of the design or
+                   :data:`~assist.uncertainty.MODEL_INPUTS`, every numeric
+                   entry of the design if None
+    :param outputs: names of the :data:`~assist.derivatives.SIZING_OUTPUTS`
+    :param step: relative size of the perturbations
+    :param processes: number of worker processes the batch is split across,
+                      0 to evaluate it in this process
+
+    The other keyword arguments are passed on to :class:`~assist.cost.Cost`.
+    The nominal values of model inputs not in the design are those of the
+    objects ``build`` returns; an input whose nominal value is zero has no
+    elasticity and raises a ValueError.
+
+    """
+
+    if inputs is None:
+        inputs = [name for name in sorted(design) if isinstance(design[name], (int, float))
+                  and not isinstance(design[name], bool)]
+    inputs = list(inputs)
+    nominal = _nominal(build, design, inputs)
+
+    # Rows: the nominal design, then each input moved up, then each moved down
+    rows = 2 * len(inputs) + 1
+    batch = dict(design)
+    for i, name in enumerate(inputs):
+        column = nominal[name] * ones((rows, 1))
+        column[1 + i] *= 1 + step
+        column[1 + len(inputs) + i] *= 1 - step
+        batch[name] = column
+
+    evaluate = partial(sizing_outputs, _Perturbed(build, tuple(name for name in inputs if name in MODEL_INPUTS)),
+                       **kwargs)
+    if processes > 1:
+        chunks = array_split(arange(rows), min(processes, rows))
+        pool = Pool(processes)
+        try:
+            results = pool.map(evaluate, [dict((name, batch[name][chunk] if name in nominal else batch[name])
+                                               for name in batch) for chunk in chunks])
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        chunks, results = [arange(rows)], [evaluate(batch)]
+    columns = dict((output, concatenate([broadcast_to(result[output], (len(chunk), 1))[:, 0]
+                                         for chunk, result in zip(chunks, results)]))
+                   for output in outputs)
+
+    values, elasticity, derivative = {}, {}, {}
+    for output in outputs:
+        column = columns[output]
+        values[output] = float(column[0])
+        for i, name in enumerate(inputs):
+            difference = column[1 + i] - column[1 + len(inputs) + i]
+            elasticity[output, name] = float(difference / (2 * step * column[0]))
+            derivative[output, name] = float(difference / (2 * step * nominal[name]))
+    return Sensitivity(values, nominal, elasticity, derivative)
+
+
+def _nominal(build, design, inputs):
+    # Nominal value of each input, from the design or the objects built from it
+    nominal = {}
+    built = None
+    for name in inputs:
+        if name in design:
+            value = design[name]
+        elif name not in MODEL_INPUTS:
+            raise ValueError("Input '{}' is neither in the design nor a model input".format(name))
+        elif name.startswith('w_e_'):
+            # Factors on the coefficients of the empty weight regression
+            value = 1.0
+        else:
+            if built is None:
+                built = build(design)[0]
+            value = getattr(built, name, None)
+            if value is None:
+                value = getattr(built.wing, name, None)
+        if value is None or asarray(value).size != 1 or value == 0:
+            raise ValueError("Input '{}' has no nonzero scalar nominal value ({}) to perturb, give it in the design"
+                             .format(name, value))
+        nominal[name] = float(value)
+    return nominal
@@ -0,0 +1,399 @@
+"""
+A local sizing service, so that tools needing sizing on demand share one warm
+process instead of each importing and building the model.
+
+:class:`SizingService` gathers the designs requested within a short window
+into one batch, sized in a single vectorized evaluation, and hands large
+batches to a process pool.  It is served over a Unix socket, or TCP on the
+loopback interface, one JSON object per line::
+
+    python -m assist.service mypackage.designs:build --socket /tmp/assist.sock
+
+    {"id": 1, "design": {"k_aero": 0.5, "sweep": 30.0, ...}}
+    {"id": 1, "outputs": {"w_to": 28140.2, ...}, "feasible": true,
+     "latency": {"queued": 0.004, "evaluation": 0.012, "total": 0.016, "batch_size": 9}}
+
+    {"id": 2, "stats": true}
+    {"id": 2, "stats": {"requests": 9, "batches": 1, "latency": {"p50": ..., "p95": ..., "p99": ...}}}
+
+where ``build(design)`` returns the ``(aircraft, mission)`` pair of a design,
+see :func:`~assist.derivatives.sizing_outputs`.  In the same process, a
+:class:`Client` connects to a served service, or the service is called
+directly::
+
+    service = SizingService(build, quantity=200)
+    result = await service.size(dict(k_aero=0.5, ...))
+
+"""
+from __future__ import division
+import asyncio
+import json
+from collections import deque
+from time import perf_counter
+
+from numpy import asarray, broadcast_to, isfinite, percentile
+
+from assist.derivatives import SIZING_OUTPUTS, sizing_outputs
+
+
+__all__ = ('SizingService', 'Client', 'serve')
+
+
+# Latencies kept for the service's statistics
+_LATENCY_HISTORY = 10000
+
+
+class SizingService(object):
+    """
+    Sizes the designs requested, in batches of those requested together.
+
+    :param build: returns the ``(aircraft, mission)`` pair of a design
+    :param window: seconds a request waits for others to batch it with
+    :param max_batch: designs sized per batch at most
+    :param processes: size of the process pool large batches are sized in,
+                      0 to size every batch in a thread of this process
+    :param pool_batch: batches of at least this many designs go to the pool
+    :param cache: an :class:`~assist.cache.EvaluationCache` to look designs
+                  up in first, optional
+
+    The other keyword arguments are passed on to :class:`~assist.cost.Cost`,
+    unless a design has an entry of the same name.  ``build`` and the cost
+    arguments must be picklable to use a process pool.
+
+    """
+
+    def __init__(self, build, window=0.005, max_batch=256, processes=0, pool_batch=64, cache=None, **kwargs):
+        self.build = build
+        self.window = window
+        self.max_batch = max_batch
+        self.processes = processes
+        self.pool_batch = pool_batch
+        self.cache = cache
+        self.kwargs = kwargs
+        self.requests = 0
+        self.batches = 0
+        self.pooled = 0
+        self.latencies = deque(maxlen=_LATENCY_HISTORY)
+        self._queue = None
+        self._batcher = None
+        self._pool = None
+        self._thread = None
+        self._tasks = set()
+
+    def __repr__(self):
+        return "<SizingService {} requests in {} batches>".format(self.requests, self.batches)
+
+    async def size(self, design):
+        """
+        Sizes a design, a dictionary of scalar inputs of ``build``; raises a
+        TypeError if it is not one.
+
+        :returns: a dictionary with the ``outputs``, whether the design is
+                  ``feasible``, and the ``latency``, in seconds, the request
+                  was ``queued`` for, of the ``evaluation`` of its batch and
+                  ``total``, and the ``batch_size``
+
+        """
+
+        design = _validated(design)
+        if self._batcher is None:
+            self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((design, future, perf_counter()))
+        return await future
+
+    def start(self):
+        """
+        Starts batching requests on the running event loop, done on the first
+        request otherwise.
+
+        """
+
+        if self._batcher is None:
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.get_running_loop().create_task(self._batch())
+
+    async def close(self):
+        """
+        Stops batching requests, and shuts the thread and process pools down.
+
+        """
+
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+        if self._thread is not None:
+            self._thread.shutdown()
+            self._thread = None
+
+    def stats(self):
+        """
+        Requests and batches served, and percentiles of the latency of the
+        latest requests, in seconds.
+
+        """
+
+        stats = dict(requests=self.requests, batches=self.batches, pooled_batches=self.pooled,
+                     mean_batch_size=self.requests / self.batches if self.batches else None)
+        if self.latencies:
+            latencies = asarray(self.latencies)
+            stats['latency'] = dict(('p{}'.format(p), float(percentile(latencies, p))) for p in (50, 95, 99))
+            stats['latency']['mean'] = float(latencies.mean())
+        return stats
+
+    async def _batch(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            pending = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(pending) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            # Designs are stacked with those of the same inputs; a malformed
+            # one fails alone, without stopping the batching
+            groups = {}
+            for request in pending:
+                try:
+                    key = tuple(sorted(request[0]))
+                except Exception as error:
+                    if not request[1].done():
+                        request[1].set_exception(error)
+                    continue
+                groups.setdefault(key, []).append(request)
+            for requests in groups.values():
+                task = loop.create_task(self._evaluate(requests))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _evaluate(self, requests):
+        loop = asyncio.get_running_loop()
+        start = perf_counter()
+        try:
+            names = sorted(requests[0][0])
+            design = dict((name, asarray([float(request[0][name]) for request in requests])[:, None])
+                          for name in names)
+            if self.processes > 0 and len(requests) >= self.pool_batch:
+                if self._pool is None:
+                    from concurrent.futures import ProcessPoolExecutor
+                    self._pool = ProcessPoolExecutor(self.processes)
+                self.pooled += 1
+                executor = self._pool
+            else:
+                # Off the event loop, on one thread, which the cache's connection belongs to
+                if self._thread is None:
+                    from concurrent.futures import ThreadPoolExecutor
+                    self._thread = ThreadPoolExecutor(1)
+                executor = self._thread
+            columns = await loop.run_in_executor(executor, _size, self.build, design, self.cache, self.kwargs)
+        except Exception as error:
+            if len(requests) > 1:
+                # A design the model rejects fails the batch it is in, whose
+                # halves are sized apart until it fails alone
+                half = len(requests) // 2
+                await asyncio.gather(self._evaluate(requests[:half]), self._evaluate(requests[half:]))
+                return
+            for _, future, _ in requests:
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        end = perf_counter()
+        self.batches += 1
+        self.requests += len(requests)
+        for i, (_, future, queued) in enumerate(requests):
+            outputs = dict((name, float(columns[name][i])) for name in SIZING_OUTPUTS)
+            feasible = bool(all(isfinite(value) for value in outputs.values()))
+            self.latencies.append(end - queued)
+            if not future.done():
+                future.set_result(dict(outputs=outputs, feasible=feasible,
+                                       latency=dict(queued=start - queued, evaluation=end - start,
+                                                    total=end - queued, batch_size=len(requests))))
+
+    async def _handle(self, reader, writer):
+        # One JSON request per line, answered in the order they complete
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.get_running_loop().create_task(self._respond(line, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            writer.close()
+
+    async def _respond(self, line, writer):
+        request = {}
+        try:
+            request = json.loads(line)
+            if request.get('stats'):
+                response = dict(stats=self.stats())
+            else:
+                response = await self.size(request['design'])
+        except Exception as error:
+            response = dict(error='{}: {}'.format(type(error).__name__, error))
+        response['id'] = request.get('id') if isinstance(request, dict) else None
+        writer.write(_dumps(response) + b'\n')
+        await writer.drain()
+
+
+async def serve(service, path=None, host='127.0.0.1', port=0):
+    """
+    Serves a :class:`SizingService` on the Unix socket at ``path``, or on
+    TCP at ``host`` and ``port`` if no path is given.
+
+    :returns: the :class:`asyncio.Server`
+
+    """
+
+    service.start()
+    if path is not None:
+        return await asyncio.start_unix_server(service._handle, path=path)
+    return await asyncio.start_server(service._handle, host=host, port=port)
+
+
+class Client(object):
+    """
+    A client of a served :class:`SizingService`, in the same process or
+    another one, whose requests may be in flight concurrently::
+
+        client = await Client.connect(path='/tmp/assist.sock')
+        results = await asyncio.gather(*[client.size(design) for design in designs])
+        await client.close()
+
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._futures = {}
+        self._ids = 0
+        self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    @classmethod
+    async def connect(cls, path=None, host='127.0.0.1', port=None):
+        if path is not None:
+            reader, writer = await asyncio.open_unix_connection(path)
+        else:
+            reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def size(self, design):
+        """
+        The response of the service to a design, see :meth:`SizingService.size`.
+
+        """
+
+        return await self._request(design=design)
+
+    async def stats(self):
+        return (await self._request(stats=True))['stats']
+
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._listener.cancel()
+
+    async def _request(self, **request):
+        self._ids += 1
+        request['id'] = self._ids
+        future = self._futures[self._ids] = asyncio.get_running_loop().create_future()
+        self._writer.write(_dumps(request) + b'\n')
+        await self._writer.drain()
+        response = await future
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response
+
+    async def _listen(self):
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self._futures.pop(response.get('id'), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self._futures.values():
+            if not future.done():
+                future.set_exception(ConnectionError("The sizing service closed the connection"))
+
+
+def _validated(design):
+    # A design is a dictionary of numbers keyed by the names of the inputs
+    if not isinstance(design, dict):
+        raise TypeError("A design is a dictionary of inputs, not {}".format(type(design).__name__))
+    validated = {}
+    for name, value in design.items():
+        if not isinstance(name, str):
+            raise TypeError("Input names are strings, not {!r}".format(name))
+        try:
+            validated[name] = float(value)
+        except (TypeError, ValueError):
+            raise TypeError("Input '{}' is not a number: {!r}".format(name, value))
+    return validated
+
+
+def _size(build, design, cache, kwargs):
+    # Sizes a batch of designs, in a thread or a worker process
+    outputs = sizing_outputs(build, design, **kwargs) if cache is None else cache(build, design, **kwargs)
+    rows = len(next(iter(design.values())))
+    return dict((name, broadcast_to(outputs[name], (rows, 1))[:, 0]) for name in SIZING_OUTPUTS)
+
+
+def _dumps(obj):
+    # Strict JSON, with null for the outputs of infeasible designs
+    def clean(value):
+        if isinstance(value, dict):
+            return dict((key, clean(item)) for key, item in value.items())
+        if isinstance(value, float) and not isfinite(value):
+            return None
+        return value
+
+    return json.dumps(clean(obj)).encode('utf-8')
+
+
+def main(argv=None):
+    import argparse
+    from importlib import import_module
+
+    parser = argparse.ArgumentParser(description="Serves sizing requests, one JSON object per line")
+    parser.add_argument('build', help="function returning the (aircraft, mission) of a design, as module:name")
+    parser.add_argument('--socket', help="path of the Unix socket to listen on")
+    parser.add_argument('--port', type=int, default=8750, help="TCP port to listen on, without a socket")
+    parser.add_argument('--window', type=float, default=0.005, help="seconds to wait for requests to batch")
+    parser.add_argument('--processes', type=int, default=0, help="size of the process pool for large batches")
+    parser.add_argument('--quantity', type=int, default=None, help="aircraft produced, for the cost estimate")
+    args = parser.parse_args(argv)
+
+    module, _, name = args.build.partition(':')
+    build = getattr(import_module(module), name)
+    kwargs = dict(quantity=args.quantity) if args.quantity is not None else {}
+    service = SizingService(build, window=args.window, processes=args.processes, **kwargs)
+
+    async def run():
+        server = await serve(service, path=args.socket, port=args.port)
+        async with server:
+            await server.serve_forever()
+
+    asyncio.run(run())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,356 @@
+"""
+Read-only tables published once in shared memory, for worker processes.
+
+A :class:`SharedTables` copies named arrays into a single block of
+:mod:`multiprocessing.shared_memory`.  Pickled, e.g., as an argument of a
+task or of a pool's initializer, it is only the name of the block and the
+layout of the arrays, and a worker unpickling it maps the block and views the
+arrays in place, read-only, rather than holding a copy of them::
+
+    with SharedTables(model_tables(mission_columns(missions), deck=deck)) as tables:
+        pool = Pool(8, initializer=install, initargs=(tables,))
+        ...
+
+    def task(tables, ...):
+        tables['deck']                          # the same memory in every worker
+        missions = missions_from_columns(tables)
+
+:func:`model_tables` gathers the lookup tables of the model, i.e., the drag
+polars and empty weight coefficients of :class:`~assist.aircraft.Aircraft`,
+the maximum lift coefficients of :class:`~assist.components.Wing` and the
+escalations of :class:`~assist.cost.Cost`, and :func:`install` points those
+classes, in a worker, at their shared copies.  :func:`mission_columns` and
+:func:`missions_from_columns` convert missions to columns of numbers, and
+back, so that they are published as tables too.
+
+The process creating the tables owns the block and unlinks it when it is
+closed, on leaving the ``with`` block, or when it is garbage collected or the
+process exits; workers keep their view of it until they exit.
+
+"""
+from __future__ import division
+import os
+import sys
+import weakref
+from importlib import import_module
+
+from numpy import asarray, full, isnan, nan, ndarray, sqrt, unique, zeros
+
+from assist.environment import G_0
+
+
+__all__ = ('SharedTables', 'model_tables', 'install', 'mission_columns', 'missions_from_columns',
+           'MODEL_TABLES', 'MISSION_FIELDS')
+
+
+# Lookup tables of the model, as (module, class, attribute), each a dictionary
+# whose leaves are sequences of numbers
+MODEL_TABLES = (('assist.aircraft', 'Aircraft', '_CD_0'),
+                ('assist.aircraft', 'Aircraft', '_K_1'),
+                ('assist.aircraft', 'Aircraft', '_W_E_TO_W_TO_COEFFICIENTS'),
+                ('assist.components.wing', 'Wing', '_CL_MAX'),
+                ('assist.cost', 'Cost', '_ESCALATIONS'))
+
+# Columns of the missions, a row per segment; the inputs of Segment a
+# segment was not given are NaN
+MISSION_FIELDS = ('mission', 'kind', 'speed', 'altitude', 'range', 'time', 'field_length', 'mu',
+                  'obstacle_height', 'climb_rate', 'acceleration', 'turn_rate', 'weight_fraction',
+                  'payload_released')
+
+# Keyword arguments of Segment among the mission columns
+_SEGMENT_INPUTS = ('range', 'time', 'field_length', 'mu', 'obstacle_height', 'climb_rate', 'acceleration',
+                   'turn_rate', 'weight_fraction')
+
+_KNOTS = 1.68780986  # ft/s
+
+# Offsets of the arrays in a block are multiples of this (bytes)
+_ALIGNMENT = 64
+
+# Tables attached by this process, by the name of their block
+_ATTACHED = {}
+
+
+class SharedTables(object):
+    """
+    Named arrays, read-only, in a block of shared memory.
+
+    :param tables: a dictionary of the arrays, or of anything
+                   :func:`numpy.asarray` makes an array of numbers or
+                   strings, keyed by names, which may be tuples
+
+    The tables are looked up by name, like a dictionary.
+
+    """
+
+    def __init__(self, tables):
+        from multiprocessing.shared_memory import SharedMemory
+
+        arrays = dict((name, asarray(table)) for name, table in tables.items())
+        for name, array in arrays.items():
+            if array.dtype.hasobject:
+                raise ValueError("Table {!r} is not of numbers or strings".format(name))
+
+        layout, size = [], 0
+        for name, array in arrays.items():
+            layout.append((name, array.dtype.str, array.shape, size))
+            size += -(-array.nbytes // _ALIGNMENT) * _ALIGNMENT
+
+        self._memory = SharedMemory(create=True, size=max(size, 1))
+        self.name = self._memory.name
+        self.layout = tuple(layout)
+        self._arrays = self._view(self._memory, self.layout)
+        for name, array in arrays.items():
+            self._arrays[name].flags.writeable = True
+            self._arrays[name][...] = array
+            self._arrays[name].flags.writeable = False
+        self.owner = True
+        self._finalizer = weakref.finalize(self, _release, self._memory, os.getpid())
+
+    @classmethod
+    def attach(cls, name, layout):
+        """
+        The tables of the block ``name``, laid out as ``layout``, viewed in
+        place; attached once per process.
+
+        """
+
+        tables = _ATTACHED.get(name)
+        if tables is None:
+            tables = cls.__new__(cls)
+            tables._memory = _open(name)
+            tables.name = name
+            tables.layout = tuple(layout)
+            tables._arrays = cls._view(tables._memory, tables.layout)
+            tables.owner = False
+            tables._finalizer = weakref.finalize(tables, _release, tables._memory, None)
+            _ATTACHED[name] = tables
+        return tables
+
+    def __reduce__(self):
+        return _attach, (self.name, self.layout)
+
+    def __repr__(self):
+        return "<SharedTables {} tables, {} bytes in {}>".format(len(self.layout), self.nbytes, self.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __getitem__(self, name):
+        if self._arrays is None:
+            raise ValueError("The tables in {} were closed".format(self.name))
+        return self._arrays[name]
+
+    def __contains__(self, name):
+        return any(entry[0] == name for entry in self.layout)
+
+    def __iter__(self):
+        return iter([entry[0] for entry in self.layout])
+
+    def __len__(self):
+        return len(self.layout)
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+    @property
+    def nbytes(self):
+        return sum(self[name].nbytes for name in self)
+
+    def close(self):
+        """
+        Releases this process's view of the tables, and, in the process that
+        created them, frees the block; closing again does nothing.
+
+        Arrays of the tables still referenced elsewhere keep the memory mapped
+        until they are deleted.
+
+        """
+
+        self._arrays = None
+        if not self.owner:
+            _ATTACHED.pop(self.name, None)
+        self._finalizer()
+
+    @property
+    def closed(self):
+        return not self._finalizer.alive
+
+    @staticmethod
+    def _view(memory, layout):
+        arrays = {}
+        for name, dtype, shape, offset in layout:
+            array = ndarray(shape, dtype=dtype, buffer=memory.buf, offset=offset)
+            array.flags.writeable = False
+            arrays[name] = array
+        return arrays
+
+
+def _attach(name, layout):
+    return SharedTables.attach(name, layout)
+
+
+def _open(name):
+    # Attaches to a block without leaving it to the resource tracker, which
+    # would otherwise unlink it when this process exits
+    from multiprocessing.shared_memory import SharedMemory
+
+    if sys.version_info >= (3, 13):
+        return SharedMemory(name=name, track=False)
+    # Before Python 3.13, every process registers the blocks it opens
+    from multiprocessing import resource_tracker
+    memory = SharedMemory(name=name)
+    resource_tracker.unregister(memory._name, 'shared_memory')
+    return memory
+
+
+def _release(memory, owner_pid):
+    # Unmaps the block, and unlinks it in the process that created it, not in
+    # those forked from it
+    try:
+        memory.close()
+    except BufferError:
+        # Arrays of the tables are still referenced, the block is unmapped
+        # when they are deleted
+        pass
+    if owner_pid == os.getpid():
+        if sys.version_info < (3, 13):
+            # Workers share the resource tracker of this process, so their
+            # unregistering the block they attached also dropped it here;
+            # registered again, unlinking it unregisters it without error
+            from multiprocessing import resource_tracker
+            resource_tracker.register(memory._name, 'shared_memory')
+        try:
+            memory.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def model_tables(*args, **tables):
+    """
+    The lookup tables of the model, see :data:`MODEL_TABLES`, keyed by the
+    path of each leaf, e.g., ``('assist.aircraft', 'Aircraft', '_CD_0',
+    'jet_fighter', 'mach')``, and the dictionaries of ``args`` and
+    ``tables``, e.g., :func:`mission_columns`, to publish with them.
+
+    """
+
+    every = {}
+    for module, cls, attribute in MODEL_TABLES:
+        _flatten(getattr(getattr(import_module(module), cls), attribute), (module, cls, attribute), every)
+    for extra in args:
+        every.update(extra)
+    every.update(tables)
+    return every
+
+
+def install(tables):
+    """
+    Points the classes of the model at the lookup tables in ``tables``, e.g.,
+    as the initializer of a pool of workers, so that they use the shared
+    copies.
+
+    The tables must stay attached as long as the classes are used, which
+    workers do, and they are read-only: do not install them in a process
+    that modifies the tables or closes them.
+
+    """
+
+    for module, cls, attribute in MODEL_TABLES:
+        prefix = (module, cls, attribute)
+        leaves = [(name[3:], tables[name]) for name in tables if isinstance(name, tuple) and name[:3] == prefix]
+        if not leaves:
+            continue
+        nested = {}
+        for path, table in leaves:
+            level = nested
+            for key in path[:-1]:
+                level = level.setdefault(key, {})
+            level[path[-1]] = table
+        setattr(getattr(import_module(module), cls), attribute, nested)
+
+
+def mission_columns(missions):
+    """
+    The segments of ``missions``, a mission or a sequence of them, as the
+    columns :data:`MISSION_FIELDS`, a row per segment; ``mission`` is the
+    index of the mission of each segment.
+
+    Only segments of scalar inputs are tabulated, without stores or
+    releases of payload.
+
+    """
+
+    from assist.mission import Mission
+
+    missions = [missions] if isinstance(missions, Mission) else list(missions)
+    rows = [(index, segment) for index, mission in enumerate(missions) for segment in mission.segments]
+    for index, mission in enumerate(missions):
+        if mission.stores is not None or any(segment.release is not None for segment in mission.segments):
+            raise ValueError("Mission {} has stores or releases, which cannot be tabulated".format(index))
+
+    columns = dict((name, full(len(rows), nan)) for name in MISSION_FIELDS)
+    columns['mission'] = zeros(len(rows), dtype=int)
+    columns['kind'] = asarray([segment.kind for _, segment in rows], dtype=str)
+    for row, (index, segment) in enumerate(rows):
+        if any(asarray(value).size != 1 for value in (segment.speed, segment.altitude, segment.n)):
+            raise ValueError("Segment {} of mission {} has inputs of several designs, which cannot be tabulated"
+                             .format(segment.kind, index))
+        speed = float(segment.speed)
+        columns['mission'][row] = index
+        columns['speed'][row] = speed / _KNOTS
+        columns['altitude'][row] = segment.altitude
+        columns['payload_released'][row] = segment.payload_released
+        columns['climb_rate'][row] = segment.climb_rate
+        columns['acceleration'][row] = segment.acceleration
+        if segment.n > 1:
+            columns['turn_rate'][row] = sqrt(segment.n ** 2 - 1) * G_0 / speed
+        if segment._weight_fraction is not None:
+            columns['weight_fraction'][row] = segment._weight_fraction
+        for name in ('range', 'field_length', 'mu', 'obstacle_height'):
+            value = getattr(segment, name, None)
+            if value is not None:
+                columns[name][row] = value
+        if getattr(segment, 'time', None) is not None and not hasattr(segment, 'range'):
+            columns['time'][row] = segment.time
+    return columns
+
+
+def missions_from_columns(columns):
+    """
+    The missions of the columns :func:`mission_columns` returns, e.g., as
+    viewed in shared tables.
+
+    """
+
+    from assist.mission import Mission, Segment
+
+    missions = []
+    mission_of = asarray(columns['mission'])
+    for index in unique(mission_of):
+        segments = []
+        for row in (mission_of == index).nonzero()[0]:
+            inputs = dict((name, float(columns[name][row])) for name in _SEGMENT_INPUTS
+                          if not isnan(columns[name][row]))
+            if inputs.get('turn_rate') == 0:
+                del inputs['turn_rate']
+            segments.append(Segment(str(columns['kind'][row]), float(columns['speed'][row]),
+                                    float(columns['altitude'][row]),
+                                    payload_released=float(columns['payload_released'][row]), **inputs))
+        missions.append(Mission(segments))
+    return missions
+
+
+def _flatten(table, path, leaves):
+    # The leaves of a dictionary of sequences of numbers, keyed by their path
+    for key, value in table.items():
+        if isinstance(value, dict):
+            _flatten(value, path + (key,), leaves)
+        else:
+            leaves[path + (key,)] = asarray(value, dtype=float)
+    return leaves
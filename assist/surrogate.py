@@ -0,0 +1,355 @@
+"""
+Surrogate models in front of the full sizing chain.
+
+A :class:`SurrogateCache` wraps a model, a function taking a dictionary of
+design variables as (N, 1) columns and returning a dictionary of outputs,
+like the ``build``-based evaluations of :mod:`assist.pipeline` and
+:mod:`assist.derivatives`.  Queries whose predicted error is below a
+threshold are answered by a fitted surrogate, the rest are evaluated with the
+model and added to the training set, which the surrogate is conditioned on,
+and refit to every few samples::
+
+    cache = SurrogateCache(evaluate, inputs=('k_aero', 'cruise_speed'),
+                           outputs=('w_to', 'acquisition_cost'),
+                           threshold=0.005, path='fighter.npz')
+    cache.sample(dict(k_aero=(0.2, 0.9), cruise_speed=(500, 900)), 40)
+    results = cache(dict(k_aero=0.55, cruise_speed=720))
+
+Only needs NumPy and SciPy, which is imported on first use, as it takes
+longer to import than the rest of the package.
+
+"""
+from __future__ import division
+from os import replace
+from os.path import exists
+
+from numpy import (abs, all, asarray, block, broadcast_arrays, broadcast_to, diag, empty, exp, eye, full,
+                   isfinite, load, log, maximum, nan, ones, savez, sqrt, stack, sum, triu_indices,
+                   column_stack, vstack, zeros)
+from numpy.linalg import LinAlgError, lstsq, pinv
+
+
+__all__ = ('ResponseSurface', 'GaussianProcess', 'SurrogateCache')
+
+
+class _Model(object):
+    """
+    Scaling shared by the surrogates: inputs to the unit box of the training
+    set, outputs to zero mean and unit variance.
+
+    """
+
+    def _scale(self, x, y=None):
+        if y is not None:
+            self._x_min = x.min(0)
+            self._x_span = maximum(x.max(0) - self._x_min, 1e-12)
+            self._y_mean = y.mean(0)
+            self._y_std = maximum(y.std(0), 1e-12)
+            return (x - self._x_min) / self._x_span, (y - self._y_mean) / self._y_std
+        return (x - self._x_min) / self._x_span
+
+    def update(self, x, y):
+        """
+        Conditions the model on the training set ``x``, ``y``, the one it was
+        fit to followed by new samples; refits it, unless it is cheaper to
+        extend the fit.
+
+        """
+
+        return self.fit(x, y)
+
+
+class ResponseSurface(_Model):
+    """
+    Polynomial response surface fit by least squares.
+
+    The predicted error is the standard error of a new observation, i.e.,
+    the residual (lack of fit) scaled by the leverage of the query point.
+
+    :param degree: 1 for a linear, 2 for a full quadratic surface
+
+    """
+
+    def __init__(self, degree=2):
+        if degree not in (1, 2):
+            raise ValueError("Response surfaces of degree {} are not supported, only 1 or 2".format(degree))
+        self.degree = degree
+
+    def min_samples(self, dimensions):
+        terms = 1 + dimensions + (dimensions * (dimensions + 1) // 2 if self.degree == 2 else 0)
+        return terms + 1
+
+    def _basis(self, u):
+        columns = [ones((len(u), 1)), u]
+        if self.degree == 2:
+            i, j = triu_indices(u.shape[1])
+            columns.append(u[:, i] * u[:, j])
+        return column_stack(columns)
+
+    def fit(self, x, y):
+        u, v = self._scale(x, y)
+        basis = self._basis(u)
+        self._coefficients = lstsq(basis, v, rcond=None)[0]
+        residuals = v - basis.dot(self._coefficients)
+        self._variance = sum(residuals * residuals, 0) / max(len(u) - basis.shape[1], 1)
+        self._covariance = pinv(basis.T.dot(basis))
+        return self
+
+    def predict(self, x):
+        basis = self._basis(self._scale(x))
+        leverage = sum(basis.dot(self._covariance) * basis, 1)[:, None]
+        mean = basis.dot(self._coefficients)
+        std = sqrt(self._variance * (1 + leverage))
+        return mean * self._y_std + self._y_mean, std * self._y_std
+
+
+class GaussianProcess(_Model):
+    """
+    Gaussian-process (Kriging) model with a squared exponential kernel and a
+    constant mean, one per output, with length scales that maximize the
+    likelihood of the training set.
+
+    :param nugget: relative noise added to the diagonal, for conditioning
+    :param length_scale_bounds: bounds on the length scales, in unit-box coordinates
+
+    """
+
+    def __init__(self, nugget=1e-8, length_scale_bounds=(1e-2, 1e2)):
+        self.nugget = nugget
+        self.length_scale_bounds = length_scale_bounds
+
+    def min_samples(self, dimensions):
+        return 2
+
+    @staticmethod
+    def _kernel(u, w, length_scales):
+        distance = (u[:, None, :] - w[None, :, :]) / length_scales
+        return exp(-0.5 * sum(distance * distance, -1))
+
+    def _factor(self, u, v, length_scales):
+        from scipy.linalg import cho_solve, cholesky
+        matrix = self._kernel(u, u, length_scales) + self.nugget * eye(len(u))
+        factor = cholesky(matrix, lower=True)
+        alpha = cho_solve((factor, True), v)
+        variance = v.dot(alpha) / len(u)
+        return factor, alpha, variance
+
+    def _negative_log_likelihood(self, log_length_scales, u, v):
+        try:
+            factor, _, variance = self._factor(u, v, exp(log_length_scales))
+        except LinAlgError:
+            return 1e10
+        return 0.5 * len(u) * log(maximum(variance, 1e-300)) + sum(log(diag(factor)))
+
+    def fit(self, x, y):
+        from scipy.optimize import minimize
+        u, v = self._scale(x, y)
+        bounds = [tuple(log(self.length_scale_bounds))] * u.shape[1]
+        self._u, self._v = u, v
+        self._outputs = []
+        for j in range(v.shape[1]):
+            result = minimize(self._negative_log_likelihood, full(u.shape[1], log(0.5)), args=(u, v[:, j]),
+                              method='L-BFGS-B', bounds=bounds)
+            length_scales = exp(result.x)
+            self._outputs.append((length_scales,) + self._factor(u, v[:, j], length_scales))
+        return self
+
+    def update(self, x, y):
+        """
+        Conditions the model on the training set ``x``, ``y``, the one it was
+        fit to followed by new samples, with the scaling and length scales of
+        the fit: the Cholesky factor of the kernel matrix is extended by the
+        rows of the new samples rather than factored again.
+
+        Raises :class:`numpy.linalg.LinAlgError` if the new samples make the
+        kernel matrix singular, e.g., repeat a sample, for the model to be refit.
+
+        """
+
+        from scipy.linalg import cho_solve, cholesky, solve_triangular
+        w = self._scale(x[len(self._u):])
+        u = vstack((self._u, w))
+        v = vstack((self._v, (y[len(self._u):] - self._y_mean) / self._y_std))
+        outputs = []
+        for j, (length_scales, factor, _, _) in enumerate(self._outputs):
+            cross = solve_triangular(factor, self._kernel(self._u, w, length_scales), lower=True)
+            corner = cholesky(self._kernel(w, w, length_scales) + self.nugget * eye(len(w)) - cross.T.dot(cross),
+                              lower=True)
+            factor = block([[factor, zeros((len(factor), len(w)))], [cross.T, corner]])
+            alpha = cho_solve((factor, True), v[:, j])
+            outputs.append((length_scales, factor, alpha, v[:, j].dot(alpha) / len(u)))
+        self._u, self._v, self._outputs = u, v, outputs
+        return self
+
+    def predict(self, x):
+        from scipy.linalg import cho_solve
+        u = self._scale(x)
+        mean, std = empty((len(u), len(self._outputs))), empty((len(u), len(self._outputs)))
+        for j, (length_scales, factor, alpha, variance) in enumerate(self._outputs):
+            k = self._kernel(u, self._u, length_scales)
+            mean[:, j] = k.dot(alpha)
+            reduction = sum(k.T * cho_solve((factor, True), k.T), 0)
+            std[:, j] = sqrt(maximum(variance * (1 - reduction), 0.0))
+        return mean * self._y_std + self._y_mean, std * self._y_std
+
+
+class SurrogateCache(object):
+    """
+    Answers queries from a surrogate when it is confident enough, from the
+    model otherwise.
+
+    :param function: the model, takes a dictionary of (N, 1) input columns and
+                     returns a dictionary of outputs that broadcast to (N, 1)
+    :param inputs: names of the inputs the surrogate is fit over
+    :param outputs: names of the outputs to fit
+    :param model: a :class:`GaussianProcess` (default) or :class:`ResponseSurface`
+    :param threshold: largest predicted error, relative to the predicted value,
+                      of any output for a query to be answered by the surrogate
+    :param path: file the training set is loaded from, if it exists, and saved to
+    :param refit_every: samples learned after which the surrogate is refit,
+                        e.g., its length scales fit again, and the training set
+                        saved; until then it is only conditioned on them
+
+    :meth:`flush` refits the surrogate and saves the samples learned since,
+    e.g., before the cache is discarded.
+
+    """
+
+    def __init__(self, function, inputs, outputs, model=None, threshold=0.01, path=None, refit_every=8):
+        self.function = function
+        self.inputs = tuple(inputs)
+        self.outputs = tuple(outputs)
+        self.model = GaussianProcess() if model is None else model
+        self.threshold = threshold
+        self.path = path
+        self.refit_every = refit_every
+
+        self.x = empty((0, len(self.inputs)))
+        self.y = empty((0, len(self.outputs)))
+        self.hits = 0
+        self.misses = 0
+        self.fitted = False
+        # Samples learned since the surrogate was last refit
+        self.pending = 0
+
+        if path is not None and exists(path):
+            self.load(path)
+
+    def __repr__(self):
+        return "<SurrogateCache {} samples, {} hits, {} misses>".format(len(self.x), self.hits, self.misses)
+
+    def __call__(self, design):
+        """
+        Outputs for a design, or a batch of them, shaped like the broadcast inputs.
+
+        """
+
+        columns = broadcast_arrays(*[asarray(design[name], dtype=float) for name in self.inputs])
+        shape = columns[0].shape
+        x = stack([column.ravel() for column in columns], 1)
+
+        y = full((len(x), len(self.outputs)), nan)
+        trusted = full(len(x), False)
+        if self.fitted:
+            mean, std = self.model.predict(x)
+            trusted = all(std <= self.threshold * abs(mean), 1)
+            y[trusted] = mean[trusted]
+
+        if not trusted.all():
+            y[~trusted] = self.evaluate(x[~trusted])
+            self.learn(x[~trusted], y[~trusted])
+
+        self.hits += int(trusted.sum())
+        self.misses += int((~trusted).sum())
+        return dict((name, y[:, j].reshape(shape)) for j, name in enumerate(self.outputs))
+
+    def evaluate(self, x):
+        """
+        Evaluates the model at the rows of ``x``, in one batch.
+
+        """
+
+        results = self.function(dict((name, x[:, j:j + 1]) for j, name in enumerate(self.inputs)))
+        return column_stack([broadcast_to(results[name], (len(x), 1))[:, 0] for name in self.outputs])
+
+    def sample(self, bounds, samples, seed=None):
+        """
+        Evaluates the model at a Latin hypercube sample of the ``bounds`` (a
+        (lower, upper) pair per input) and fits the surrogate to it.
+
+        """
+
+        from scipy.stats import qmc
+        lower, upper = zip(*[bounds[name] for name in self.inputs])
+        x = qmc.scale(qmc.LatinHypercube(d=len(self.inputs), seed=seed).random(samples), lower, upper)
+        self.learn(x, self.evaluate(x))
+        return self.flush() if self.pending else self
+
+    def learn(self, x, y):
+        """
+        Adds samples of the model to the training set and conditions the
+        surrogate on them, or refits it and saves the training set, see
+        ``refit_every``.  Samples with non-finite outputs (e.g., designs that
+        did not close) are skipped.
+
+        """
+
+        finite = isfinite(y).all(1)
+        x, y = x[finite], y[finite]
+        if not len(x):
+            return
+        refit = not self.fitted or self.pending + len(x) >= self.refit_every
+        self.x = vstack((self.x, x))
+        self.y = vstack((self.y, y))
+        self.pending += len(x)
+        if not refit:
+            try:
+                self.model.update(self.x, self.y)
+                return
+            except LinAlgError:
+                pass
+        self.flush()
+
+    def flush(self):
+        """
+        Refits the surrogate to the samples learned since it was last refit,
+        if any, and saves the training set.
+
+        """
+
+        if self.pending:
+            self.fit()
+        if self.path is not None:
+            self.save(self.path)
+        return self
+
+    def fit(self):
+        self.fitted = len(self.x) >= self.model.min_samples(len(self.inputs))
+        if self.fitted:
+            self.model.fit(self.x, self.y)
+        self.pending = 0
+        return self
+
+    def save(self, path):
+        """
+        Saves the training set, replacing ``path`` atomically.
+
+        """
+
+        temporary = path + '.tmp'
+        with open(temporary, 'wb') as f:
+            savez(f, x=self.x, y=self.y, inputs=asarray(self.inputs), outputs=asarray(self.outputs))
+        replace(temporary, path)
+
+    def load(self, path):
+        """
+        Loads a training set saved by :meth:`save` and refits the surrogate.
+
+        """
+
+        with load(path) as data:
+            if tuple(data['inputs']) != self.inputs or tuple(data['outputs']) != self.outputs:
+                raise ValueError("Training set in '{}' is for inputs {} and outputs {}".format(
+                    path, tuple(data['inputs']), tuple(data['outputs'])))
+            self.x, self.y = data['x'], data['y']
+        return self.fit()
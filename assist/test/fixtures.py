@@ -0,0 +1,63 @@
+"""
+The designs the tests size, shared by their modules.
+
+"""
+from assist.aircraft import Aircraft
+from assist.components import Wing, Payload
+from assist.mission import Mission, Segment
+
+
+__all__ = ('build', 'DESIGN', 'combat', 'ferry')
+
+
+DESIGN = dict(k_aero=0.5, sweep=30.0, tofl=3000.0, cruise_altitude=30000.0, cruise_speed=700.0, stealth=0.3)
+
+
+def build(design):
+    """
+    The aircraft and mission of a design, a dictionary of scalars or of
+    (N, 1) columns of them; the entries of :data:`DESIGN` it does not have
+    take their values there.
+
+    """
+
+    design = dict(DESIGN, **design)
+    wing = Wing(flap_type='single_slot',
+                slats=True,
+                k_aero=design['k_aero'],
+                sweep=design['sweep'],
+                flap_span=[0.2, 0.4],
+                taper_ratio=0.2)
+    aircraft = Aircraft(wing=wing,
+                        k_aero=design['k_aero'],
+                        stores=[Payload('Crew', weight=200),
+                                Payload('AMRAAMs', weight=1328, cd_r=0.005)])
+    mission = Mission(segments=[Segment('warmup', altitude=0, speed=0, time=60),
+                                Segment('takeoff', altitude=0, speed=150, field_length=design['tofl']),
+                                Segment('climb', altitude=0, speed=500),
+                                Segment('cruise', altitude=design['cruise_altitude'],
+                                        speed=design['cruise_speed'], range=150),
+                                Segment('dash', altitude=30000, speed=1492, range=100),
+                                Segment('land', altitude=0, speed=150, field_length=1500)])
+    return aircraft, mission
+
+
+def combat(design):
+    """
+    The aircraft and mission of :func:`build`, with a sustained turn at the
+    design's ``turn_rate`` in place of the dash.
+
+    """
+
+    aircraft, mission = build(design)
+    mission.segments[4] = Segment('combat', altitude=30000, speed=900, weight_fraction=0.99,
+                                  turn_rate=design['turn_rate'])
+    return aircraft, mission
+
+
+def ferry():
+    return Mission(segments=[Segment('warmup', altitude=0, speed=0, time=60),
+                             Segment('takeoff', altitude=0, speed=150, field_length=2500),
+                             Segment('cruise', altitude=30000, speed=700, range=300),
+                             Segment('land', altitude=0, speed=150, field_length=1500)],
+                   stores=[Payload('Crew', weight=200)])
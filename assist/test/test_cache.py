@@ -0,0 +1,144 @@
+import sqlite3
+from multiprocessing import Pool
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from time import perf_counter
+from unittest import TestCase
+
+from numpy import broadcast_to, linspace
+from numpy.testing import assert_allclose
+
+from assist.cache import EvaluationCache, fingerprint
+from assist.components import Payload
+from assist.derivatives import SIZING_OUTPUTS, sizing_outputs
+from assist.test.fixtures import build, DESIGN
+
+
+K_AERO = linspace(0.3, 0.8, 12)[:, None]
+
+
+def evaluate_slice(args):
+    cache, start = args
+    results = cache(build, dict(DESIGN, k_aero=K_AERO[start:start + 6]), quantity=200)
+    return results['w_to'][:, 0]
+
+
+class EvaluationCacheTest(TestCase):
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.path = join(self.directory, 'evaluations.db')
+
+    def tearDown(self):
+        rmtree(self.directory)
+
+    def test_batch_is_evaluated_once(self):
+        cache = EvaluationCache(self.path)
+        design = dict(DESIGN, k_aero=K_AERO)
+        results = cache(build, design, quantity=200)
+        expected = sizing_outputs(build, design, quantity=200)
+        for name in SIZING_OUTPUTS:
+            assert_allclose(results[name], broadcast_to(expected[name], (12, 1)), err_msg=name)
+        self.assertEqual((cache.hits, cache.misses), (0, 12))
+
+        cache(build, dict(DESIGN, k_aero=K_AERO[::-1]), quantity=200)
+        self.assertEqual((cache.hits, cache.misses), (12, 12))
+
+        single = cache(build, dict(DESIGN, k_aero=K_AERO[3, 0]), quantity=200)
+        self.assertEqual(cache.hits, 13)
+        self.assertAlmostEqual(single['w_to'], results['w_to'][3, 0])
+
+    def test_misses_size_the_objects_fingerprinted(self):
+        designs = []
+
+        def counted(design):
+            designs.append(design)
+            return build(design)
+
+        cache = EvaluationCache(self.path)
+        cache(counted, dict(DESIGN, k_aero=K_AERO[:4]), quantity=200)
+        cache(counted, dict(DESIGN, k_aero=K_AERO[5, 0]), quantity=200)
+        self.assertEqual(len(designs), 2)
+
+        # Only the designs missing are sized, from objects of their own
+        cache(counted, dict(DESIGN, k_aero=K_AERO[2:8]), quantity=200)
+        self.assertEqual(len(designs), 4)
+        assert_allclose(designs[-1]['k_aero'], K_AERO[[4, 6, 7]])
+
+    def test_reads_do_not_wait_for_writers(self):
+        cache = EvaluationCache(self.path, timeout=10.0)
+        cache(build, dict(DESIGN, k_aero=K_AERO[:4]), quantity=200)
+        accessed = lambda db: dict(db.execute("SELECT key, accessed FROM evaluations").fetchall())
+
+        writer = sqlite3.connect(self.path, isolation_level=None)
+        before = accessed(writer)
+        writer.execute("BEGIN IMMEDIATE")
+        try:
+            start = perf_counter()
+            cache(build, dict(DESIGN, k_aero=K_AERO[:2]), quantity=200)
+            self.assertLess(perf_counter() - start, 5.0)
+            self.assertEqual(cache.hits, 2)
+        finally:
+            writer.execute("COMMIT")
+        self.assertEqual(accessed(writer), before)
+
+        # The entries read are marked as used with the next write
+        cache(build, dict(DESIGN, k_aero=K_AERO[4:5]), quantity=200)
+        after = accessed(writer)
+        writer.close()
+        self.assertEqual(sum(after[key] > before[key] for key in before), 2)
+
+    def test_fingerprint(self):
+        aircraft, mission = build(dict(DESIGN, k_aero=K_AERO[:3]))
+        keys = fingerprint((aircraft, mission), rows=3)
+        self.assertEqual(len(set(keys)), 3)
+        self.assertEqual(fingerprint(build(dict(DESIGN, k_aero=float(K_AERO[1, 0])))), keys[1])
+
+        aircraft, mission = build(DESIGN)
+        key = fingerprint((aircraft, mission))
+        aircraft.stores.append(Payload('Bombs', weight=500))
+        self.assertNotEqual(fingerprint((aircraft, mission)), key)
+        self.assertNotEqual(fingerprint((aircraft, mission, dict(quantity=200))),
+                            fingerprint((aircraft, mission, dict(quantity=100))))
+
+    def test_persistence_and_invalidation(self):
+        design = dict(DESIGN, k_aero=K_AERO[:4])
+        EvaluationCache(self.path, version='a')(build, design, quantity=200)
+
+        cache = EvaluationCache(self.path, version='a')
+        self.assertEqual(len(cache), 4)
+        cache(build, design, quantity=200)
+        self.assertEqual(cache.misses, 0)
+
+        cache = EvaluationCache(self.path, version='b')
+        self.assertEqual(len(cache), 0)
+
+    def test_least_recently_used_are_evicted(self):
+        cache = EvaluationCache(self.path, max_entries=4)
+        cache(build, dict(DESIGN, k_aero=K_AERO[:4]), quantity=200)
+        cache(build, dict(DESIGN, k_aero=K_AERO[:2]), quantity=200)
+        cache(build, dict(DESIGN, k_aero=K_AERO[4:6]), quantity=200)
+        self.assertEqual(len(cache), 4)
+
+        hits = cache.hits
+        cache(build, dict(DESIGN, k_aero=K_AERO[:2]), quantity=200)
+        self.assertEqual(cache.hits, hits + 2)
+
+        cache = EvaluationCache(self.path, max_bytes=1)
+        cache(build, dict(DESIGN, k_aero=K_AERO[6:8]), quantity=200)
+        self.assertEqual(len(cache), 0)
+
+    def test_process_pool(self):
+        cache = EvaluationCache(self.path)
+        pool = Pool(3)
+        try:
+            slices = pool.map(evaluate_slice, [(cache, start) for start in (0, 3, 6, 0, 3, 6)])
+        finally:
+            pool.close()
+            pool.join()
+
+        self.assertEqual(len(cache), 12)
+        results = cache(build, dict(DESIGN, k_aero=K_AERO), quantity=200)
+        self.assertEqual(cache.misses, 0)
+        for start, w_to in zip((0, 3, 6, 0, 3, 6), slices):
+            assert_allclose(w_to, results['w_to'][start:start + 6, 0])
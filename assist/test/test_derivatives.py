@@ -0,0 +1,77 @@
+from unittest import TestCase
+
+from numpy import array, exp, linspace, sqrt, where
+from numpy.testing import assert_allclose
+
+from assist.derivatives import Dual, jacobian, sizing_partials, SIZING_OUTPUTS
+from assist.test.fixtures import build, DESIGN
+from assist.util import interp
+
+
+def central_differences(design, name, step):
+    up, down = dict(design), dict(design)
+    up[name] = design[name] + step
+    down[name] = design[name] - step
+    values_up, _ = sizing_partials(build, up, wrt=[], quantity=200)
+    values_down, _ = sizing_partials(build, down, wrt=[], quantity=200)
+    return dict((output, (values_up[output] - values_down[output]) / (2 * step)) for output in values_up)
+
+
+class DualTest(TestCase):
+    def test_elementary_functions(self):
+        def function(inputs):
+            x, y = inputs['x'], inputs['y']
+            return dict(f=x * y ** 2 / (1 + x) + exp(-x) * sqrt(y),
+                        g=where(x > 1, x ** 3, 2 * y),
+                        h=interp(linspace(0.1, 2.1, 5), x * array([0.0, 1.0, 2.0]), array([1.0, 3.0, 2.0])))
+
+        x, y = 1.5, 2.0
+        values, partials = jacobian(function, dict(x=x, y=y))
+
+        assert_allclose(values['f'], x * y ** 2 / (1 + x) + exp(-x) * sqrt(y))
+        assert_allclose(partials['f', 'x'], y ** 2 / (1 + x) ** 2 - exp(-x) * sqrt(y))
+        assert_allclose(partials['f', 'y'], 2 * x * y / (1 + x) + exp(-x) / (2 * sqrt(y)))
+        assert_allclose(partials['g', 'x'], 3 * x ** 2)
+        assert_allclose(partials['g', 'y'], 0.0)
+
+        step = 1e-6
+        h_up = function(dict(x=x + step, y=y))['h']
+        h_down = function(dict(x=x - step, y=y))['h']
+        assert_allclose(partials['h', 'x'], (h_up - h_down) / (2 * step), atol=1e-8)
+
+    def test_values_are_not_converted(self):
+        with self.assertRaises(TypeError):
+            array(Dual(1.0, [1.0]))
+
+
+class SizingPartialsTest(TestCase):
+    def test_matches_central_differences(self):
+        values, partials = sizing_partials(build, DESIGN, quantity=200)
+
+        self.assertEqual(sorted(values), sorted(SIZING_OUTPUTS))
+        for name, step in (('k_aero', 1e-5), ('sweep', 1e-4), ('tofl', 1e-2), ('cruise_speed', 1e-3)):
+            expected = central_differences(DESIGN, name, step)
+            for output in ('t_to_w', 'w_to', 'wing_area', 'max_thrust', 'acquisition_cost'):
+                assert_allclose(partials[output, name], expected[output], rtol=1e-5, atol=1e-10,
+                                err_msg="d{}/d{}".format(output, name))
+
+    def test_batch_partials(self):
+        k_aero = array([0.3, 0.5, 0.8])[:, None]
+        design = dict(DESIGN, k_aero=k_aero)
+        values, partials = sizing_partials(build, design, wrt=['k_aero', 'cruise_speed'], quantity=200)
+
+        self.assertEqual(partials['w_to', 'k_aero'].shape, (3, 1))
+        for i in range(3):
+            _, expected = sizing_partials(build, dict(DESIGN, k_aero=k_aero[i, 0]),
+                                          wrt=['k_aero', 'cruise_speed'], quantity=200)
+            for key in (('w_to', 'k_aero'), ('acquisition_cost', 'cruise_speed')):
+                assert_allclose(partials[key][i, 0], expected[key])
+
+    def test_empty_weight_fraction_slope(self):
+        w_to = array([8000.0, 12000.0])
+        for sweep in (DESIGN['sweep'], [20.0, 35.0, 50.0]):
+            aircraft, mission = build(dict(DESIGN, sweep=sweep))
+            aircraft._synthesize(mission)
+            _, partials = jacobian(lambda inputs: dict(f=aircraft._empty_weight_fraction(inputs['w_to'])),
+                                   dict(w_to=w_to))
+            assert_allclose(aircraft._empty_weight_fraction_slope(w_to), partials['f', 'w_to'])
@@ -0,0 +1,48 @@
+from unittest import TestCase
+
+from numpy import isfinite, linspace
+from numpy.testing import assert_allclose, assert_array_equal
+
+from assist.envelope import envelope
+from assist.environment import Atmosphere
+from assist.mission import Segment
+from assist.test.fixtures import build, DESIGN
+
+
+MACH = linspace(0.1, 2.0, 60)
+ALTITUDE = linspace(0, 60000, 50)
+
+
+def sized(design):
+    aircraft, mission = build(design)
+    aircraft._synthesize(mission)
+    aircraft._size(mission)
+    return aircraft
+
+
+class EnvelopeTest(TestCase):
+    def test_maps_match_segment_requirements(self):
+        aircraft = sized(DESIGN)
+        maps = envelope(aircraft, MACH, ALTITUDE)
+        self.assertEqual(maps.shape, (50, 60))
+
+        for i, j in ((5, 20), (20, 30), (30, 45)):
+            altitude, mach = ALTITUDE[i], MACH[j]
+            speed = mach * Atmosphere().speed_of_sound(altitude) / 1.68780986
+            # Climbing at Ps, or turning at the sustained turn rate, takes all the thrust available
+            climb = Segment('climb', speed=speed, altitude=altitude, climb_rate=float(maps.ps[i, j]))
+            assert_allclose(climb.thrust_to_weight_required(aircraft, aircraft.w_to_s), aircraft.t_to_w)
+            if isfinite(maps.turn_rate[i, j]) and maps.n_sustained[i, j] < maps.n_max[i, j]:
+                turn = Segment('combat', speed=speed, altitude=altitude, turn_rate=float(maps.turn_rate[i, j]))
+                assert_allclose(turn.thrust_to_weight_required(aircraft, aircraft.w_to_s), aircraft.t_to_w)
+        self.assertTrue((maps.n_sustained[isfinite(maps.n_sustained)] <= maps.n_max[isfinite(maps.n_sustained)]).all())
+        self.assertTrue((envelope(aircraft, MACH, ALTITUDE, n_limit=7.33).n_max <= 7.33).all())
+
+    def test_threaded_chunks_match(self):
+        aircraft = sized(dict(DESIGN, k_aero=linspace(0.3, 0.7, 3)[:, None]))
+        maps = envelope(aircraft, MACH, ALTITUDE)
+        chunked = envelope(aircraft, MACH, ALTITUDE, chunk_size=7, threads=3)
+        self.assertEqual(maps.shape, (50, 60, 3))
+        for name in ('ps', 'turn_rate', 'n_max'):
+            assert_array_equal(chunked[name], maps[name])
+        assert_allclose(maps.ps[..., 1], envelope(sized(dict(DESIGN, k_aero=0.5)), MACH, ALTITUDE).ps)
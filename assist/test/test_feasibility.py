@@ -0,0 +1,57 @@
+from unittest import TestCase
+
+from numpy import array, isfinite, isnan
+
+from assist.feasibility import Feasibility, THRUST, WEIGHT, describe
+from assist.pipeline import Pipeline, Screen, Synthesize, Size, collect, full_factorial
+from assist.test.fixtures import combat
+
+
+class FeasibilityTest(TestCase):
+    LEVELS = dict(k_aero=[0.3, 0.8], turn_rate=[0.1, 0.2, 3.0])
+
+    def test_feasible_design_closes(self):
+        aircraft, mission = combat(dict(k_aero=0.5, turn_rate=0.1))
+        aircraft._synthesize(mission)
+        aircraft._size(mission)
+
+        self.assertTrue(aircraft.feasibility.feasible)
+        self.assertEqual(aircraft.feasibility.reasons, [])
+        self.assertTrue(isfinite([aircraft.t_to_w, aircraft.w_to_s, aircraft.w_to]).all())
+
+    def test_infeasible_design_is_flagged(self):
+        aircraft, mission = combat(dict(k_aero=0.5, turn_rate=3.0))
+        aircraft._synthesize(mission)
+        aircraft._size(mission)
+
+        self.assertFalse(aircraft.feasibility.feasible)
+        self.assertEqual(int(aircraft.feasibility.segment), 4)
+        self.assertEqual(aircraft.feasibility.reasons, describe(THRUST))
+        self.assertTrue(isnan([aircraft.t_to_w, aircraft.w_to]).all())
+
+    def test_batch_codes(self):
+        feasibility = Feasibility(code=array([[0], [0], [0]]), segment=array([[-1], [-1], [-1]]))
+        feasibility.flag(array([[False], [True], [True]]), THRUST, 2)
+        feasibility.flag(array([[True], [True], [False]]), WEIGHT)
+
+        self.assertEqual(feasibility.code.ravel().tolist(), [WEIGHT, THRUST | WEIGHT, THRUST])
+        self.assertEqual(feasibility.segment.ravel().tolist(), [-1, 2, 2])
+        self.assertEqual(len(feasibility.reasons[1]), 2)
+
+    def test_screen_drops_designs(self):
+        rejected = []
+        results = collect(Pipeline(full_factorial(batch_size=4, **self.LEVELS),
+                                   Screen(combat, on_reject=rejected.append),
+                                   Synthesize(combat), Size(combat)))
+
+        self.assertEqual(sorted(results['turn_rate']), [0.1, 0.1, 0.2, 0.2])
+        self.assertTrue((results['infeasible'] == 0).all())
+        self.assertTrue(isfinite(results['w_to']).all())
+        self.assertEqual(sum(len(batch) for batch in rejected), 2)
+        self.assertTrue((rejected[0]['infeasible'] & THRUST).all())
+
+        unscreened = collect(Pipeline(full_factorial(batch_size=4, **self.LEVELS),
+                                      Synthesize(combat), Size(combat)))
+        infeasible = unscreened['infeasible'] != 0
+        self.assertEqual(infeasible.sum(), 2)
+        self.assertTrue(isnan(unscreened['w_to'][infeasible]).all())
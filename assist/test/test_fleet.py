@@ -0,0 +1,87 @@
+import tracemalloc
+from unittest import TestCase
+
+from numpy import array, inf, linspace, nan, where
+from numpy.random import default_rng
+from numpy.testing import assert_allclose
+
+from assist.fleet import CHUNK_BYTES, FleetMix
+from assist.pipeline import Pipeline, Synthesize, Size, SizeEngine, EstimateCost, collect, full_factorial
+from assist.test.fixtures import build
+
+
+# A multirole design, and one specialized for each of two missions
+CAPABLE = [[True, True], [True, False], [False, True]]
+
+
+def cheapest_enumerated(fleet, max_count):
+    mixes = fleet.mixes(max_count)
+    results = fleet.evaluate(mixes)
+    best = where(results['covered'], results['cost'], inf).argmin()
+    return mixes[best], results['cost'][best]
+
+
+class FleetMixTest(TestCase):
+    def test_coverage(self):
+        fleet = FleetMix(unit_cost=[10.0, 4.0, 5.0], capable=CAPABLE, required=[3, 2])
+        results = fleet.evaluate([[1, 2, 1], [1, 2, 2], [0, 3, 2], [5, 0, 0], [0, 5, 0]])
+        self.assertEqual(list(results['covered']), [False, True, True, True, False])
+        self.assertEqual(list(results['shortfall']), [1, 0, 0, 0, 2])
+        assert_allclose(results['cost'], [23.0, 28.0, 22.0, 50.0, 20.0])
+
+    def test_cheapest_mix(self):
+        rng = default_rng(3)
+        capable = rng.random((5, 4)) < 0.5
+        capable[0] = True
+        fleet = FleetMix(unit_cost=rng.uniform(20, 60, 5), operating_cost=rng.uniform(10, 30, 5), capable=capable,
+                         required=rng.integers(1, 5, 4))
+        _, cost = cheapest_enumerated(fleet, 8)
+
+        counts, milp_cost = fleet.cheapest()
+        assert_allclose(milp_cost, cost)
+        self.assertTrue(fleet.evaluate([counts])['covered'][0])
+
+        counts, greedy_cost = fleet.cheapest('greedy')
+        self.assertTrue(fleet.evaluate([counts])['covered'][0])
+        self.assertLessEqual(cost, greedy_cost)
+        self.assertLess(greedy_cost, 1.1 * cost)
+
+    def test_memory_is_bounded(self):
+        # 16 missions, 65535 sets of them, for which these mixes at once would take 0.5 GiB
+        rng = default_rng(5)
+        capable = rng.random((3, 16)) < 0.5
+        capable[0] = True
+        fleet = FleetMix(unit_cost=[10.0, 4.0, 5.0], capable=capable, required=rng.integers(0, 3, 16))
+        mixes = fleet.mixes(9)
+
+        tracemalloc.start()
+        try:
+            results = fleet.evaluate(mixes)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        self.assertLess(peak, 1.5 * CHUNK_BYTES)
+        assert_allclose(results['covered'], fleet.evaluate(mixes, chunk_size=97)['covered'])
+
+    def test_unavailable_designs(self):
+        # The multirole design did not close, and few of the first specialized one are built
+        fleet = FleetMix(unit_cost=[nan, 4.0, 5.0], capable=CAPABLE, required=[3, 2], available=[10, 2, 10])
+        with self.assertRaises(ValueError):
+            fleet.cheapest()
+        fleet = FleetMix(unit_cost=[nan, 4.0, 5.0], capable=CAPABLE, required=[2, 2], available=[10, 2, 10])
+        for method in ('milp', 'greedy'):
+            counts, cost = fleet.cheapest(method)
+            self.assertEqual(list(counts), [0, 2, 2])
+
+    def test_sized_designs(self):
+        levels = dict(k_aero=[0.5], cruise_speed=linspace(500, 900, 3))
+        results = collect(Pipeline(full_factorial(**levels), Synthesize(build), Size(build), SizeEngine(build),
+                                   EstimateCost(build, quantity=200)))
+        # The fastest cruise flies both missions, the others only the first
+        capable = array([[True, speed >= 900] for speed in results['cruise_speed']])
+        fleet = FleetMix(unit_cost=results['acquisition_cost'] / 200, capable=capable, required=[6, 2])
+
+        counts, cost = fleet.cheapest()
+        _, expected_cost = cheapest_enumerated(fleet, 8)
+        assert_allclose(cost, expected_cost)
+        self.assertGreaterEqual(counts[2], 2)
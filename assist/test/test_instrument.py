@@ -0,0 +1,79 @@
+import json
+import logging
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from numpy import linspace
+
+from assist.aircraft import Aircraft
+from assist.cache import EvaluationCache
+from assist.derivatives import sizing_outputs
+from assist.instrument import Profiler
+from assist.pipeline import EstimateCost, Pipeline, Size, Synthesize, full_factorial
+from assist.test.fixtures import build, DESIGN
+
+
+def sweep():
+    designs = full_factorial(batch_size=50, k_aero=linspace(0.3, 0.7, 10), cruise_speed=linspace(500, 900, 10),
+                             **dict((name, [value]) for name, value in DESIGN.items()
+                                    if name not in ('k_aero', 'cruise_speed')))
+    return Pipeline(designs, Synthesize(build), Size(build), EstimateCost(build, quantity=200))
+
+
+class ProfilerTest(TestCase):
+    def setUp(self):
+        self.directory = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.directory)
+
+    def test_stage_timers_and_counters(self):
+        synthesize = Aircraft.__dict__['_synthesize']
+        with Profiler() as profiler:
+            self.assertIsNot(Aircraft.__dict__['_synthesize'], synthesize)
+            batches = list(sweep())
+        # Nothing is wrapped once the profiler is done
+        self.assertIs(Aircraft.__dict__['_synthesize'], synthesize)
+
+        stages = profiler.report()['stages']
+        self.assertEqual(sum(len(batch) for batch in batches), 100)
+        self.assertEqual(stages['pipeline.synthesize'], dict(stages['pipeline.synthesize'], calls=2, designs=100))
+        self.assertEqual(stages['synthesize']['calls'], 2)
+        self.assertEqual(stages['constraints']['calls'], 12)
+        for name in ('synthesize', 'size', 'cost', 'atmosphere'):
+            self.assertGreater(stages[name]['seconds'], 0, name)
+        # Nested stages are not counted in the self time of their callers
+        self.assertLess(stages['synthesize']['self_seconds'],
+                        stages['synthesize']['seconds'] - stages['constraints']['seconds'] * 0.99)
+
+    def test_cache_hit_rates_and_export(self):
+        cache = EvaluationCache(join(self.directory, 'evaluations.db'))
+        design = dict(DESIGN, k_aero=linspace(0.3, 0.7, 4)[:, None])
+        with Profiler(profile=True, memory=True) as profiler:
+            cache(build, design, quantity=200)
+            cache(build, design, quantity=200)
+
+        report = profiler.report()
+        self.assertEqual(report['caches']['evaluation'], dict(hits=4, misses=4, hit_rate=0.5))
+        self.assertGreater(report['memory']['synthesize']['max_bytes'], 0)
+        self.assertIn('_synthesize', [row['function'] for row in report['profile']])
+
+        path = join(self.directory, 'profile.json')
+        profiler.save(path)
+        with open(path) as f:
+            self.assertEqual(json.load(f)['caches'], report['caches'])
+
+    def test_events_are_level_gated(self):
+        with Profiler(events=logging.INFO) as profiler:
+            sizing_outputs(build, DESIGN, quantity=200)
+        self.assertEqual(profiler.report()['events'], [])
+
+        with Profiler(events=logging.DEBUG) as profiler:
+            sizing_outputs(build, DESIGN, quantity=200)
+        events = profiler.report()['events']
+        self.assertEqual([event['segment'] for event in events],
+                         ['warmup', 'takeoff', 'climb', 'cruise', 'dash', 'land'])
+        self.assertEqual(events[0]['weight_fraction'], 0.99)
+        self.assertEqual(logging.getLogger('assist').level, logging.NOTSET)
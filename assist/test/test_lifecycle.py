@@ -0,0 +1,62 @@
+from unittest import TestCase
+
+from numpy import arange, linspace, repeat, tile
+from numpy.testing import assert_allclose
+
+from assist.cost import Cost
+from assist.lifecycle import LifeCycleCost, CATEGORIES
+from assist.pipeline import full_factorial
+from assist.test.fixtures import build, DESIGN
+
+
+def life_cycle(design=DESIGN, **kwargs):
+    aircraft, mission = build(design)
+    aircraft._synthesize(mission)
+    aircraft._size(mission)
+    aircraft.engine.size()
+    return LifeCycleCost(Cost(aircraft=aircraft, quantity=200), **kwargs)
+
+
+SCENARIOS = dict(fleet_size=repeat([50.0, 100.0, 200.0], 4), flight_hours=tile(linspace(200, 400, 4), 3),
+                 fuel_price=3.0, fuel_escalation=0.02, discount_rate=0.05)
+
+
+class LifeCycleCostTest(TestCase):
+    def test_annual_costs(self):
+        costs = life_cycle(service_life=20, sortie_hours=2.0)
+        aircraft = costs.cost.aircraft
+        cube = costs.cube(SCENARIOS, years=arange(25))
+        self.assertEqual(cube['fuel'].shape, (12, 25))
+
+        # Fuel of a sortie, per flight hour, escalated
+        gallons = aircraft.fuel_fraction * aircraft.w_to / 2.0 / 6.7
+        assert_allclose(cube['fuel'][5, 3], 100.0 * SCENARIOS['flight_hours'][5] * gallons * 3.0 * 1.02 ** 3)
+        assert_allclose(cube['crew'][0, :20], 50 * 1.5 * 150000.0)
+        assert_allclose(cube['depreciation'][0, 0], 50 * 0.9 * costs.cost.acquisition_cost / 200 / 20)
+        assert_allclose(cube['total'], sum(cube[name] for name in CATEGORIES))
+        self.assertTrue((cube['total'][:, 20:] == 0).all())
+        # Twice the flight hours, twice the fuel and maintenance
+        assert_allclose(cube['maintenance'][3, :20] / cube['maintenance'][0, :20], 2.0)
+
+    def test_reductions(self):
+        costs = life_cycle()
+        cube = costs.cube(SCENARIOS)
+        discount = 1.05 ** -arange(1.0, 26.0)
+        npv, total = costs.reduce(SCENARIOS, chunk_size=5)
+        for name in CATEGORIES + ('total',):
+            assert_allclose(npv[name], (cube[name] * discount).sum(-1))
+            assert_allclose(total[name], cube[name].sum(-1))
+
+        # Scenarios streamed as batches
+        levels = dict(fleet_size=[50.0, 100.0, 200.0], flight_hours=linspace(200, 400, 4))
+        npv, _ = costs.reduce(full_factorial(batch_size=5, **levels))
+        expected, _ = costs.reduce(dict(fleet_size=repeat(levels['fleet_size'], 4),
+                                        flight_hours=tile(levels['flight_hours'], 3)))
+        assert_allclose(npv['total'], expected['total'])
+
+    def test_batch_of_designs(self):
+        designs = dict(DESIGN, k_aero=linspace(0.4, 0.6, 3)[:, None])
+        npv, _ = life_cycle(designs).reduce(SCENARIOS)
+        self.assertEqual(npv['total'].shape, (3, 12))
+        expected, _ = life_cycle(dict(DESIGN, k_aero=0.6)).reduce(SCENARIOS)
+        assert_allclose(npv['total'][2], expected['total'])
@@ -0,0 +1,183 @@
+import tracemalloc
+from unittest import TestCase
+
+from numpy import argmin, array, empty, inf, linspace, maximum, minimum
+from numpy.testing import assert_allclose, assert_array_equal
+
+from assist.environment import Atmosphere
+from assist.mission import FlightConditions, Segment, Workspace
+from assist.test.fixtures import build, DESIGN, ferry
+
+
+SPECS = (dict(speed=500, altitude=15000, turn_rate=0.2),
+         dict(speed=700, altitude=40000, climb_rate=100, acceleration=5),
+         dict(speed=400, altitude=5000, turn_radius=2000),
+         dict(speed=450, altitude=10000, turn_rate=0.1, turn_radius=1500))
+
+
+class FlightConditionsTest(TestCase):
+    def setUp(self):
+        self.conditions = FlightConditions(speed=[spec['speed'] for spec in SPECS],
+                                           altitude=[spec['altitude'] for spec in SPECS],
+                                           turn_rate=[spec.get('turn_rate', 0) for spec in SPECS],
+                                           turn_radius=[spec.get('turn_radius', inf) for spec in SPECS],
+                                           climb_rate=[spec.get('climb_rate', 0) for spec in SPECS],
+                                           acceleration=[spec.get('acceleration', 0) for spec in SPECS])
+
+    def test_matches_segments(self):
+        self.assertEqual(len(self.conditions), len(SPECS))
+        for i, spec in enumerate(SPECS):
+            segment = Segment('combat', **spec)
+            for name in ('speed', 'density', 'mach', 'dynamic_pressure', 'n'):
+                assert_allclose(getattr(self.conditions, name)[i], getattr(segment, name), err_msg=name)
+        assert_allclose(self.conditions.speed_of_sound, Atmosphere().speed_of_sound(self.conditions.altitude))
+
+    def test_thrust_to_weight_required_of_designs(self):
+        aircraft, mission = build(dict(DESIGN, k_aero=linspace(0.3, 0.7, 5)[:, None]))
+        aircraft._synthesize(mission)
+        wing_loadings = linspace(20, 200, 50)
+
+        required = self.conditions.thrust_to_weight_required(aircraft, wing_loadings, prior_weight_fraction=0.9)
+        self.assertEqual(required.shape, (len(SPECS), 5, 50))
+        for i, spec in enumerate(SPECS):
+            expected = Segment('combat', **spec).thrust_to_weight_required(aircraft, wing_loadings, 0.9)
+            assert_allclose(required[i], expected)
+
+
+def peak_allocation(function):
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class MasterEquationTest(TestCase):
+    def test_in_place_evaluation_does_not_allocate(self):
+        aircraft, mission = build(dict(DESIGN, k_aero=linspace(0.3, 0.7, 256)[:, None]))
+        aircraft._synthesize(mission)
+        wing_loadings = linspace(10, 299, 290)
+        segment = Segment('combat', altitude=15000, speed=500, turn_rate=0.2)
+
+        expected = segment.thrust_to_weight_required(aircraft, wing_loadings, 0.9)
+        out, workspace = empty(expected.shape), Workspace()
+        self.assertIs(segment.thrust_to_weight_required(aircraft, wing_loadings, 0.9, out=out, workspace=workspace),
+                      out)
+        assert_allclose(out, expected)
+
+        allocating = peak_allocation(lambda: segment.thrust_to_weight_required(aircraft, wing_loadings, 0.9))
+        in_place = peak_allocation(lambda: segment.thrust_to_weight_required(aircraft, wing_loadings, 0.9,
+                                                                             out=out, workspace=workspace))
+        # The temporaries of the allocating evaluation are each as large as the result
+        self.assertGreater(allocating, 2 * out.nbytes)
+        self.assertLess(in_place, out.nbytes / 4)
+
+
+class MultiMissionTest(TestCase):
+    def sized(self, design, missions):
+        aircraft, mission = build(design)
+        missions = missions(mission)
+        aircraft._synthesize(missions)
+        aircraft._size(missions)
+        return aircraft
+
+    def test_single_mission(self):
+        alone = self.sized(DESIGN, lambda mission: mission)
+        joint = self.sized(DESIGN, lambda mission: [mission])
+        for name in ('t_to_w', 'w_to_s', 'fuel_fraction', 'w_to', 'w_empty'):
+            assert_allclose(getattr(joint, name), getattr(alone, name), err_msg=name)
+        self.assertEqual(joint.design_mission, 0)
+        self.assertEqual(joint.sizing_mission, 0)
+
+    def test_sized_for_the_most_demanding_mission(self):
+        design = dict(DESIGN, k_aero=linspace(0.4, 0.7, 4)[:, None])
+        strike = self.sized(design, lambda mission: mission)
+        alone = self.sized(design, lambda mission: ferry())
+        joint = self.sized(design, lambda mission: [mission, ferry()])
+
+        # The design point is on the joint envelope, above either mission's
+        self.assertTrue((joint.t_to_w >= maximum(strike.t_to_w, alone.t_to_w)).all())
+        assert_allclose(joint.t_to_w, joint.t_to_w_req.min(-1, keepdims=True))
+        assert_array_equal(joint.design_mission, 0)
+        assert_array_equal(joint.design_segment, 4)  # the dash
+
+        # The ferry mission, without the missiles, carries the most fuel
+        self.assertEqual(alone.payload, 200)
+        assert_array_equal(joint.sizing_mission, 1)
+        assert_allclose(joint.w_to, maximum(*joint.mission_w_to))
+        assert_allclose(joint.fuel_fraction, alone.fuel_fraction)
+        assert_allclose(joint.wing.area, joint.w_to / joint.w_to_s)
+        self.assertEqual(joint.payload, strike.payload)
+
+
+class VariableSweepTest(TestCase):
+    def test_single_angle_matches_fixed_sweep(self):
+        fixed, mission = build(DESIGN)
+        fixed._synthesize(mission)
+        fixed._size(mission)
+        variable, mission = build(dict(DESIGN, sweep=[DESIGN['sweep']]))
+        variable._synthesize(mission)
+        variable._size(mission)
+
+        self.assertTrue(variable.variable_sweep)
+        assert_allclose(variable.t_to_w, fixed.t_to_w)
+        assert_allclose(variable.w_to_s, fixed.w_to_s)
+        # The weight of the sweep mechanism
+        self.assertGreater(variable.w_to, fixed.w_to)
+
+    def test_best_angle_of_each_segment(self):
+        angles = [20.0, 35.0, 50.0, 60.0]
+        aircraft, mission = build(dict(DESIGN, sweep=angles, k_aero=linspace(0.3, 0.7, 3)[:, None]))
+        aircraft._synthesize(mission)
+        wing_loadings = linspace(20, 200, 50)
+
+        for segment in mission.segments[1:]:
+            scheduled = segment.thrust_to_weight_required(aircraft, wing_loadings, 0.9)
+            picked = aircraft._segment_sweep
+            each = []
+            for angle in angles:
+                aircraft.sweep = angle
+                each.append(segment.thrust_to_weight_required(aircraft, wing_loadings, 0.9))
+            aircraft.sweep = None
+            assert_allclose(scheduled, minimum.reduce(each), err_msg=segment.kind)
+            assert_allclose(picked, array(angles)[argmin(each, 0)], err_msg=segment.kind)
+
+        # Takeoff at the least sweep, the transonic cruise swept back
+        schedule = aircraft.sweep_schedule
+        self.assertIsNone(schedule[0])
+        assert_array_equal(schedule[1], 20.0)
+        self.assertTrue((schedule[3] > 20.0).all())
+
+    def test_schedules_of_aircraft_sharing_a_mission(self):
+        design = dict(DESIGN, sweep=[20.0, 35.0, 50.0, 60.0])
+        aircraft, mission = build(design)
+        aircraft._synthesize(mission)
+        schedule = aircraft.sweep_schedule
+
+        # The segments keep no sweep of their own, another design flying them
+        # leaves the schedule of the first as it was
+        other = build(dict(design, k_aero=0.7))[0]
+        other._synthesize(mission)
+        self.assertFalse(any(hasattr(segment, 'sweep') for segment in mission.segments))
+        again = build(design)[0]
+        again._synthesize(mission)
+        self.assertEqual([angle is None for angle in again.sweep_schedule], [angle is None for angle in schedule])
+        for expected, angle in zip(schedule, again.sweep_schedule):
+            if expected is not None:
+                assert_allclose(angle, expected)
+
+    def test_angles_evaluated_together(self):
+        calls = []
+        for angles in ([20.0, 40.0], list(linspace(15, 60, 16))):
+            aircraft, mission = build(dict(DESIGN, sweep=angles))
+            thrust_lapse = aircraft.thrust_lapse
+
+            def counted(*args, **kwargs):
+                calls[-1] += 1
+                return thrust_lapse(*args, **kwargs)
+
+            aircraft.thrust_lapse = counted
+            calls.append(0)
+            aircraft._synthesize(mission)
+        self.assertEqual(calls[0], calls[1])
@@ -0,0 +1,82 @@
+from unittest import TestCase, skipUnless
+
+from numpy import linspace
+from numpy.testing import assert_allclose
+
+from assist.derivatives import sizing_outputs
+
+try:
+    import openmdao.api as om
+    from assist.openmdao_wrapper import Fighter
+except ImportError:
+    om = None
+
+
+VEC_SIZE = 3
+
+AVIONICS_WEIGHT = 0.1
+
+# Outputs of the component, and the sizing outputs they are
+OUTPUTS = dict(togw='w_to', wing_area='wing_area', thrust='max_thrust', acq_cost='acquisition_cost')
+
+
+def problem():
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem('fighter', Fighter(vec_size=VEC_SIZE), promotes=['*'])
+    prob.setup()
+    prob.set_val('k_aero', linspace(0.4, 0.6, VEC_SIZE))
+    prob.set_val('cruise_speed', linspace(650.0, 750.0, VEC_SIZE), units='kn')
+    prob.set_val('sweep', linspace(25.0, 35.0, VEC_SIZE), units='deg')
+    # Inside the bounds of the cost model, for differences on either side
+    prob.set_val('materials_complexity', 1.5)
+    prob.set_val('avionics_weight_fraction', AVIONICS_WEIGHT)
+    # Away from zero, for relative steps
+    prob.set_val('airfield_altitude', 500.0, units='ft')
+    return prob
+
+
+@skipUnless(om, "OpenMDAO is not installed")
+class FighterTest(TestCase):
+    def test_compute_matches_sizing_outputs(self):
+        prob = problem()
+        prob.run_model()
+
+        fighter = prob.model.fighter
+        design = dict((name, prob.get_val(name)[:, None]) for name, _, _, _ in Fighter._INPUTS)
+        expected = sizing_outputs(fighter.build, design, avionics_weight=AVIONICS_WEIGHT)
+        for name, output in OUTPUTS.items():
+            scale = 1e6 if name == 'acq_cost' else 1.0
+            self.assertEqual(prob.get_val(name).shape, (VEC_SIZE,))
+            assert_allclose(prob.get_val(name) * scale, expected[output][:, 0], rtol=1e-10, err_msg=name)
+
+    def test_partials_match_finite_differences(self):
+        prob = problem()
+        prob.run_model()
+
+        data = prob.check_partials(out_stream=None, method='fd', form='central', step=1e-4, step_calc='rel')
+        for (output, name), partials in data['fighter'].items():
+            fd = partials['J_fd']
+            assert_allclose(partials['J_fwd'], fd, rtol=1e-5, atol=1e-8 * max(abs(fd).max(), 1.0),
+                            err_msg="d{}/d{}".format(output, name))
+
+    def test_designs_share_the_model_objects(self):
+        prob = problem()
+        prob.run_model()
+        first = dict((name, prob.get_val(name).copy()) for name in OUTPUTS)
+
+        # Another batch, and its partials, leave nothing behind for the first
+        prob.set_val('k_aero', linspace(0.3, 0.65, VEC_SIZE))
+        prob.set_val('cruise_speed', linspace(600.0, 780.0, VEC_SIZE), units='kn')
+        prob.run_model()
+        prob.compute_totals(of=['togw'], wrt=['k_aero', 'sweep'])
+        self.assertFalse((prob.get_val('togw') == first['togw']).any())
+
+        prob.set_val('k_aero', linspace(0.4, 0.6, VEC_SIZE))
+        prob.set_val('cruise_speed', linspace(650.0, 750.0, VEC_SIZE), units='kn')
+        prob.run_model()
+        for name in OUTPUTS:
+            assert_allclose(prob.get_val(name), first[name], rtol=0, err_msg=name)
+
+        fighter = prob.model.fighter
+        design = dict((name, prob.get_val(name)[:, None]) for name, _, _, _ in Fighter._INPUTS)
+        self.assertIs(fighter.build(design)[0], fighter.build(dict(design, k_aero=design['k_aero'] / 2))[0])
@@ -0,0 +1,83 @@
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from numpy import array, hstack, isfinite, sqrt
+from numpy.testing import assert_allclose, assert_array_equal
+
+from assist.derivatives import sizing_outputs
+from assist.optimize import NSGA2, crowding_distance, non_dominated_sort
+from assist.test.fixtures import build, DESIGN
+
+
+ZDT1_BOUNDS = dict(('x{}'.format(i), (0.0, 1.0)) for i in range(6))
+
+
+def zdt1(design):
+    x = hstack([design[name] for name in sorted(design)])
+    g = 1 + 9 * x[:, 1:].mean(1, keepdims=True)
+    return dict(f1=x[:, :1], f2=g * (1 - sqrt(x[:, :1] / g)))
+
+
+def evaluate_sizing(design):
+    return sizing_outputs(build, dict(DESIGN, **design), quantity=200)
+
+
+class SortingTest(TestCase):
+    def test_fronts(self):
+        objectives = array([[1.0, 4.0], [2.0, 2.0], [4.0, 1.0], [3.0, 3.0], [4.0, 4.0], [0.5, 5.0]])
+        rank = non_dominated_sort(objectives)
+        assert_array_equal(rank, [0, 0, 0, 1, 2, 0])
+
+        rank = non_dominated_sort(objectives, violation=array([0, 0, 0, 0, 0.5, 0.1]))
+        assert_array_equal(rank, [0, 0, 0, 1, 3, 2])
+
+        distance = crowding_distance(objectives, non_dominated_sort(objectives))
+        self.assertEqual(distance[5], float('inf'))
+        assert_allclose(distance[1], (4.0 - 1.0) / 3.5 + (4.0 - 1.0) / 4.0)
+
+
+class NSGA2Test(TestCase):
+    def setUp(self):
+        self.directory = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.directory)
+
+    def test_converges_to_pareto_front(self):
+        optimizer = NSGA2(zdt1, ZDT1_BOUNDS, ('f1', 'f2'), population=60, seed=1)
+        front = optimizer.run(generations=80)
+
+        self.assertEqual(len(optimizer.history), 80)
+        self.assertGreater(len(front['f1']), 30)
+        assert_allclose(front['f2'], 1 - sqrt(front['f1']), atol=0.05)
+        self.assertLess(optimizer.history[-1].distance, optimizer.history[1].distance)
+        self.assertGreater(optimizer.history[-1].hypervolume, optimizer.history[0].hypervolume)
+
+    def test_resumes_from_checkpoint(self):
+        path = join(self.directory, 'nsga2.npz')
+        uninterrupted = NSGA2(zdt1, ZDT1_BOUNDS, ('f1', 'f2'), population=20, seed=3).run(generations=8)
+
+        NSGA2(zdt1, ZDT1_BOUNDS, ('f1', 'f2'), population=20, seed=3, checkpoint=path).run(generations=5)
+        resumed = NSGA2(zdt1, ZDT1_BOUNDS, ('f1', 'f2'), population=20, checkpoint=path)
+        self.assertEqual(resumed.generation, 5)
+        front = resumed.run(generations=8)
+
+        self.assertEqual(resumed.evaluations, 8 * 20)
+        assert_allclose(front['f1'], uninterrupted['f1'])
+
+        with self.assertRaises(ValueError):
+            NSGA2(zdt1, ZDT1_BOUNDS, ('f1',), checkpoint=path)
+
+    def test_sizing_in_process_pool(self):
+        bounds = dict(k_aero=(0.2, 0.9), cruise_speed=(500.0, 900.0), sweep=(10.0, 50.0))
+        initial = dict(k_aero=[0.5], cruise_speed=[700.0], sweep=[30.0])
+        with NSGA2(evaluate_sizing, bounds, ('w_to', 'acquisition_cost', 'fuel_fraction'),
+                   constraints=dict(t_to_w=(None, 1.5)), population=16, seed=0, processes=2) as optimizer:
+            front = optimizer.run(generations=3, initial=initial)
+
+        self.assertTrue(isfinite(front['w_to']).all())
+        self.assertTrue((front['t_to_w'] <= 1.5).all())
+        self.assertEqual(optimizer.evaluations, 48)
+        self.assertTrue(all(record.evaluations_per_second > 0 for record in optimizer.history))
@@ -0,0 +1,21 @@
+import sys
+from subprocess import check_output
+from unittest import TestCase
+
+import assist
+
+
+class PackageTest(TestCase):
+    def test_import_is_lazy(self):
+        imported = check_output([sys.executable, '-c', "import sys, assist; "
+                                 "print(sorted(name for name in ('numpy', 'scipy', 'assist.aircraft', 'openmdao') "
+                                 "if name in sys.modules))"])
+        self.assertEqual(imported.strip(), b'[]')
+
+    def test_public_api_resolves(self):
+        from assist.aircraft import Aircraft
+        self.assertIs(assist.Aircraft, Aircraft)
+        for name in assist.__all__:
+            self.assertTrue(hasattr(assist, name), name)
+        with self.assertRaises(AttributeError):
+            assist.Missing
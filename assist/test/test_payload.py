@@ -0,0 +1,62 @@
+from unittest import TestCase
+
+from numpy import array
+from numpy.testing import assert_allclose
+
+from assist.components import Loadout, Payload
+from assist.mission import Segment
+from assist.test.fixtures import build, DESIGN
+
+
+class LoadoutTest(TestCase):
+    def setUp(self):
+        self.crew = Payload('Crew', weight=200)
+        self.amraams = Payload('AMRAAMs', weight=332, quantity=4, cd_r=0.005, expendable=True)
+        self.aim9s = Payload('AIM-9Xs', weight=188, quantity=2, cd_r=0.002, expendable=True)
+
+    def test_totals_honor_quantity(self):
+        loadout = Loadout([self.crew, self.amraams, self.aim9s])
+        self.assertEqual(loadout.weight, 200 + 4 * 332 + 2 * 188)
+        assert_allclose(loadout.cd_r, 4 * 0.005 + 2 * 0.002)
+        self.assertEqual(Loadout().weight, 0.0)
+
+        released = loadout.without([self.amraams, 'AIM-9Xs'])
+        self.assertEqual(released.stores, (self.crew,))
+        self.assertIs(loadout.without(['AIM-9Xs', self.amraams]), released)
+
+        # Names built on the fly, freed after each release
+        for name in ('AIM-9Xs', 'Crew', 'AMRAAMs'):
+            left = loadout.without([''.join(list(name))])
+            self.assertEqual([store.name for store in left], [store.name for store in loadout if store.name != name])
+
+    def test_batch_of_loadouts(self):
+        amraams = Payload('AMRAAMs', weight=332, quantity=array([[0], [2], [4], [6]]), cd_r=0.005)
+        loadout = Loadout([self.crew, amraams, self.aim9s])
+        assert_allclose(loadout.weight, 200 + 332 * array([[0], [2], [4], [6]]) + 376)
+        assert_allclose(loadout.cd_r, 0.005 * array([[0], [2], [4], [6]]) + 0.004)
+
+    def test_segment_releases(self):
+        segments = [Segment('takeoff', altitude=0, speed=150),
+                    Segment('cruise', altitude=30000, speed=700, range=150, release=['AIM-9Xs']),
+                    Segment('dash', altitude=30000, speed=1492, range=100, release=[self.amraams]),
+                    Segment('land', altitude=0, speed=150)]
+        loadouts = Loadout([self.crew, self.amraams, self.aim9s]).schedule(segments)
+        self.assertEqual([loadout.weight for loadout in loadouts], [1904, 1528, 200, 200])
+
+        aircraft, mission = build(DESIGN)
+        aircraft.stores = [self.crew, self.amraams, self.aim9s]
+        cd_r = []
+        for segment in segments:
+            segment._bind(aircraft, 1.0)
+            cd_r.append(aircraft.loadout.cd_r)
+        assert_allclose(cd_r, [0.024, 0.02, 0.0, 0.0])
+
+    def test_aircraft_is_sized_with_its_stores(self):
+        aircraft, mission = build(DESIGN)
+        payload = aircraft.payload
+        mission.segments[3].release = ['AMRAAMs']
+        aircraft._synthesize(mission)
+        self.assertEqual(aircraft.payload, payload)
+
+        aircraft.stores.append(Payload('Bombs', weight=500, quantity=2))
+        self.assertEqual(aircraft.payload, payload + 1000)
@@ -0,0 +1,159 @@
+import os
+import sys
+from shutil import rmtree
+from subprocess import PIPE, Popen
+from tempfile import mkdtemp
+from time import sleep
+from unittest import TestCase
+from unittest.mock import patch
+
+from numpy import concatenate, linspace
+from numpy.testing import assert_allclose
+
+from assist.cost import Cost
+from assist.pipeline import (Pipeline, Synthesize, Size, SizeEngine, EstimateCost, Filter, Map, Checkpoint, Sample,
+                             batched, collect, full_factorial, has_weight_margin)
+from assist.test.fixtures import build
+
+
+def evaluate(k_aero, cruise_speed):
+    aircraft, mission = build(dict(k_aero=k_aero, cruise_speed=cruise_speed))
+    aircraft._synthesize(mission)
+    aircraft._size(mission)
+    aircraft.engine.size()
+    cost = Cost(aircraft=aircraft, quantity=200).estimate_acquisition()
+    return aircraft.t_to_w, aircraft.w_to_s, aircraft.w_to, aircraft.engine.max_thrust, aircraft.engine.w, cost
+
+
+def sample(designs=400, seed=None):
+    return Sample(designs, seed=seed, batch_size=8, k_aero=(0.2, 0.9), cruise_speed=(500, 900))
+
+
+class Clock(object):
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+        return {}
+
+
+def checkpointed_sweep(path):
+    # Prints the index of each batch evaluated, until killed
+    checkpoint = Checkpoint(path, interval=0)
+    for batch in Pipeline(sample(), Synthesize(build), Size(build), checkpoint=checkpoint):
+        print(batch.index[0], flush=True)
+        sleep(0.02)
+
+
+class PipelineTest(TestCase):
+    LEVELS = dict(k_aero=linspace(0.2, 0.9, 4), cruise_speed=linspace(500, 900, 5))
+
+    def stages(self):
+        return (Synthesize(build), Size(build), SizeEngine(build), EstimateCost(build, quantity=200))
+
+    def test_matches_scalar_evaluations(self):
+        results = collect(Pipeline(full_factorial(batch_size=6, **self.LEVELS), *self.stages()))
+
+        self.assertEqual(list(results['index']), list(range(20)))
+        for i in (0, 7, 19):
+            expected = evaluate(results['k_aero'][i], results['cruise_speed'][i])
+            actual = [results[name][i] for name in ('t_to_w', 'w_to_s', 'w_to', 'engine_max_thrust', 'engine_weight',
+                                                    'acquisition_cost')]
+            assert_allclose(actual, expected)
+
+    def test_batches_are_bounded(self):
+        sizes = [len(batch) for batch in full_factorial(batch_size=6, **self.LEVELS)]
+        self.assertEqual(sizes, [6, 6, 6, 2])
+
+        rows = ({'k_aero': 0.5, 'cruise_speed': speed} for speed in range(500, 900, 10))
+        self.assertEqual(max(len(batch) for batch in batched(rows, batch_size=16)), 16)
+
+    def test_filter_skips_designs(self):
+        threshold = 0.6
+        stages = self.stages()
+        results = collect(Pipeline(full_factorial(batch_size=6, **self.LEVELS),
+                                   stages[0],
+                                   Filter(lambda batch: batch['k_aero'] > threshold),
+                                   *stages[1:]))
+
+        self.assertTrue((results['k_aero'] > threshold).all())
+        self.assertEqual(len(results['index']), 10)
+        i = 3
+        expected = evaluate(results['k_aero'][i], results['cruise_speed'][i])
+        assert_allclose(results['w_to'][i], expected[2])
+
+        results = collect(Pipeline(full_factorial(batch_size=6, **self.LEVELS),
+                                   Synthesize(build), Size(build), Filter(has_weight_margin)))
+        self.assertTrue((results['weight_margin'] > 0).all())
+
+    def test_prefetch(self):
+        expected = collect(Pipeline(full_factorial(batch_size=3, **self.LEVELS), Synthesize(build)))
+        actual = collect(Pipeline(full_factorial(batch_size=3, **self.LEVELS), Synthesize(build), prefetch=2))
+        assert_allclose(actual['t_to_w'], expected['t_to_w'])
+
+        def failing():
+            yield next(iter(full_factorial(batch_size=3, **self.LEVELS)))
+            raise RuntimeError("source failed")
+
+        with self.assertRaises(RuntimeError):
+            collect(Pipeline(failing(), Synthesize(build), prefetch=2))
+
+
+class CheckpointTest(TestCase):
+    def setUp(self):
+        self.directory = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.directory)
+
+    def test_resumes_after_kill(self):
+        path = os.path.join(self.directory, 'sweep')
+        environment = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+        process = Popen([sys.executable, '-c', 'from assist.test.test_pipeline import checkpointed_sweep; '
+                         'checkpointed_sweep({!r})'.format(path)], stdout=PIPE, env=environment)
+        for _ in range(5):
+            process.stdout.readline()
+        process.kill()
+        process.wait()
+        process.stdout.close()
+
+        checkpoint = Checkpoint(path).load()
+        self.assertFalse(checkpoint.done)
+        self.assertTrue(0 < checkpoint.designs < 400)
+        saved = checkpoint.results()['index']
+
+        evaluated = []
+        record = Map(lambda batch: evaluated.append(batch.index) or {})
+        resumed = collect(Pipeline(sample(), Synthesize(build), Size(build), record, checkpoint=Checkpoint(path)))
+        evaluated = concatenate(evaluated)
+        self.assertEqual(len(set(evaluated) & set(saved)), 0)
+        self.assertTrue(Checkpoint(path).load().done)
+
+        expected = collect(Pipeline(sample(seed=checkpoint.seed), Synthesize(build), Size(build)))
+        self.assertEqual(list(resumed['index']), list(range(400)))
+        for name in ('k_aero', 'cruise_speed', 't_to_w', 'w_to'):
+            assert_allclose(resumed[name], expected[name])
+
+    def test_saves_are_spaced_by_their_cost(self):
+        clock = Clock()
+        write = Checkpoint._write
+
+        def slow_write(checkpoint, *args):
+            clock.now += 0.05
+            return write(checkpoint, *args)
+
+        # Batches of a second each, and saves of 0.1 s, at most 0.5% of the time
+        checkpoint = Checkpoint(os.path.join(self.directory, 'sweep'), interval=5.0, overhead=0.005, fsync=False)
+        with patch('assist.pipeline.perf_counter', clock), patch.object(Checkpoint, '_write', slow_write):
+            results = collect(Pipeline(full_factorial(batch_size=1, k_aero=linspace(0.2, 0.9, 100)),
+                                       Map(lambda batch: clock.advance(1.0)), checkpoint=checkpoint))
+
+        # The first save after the interval, the others 20 s apart, then the last
+        self.assertEqual(checkpoint.saves, 1 + (100 - 5) // 20 + 1)
+        assert_allclose(checkpoint.seconds, 0.1 * checkpoint.saves)
+        self.assertEqual(len(results['index']), 100)
+        self.assertEqual(len(checkpoint.results()['index']), 100)
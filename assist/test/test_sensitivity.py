@@ -0,0 +1,56 @@
+from unittest import TestCase
+
+from numpy.testing import assert_allclose
+
+from assist.derivatives import sizing_partials
+from assist.sensitivity import elasticities
+from assist.test.fixtures import build, DESIGN
+
+
+INPUTS = ['k_aero', 'tofl', 'cruise_speed', 'cruise_altitude', 'k_to', 'w_e_a', 'w_e_b', 'w_e_c1']
+
+
+class Counted(object):
+    def __init__(self, build):
+        self.build = build
+        self.calls = 0
+
+    def __call__(self, design):
+        self.calls += 1
+        return self.build(design)
+
+
+class ElasticityTest(TestCase):
+    def test_matches_partials_in_one_evaluation(self):
+        counted = Counted(build)
+        report = elasticities(counted, DESIGN, inputs=INPUTS, quantity=200)
+        # k_to is read from the aircraft once, then every perturbation is sized together
+        self.assertEqual(counted.calls, 2)
+
+        # The takeoff field length moves the design point, in steps the partials do not see
+        values, partials = sizing_partials(build, DESIGN, wrt=['k_aero', 'cruise_speed'], quantity=200)
+        for output in ('w_to', 'acquisition_cost'):
+            assert_allclose(report.values[output], values[output])
+            for name in ('k_aero', 'cruise_speed'):
+                assert_allclose(report.derivative[output, name], partials[output, name], rtol=0.02)
+                assert_allclose(report.elasticity[output, name],
+                                partials[output, name] * DESIGN[name] / values[output], rtol=0.02)
+
+        ranked = report.ranked('w_to')
+        self.assertEqual(ranked[0].input, 'w_e_b')
+        magnitudes = [abs(row.elasticity) for row in ranked]
+        self.assertEqual(magnitudes, sorted(magnitudes, reverse=True))
+        self.assertIn('w_e_b', report.table(['w_to']))
+
+    def test_process_pool_matches_serial(self):
+        serial = elasticities(build, DESIGN, inputs=INPUTS, quantity=200)
+        pooled = elasticities(build, DESIGN, inputs=INPUTS, processes=2, quantity=200)
+        for key, value in serial.elasticity.items():
+            assert_allclose(pooled.elasticity[key], value)
+
+    def test_requires_nonzero_nominal(self):
+        # The drag band is given by k_aero unless set
+        with self.assertRaises(ValueError):
+            elasticities(build, DESIGN, inputs=['cd_0_band'])
+        with self.assertRaises(ValueError):
+            elasticities(build, DESIGN, inputs=['range'])
@@ -0,0 +1,104 @@
+import asyncio
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from numpy import linspace
+from numpy.testing import assert_allclose
+
+from assist.derivatives import sizing_outputs
+from assist.service import Client, SizingService, serve
+from assist.test.fixtures import build, DESIGN
+
+
+K_AERO = linspace(0.3, 0.7, 20)
+
+
+class SizingServiceTest(TestCase):
+    def setUp(self):
+        self.directory = mkdtemp()
+        self.path = join(self.directory, 'assist.sock')
+
+    def tearDown(self):
+        rmtree(self.directory)
+
+    def run_client(self, service, requests):
+        async def run():
+            server = await serve(service, path=self.path)
+            client = await Client.connect(path=self.path)
+            try:
+                return await requests(client)
+            finally:
+                await client.close()
+                server.close()
+                await server.wait_closed()
+                await service.close()
+
+        return asyncio.run(run())
+
+    def test_requests_are_batched(self):
+        service = SizingService(build, window=0.05, quantity=200)
+
+        async def requests(client):
+            results = await asyncio.gather(*[client.size(dict(DESIGN, k_aero=k_aero)) for k_aero in K_AERO])
+            return results, await client.stats()
+
+        results, stats = self.run_client(service, requests)
+        expected = sizing_outputs(build, dict(DESIGN, k_aero=K_AERO[:, None]), quantity=200)
+        for i, result in enumerate(results):
+            self.assertTrue(result['feasible'])
+            for name in ('w_to', 't_to_w', 'acquisition_cost'):
+                assert_allclose(result['outputs'][name], expected[name][i, 0], err_msg=name)
+            self.assertGreaterEqual(result['latency']['total'], result['latency']['evaluation'])
+        self.assertEqual(stats['requests'], 20)
+        self.assertLess(stats['batches'], 20)
+        self.assertGreater(stats['latency']['p95'], 0)
+
+    def test_process_pool_and_errors(self):
+        service = SizingService(build, window=0.05, processes=2, pool_batch=8, quantity=200)
+
+        async def requests(client):
+            results = await asyncio.gather(*[client.size(dict(DESIGN, k_aero=k_aero)) for k_aero in K_AERO])
+            # Out of the bounds of the cost model
+            with self.assertRaises(RuntimeError):
+                await client.size(dict(DESIGN, stealth=2.0))
+            return results
+
+        results = self.run_client(service, requests)
+        self.assertGreater(service.pooled, 0)
+        assert_allclose([result['outputs']['w_to'] for result in results],
+                        sizing_outputs(build, dict(DESIGN, k_aero=K_AERO[:, None]), quantity=200)['w_to'][:, 0])
+
+    def test_malformed_designs_fail_alone(self):
+        service = SizingService(build, window=0.05, quantity=200)
+
+        async def requests(client):
+            good = [client.size(dict(DESIGN, k_aero=k_aero)) for k_aero in K_AERO[:4]]
+            bad = [client.size(dict(DESIGN, k_aero='abc')), client.size(5), client.size(dict(DESIGN, k_aero=[1, 2]))]
+            results = await asyncio.gather(*(good + bad), return_exceptions=True)
+            # The service still answers those sent after
+            return results, await client.size(dict(DESIGN, k_aero=K_AERO[4]))
+
+        results, last = self.run_client(service, requests)
+        expected = sizing_outputs(build, dict(DESIGN, k_aero=K_AERO[:5, None]), quantity=200)['w_to'][:, 0]
+        assert_allclose([result['outputs']['w_to'] for result in results[:4] + [last]], expected)
+        for result in results[4:]:
+            self.assertIsInstance(result, RuntimeError)
+            self.assertIn('TypeError', str(result))
+
+    def test_failing_design_fails_alone(self):
+        service = SizingService(build, window=0.05, quantity=200)
+
+        async def requests(client):
+            good = [client.size(dict(DESIGN, k_aero=k_aero)) for k_aero in K_AERO[:6]]
+            # Out of the bounds of the cost model, batched with the others
+            bad = client.size(dict(DESIGN, stealth=2.0))
+            return await asyncio.gather(*(good[:3] + [bad] + good[3:]), return_exceptions=True)
+
+        results = self.run_client(service, requests)
+        self.assertIsInstance(results[3], RuntimeError)
+        self.assertIn('stealth', str(results[3]))
+        results = results[:3] + results[4:]
+        expected = sizing_outputs(build, dict(DESIGN, k_aero=K_AERO[:6, None]), quantity=200)['w_to'][:, 0]
+        assert_allclose([result['outputs']['w_to'] for result in results], expected)
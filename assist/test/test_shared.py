@@ -0,0 +1,133 @@
+import os
+import pickle
+import sys
+from multiprocessing import Pool, Process, Queue
+from subprocess import PIPE, run
+from unittest import TestCase, skipUnless
+
+from numpy import arange, array
+from numpy.testing import assert_allclose
+
+from assist.shared import SharedTables, install, mission_columns, missions_from_columns, model_tables
+from assist.test.fixtures import build, DESIGN, ferry
+
+
+SMAPS = '/proc/self/smaps_rollup'
+
+# Bytes of the table the workers read
+TABLE_BYTES = 32 * 2 ** 20
+
+
+def private_bytes():
+    # Memory of this process not shared with any other
+    with open(SMAPS) as f:
+        fields = dict(line.split(':', 1) for line in f if ':' in line)
+    return sum(int(fields[name].split()[0]) * 1024 for name in ('Private_Clean', 'Private_Dirty'))
+
+
+def read_table(pickled, copy, queue):
+    tables = pickle.loads(pickled)
+    before = private_bytes()
+    table = tables['table'].copy() if copy else tables['table']
+    total = float(table.sum())
+    queue.put((private_bytes() - before, total, tables['table'].flags.writeable))
+
+
+def attached_sum(tables):
+    return float(tables['a'].sum())
+
+
+def sized_w_to(tables):
+    aircraft, mission = build(DESIGN)
+    mission = missions_from_columns(tables)[0]
+    aircraft._synthesize(mission)
+    aircraft._size(mission)
+    return float(aircraft.w_to), type(aircraft._CD_0['jet_fighter']['mach']).__name__
+
+
+class SharedTablesTest(TestCase):
+    @skipUnless(os.path.exists(SMAPS), "needs /proc/self/smaps_rollup")
+    def test_worker_memory_is_flat(self):
+        with SharedTables(dict(table=arange(TABLE_BYTES // 8, dtype=float))) as tables:
+            pickled = pickle.dumps(tables)
+            self.assertLess(len(pickled), 1000)
+
+            def run(workers, copy=False):
+                queue = Queue()
+                processes = [Process(target=read_table, args=(pickled, copy, queue)) for _ in range(workers)]
+                for process in processes:
+                    process.start()
+                results = [queue.get(timeout=60) for _ in processes]
+                for process in processes:
+                    process.join()
+                return results
+
+            # A worker copying the table holds it privately, those viewing it do not
+            growth, total, _ = run(1, copy=True)[0]
+            self.assertGreater(growth, 0.9 * TABLE_BYTES)
+            for workers in (1, 2, 4):
+                results = run(workers)
+                for growth, total, writeable in results:
+                    self.assertLess(growth, 0.05 * TABLE_BYTES)
+                    self.assertEqual(total, tables['table'].sum())
+                    self.assertFalse(writeable)
+
+    def test_closed_tables_are_unlinked(self):
+        from multiprocessing.shared_memory import SharedMemory
+
+        tables = SharedTables(dict(a=[1.0, 2.0], kind=array(['cruise', 'land'])))
+        name = tables.name
+        self.assertEqual(list(tables['kind']), ['cruise', 'land'])
+        with self.assertRaises(ValueError):
+            tables['a'][0] = 3.0
+        tables.close()
+        tables.close()
+        self.assertTrue(tables.closed)
+        with self.assertRaises(FileNotFoundError):
+            SharedMemory(name=name)
+
+        # Unlinked when garbage collected too
+        tables = SharedTables(dict(a=[1.0]))
+        name = tables.name
+        del tables
+        with self.assertRaises(FileNotFoundError):
+            SharedMemory(name=name)
+
+    def test_workers_size_with_shared_model(self):
+        aircraft, mission = build(DESIGN)
+        aircraft._synthesize(mission)
+        aircraft._size(mission)
+
+        columns = mission_columns([mission, mission])
+        self.assertEqual(list(columns['mission']), [0] * 6 + [1] * 6)
+        restored = missions_from_columns(columns)
+        self.assertEqual([segment.kind for segment in restored[1].segments],
+                         [segment.kind for segment in mission.segments])
+        with self.assertRaises(ValueError):
+            mission_columns(ferry())
+
+        with SharedTables(model_tables(mission_columns(mission))) as tables:
+            pool = Pool(2, initializer=install, initargs=(tables,))
+            try:
+                results = pool.map(sized_w_to, [tables] * 4)
+            finally:
+                pool.close()
+                pool.join()
+        for w_to, table_type in results:
+            assert_allclose(w_to, aircraft.w_to)
+            self.assertEqual(table_type, 'ndarray')
+
+    def test_resource_tracker_is_quiet(self):
+        # The resource tracker, which the workers share, prints a traceback
+        # when it is told to forget a block it does not know of
+        script = ('from multiprocessing import Pool\n'
+                  'from assist.shared import SharedTables\n'
+                  'from assist.test.test_shared import attached_sum\n'
+                  'with SharedTables(dict(a=[1.0, 2.0])) as tables:\n'
+                  '    with Pool(2) as pool:\n'
+                  '        print(pool.map(attached_sum, [tables] * 4))\n')
+        environment = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+        process = run([sys.executable, '-c', script], stdout=PIPE, stderr=PIPE, env=environment, timeout=60)
+        self.assertEqual(process.returncode, 0, process.stderr)
+        self.assertEqual(process.stdout.split(), [b'[3.0,', b'3.0,', b'3.0,', b'3.0]'])
+        self.assertEqual(process.stderr, b'')
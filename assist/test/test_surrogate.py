@@ -0,0 +1,145 @@
+from os.path import join
+from shutil import rmtree
+from tempfile import mkdtemp
+from unittest import TestCase
+
+from numpy import array, exp, linspace, sin
+from numpy.testing import assert_allclose
+
+from assist.derivatives import sizing_partials
+from assist.surrogate import GaussianProcess, ResponseSurface, SurrogateCache
+from assist.test.fixtures import build, DESIGN
+
+
+BOUNDS = dict(x=(0.0, 2.0), y=(-1.0, 1.0))
+
+
+class Counted(object):
+    def __init__(self, function):
+        self.function = function
+        self.calls = 0
+        self.designs = 0
+
+    def __call__(self, design):
+        self.calls += 1
+        self.designs += len(design['x'])
+        return self.function(design)
+
+
+def quadratic(design):
+    x, y = design['x'], design['y']
+    return dict(f=3 + x - 2 * y + 0.5 * x * y + y * y, g=1 + x * x)
+
+
+def smooth(design):
+    x, y = design['x'], design['y']
+    return dict(f=2 + sin(2 * x) * exp(-y), g=5 + x * y)
+
+
+class Refits(GaussianProcess):
+    fits = 0
+
+    def fit(self, x, y):
+        self.fits += 1
+        return GaussianProcess.fit(self, x, y)
+
+
+class SurrogateCacheTest(TestCase):
+    def setUp(self):
+        self.directory = mkdtemp()
+
+    def tearDown(self):
+        rmtree(self.directory)
+
+    def test_response_surface_answers_from_surrogate(self):
+        function = Counted(quadratic)
+        cache = SurrogateCache(function, inputs='xy', outputs='fg', model=ResponseSurface(degree=2), threshold=1e-6)
+        cache.sample(BOUNDS, 12, seed=0)
+        calls = function.calls
+
+        design = dict(x=linspace(0.1, 1.9, 7)[:, None], y=0.3)
+        results = cache(design)
+
+        self.assertEqual(function.calls, calls)
+        self.assertEqual((cache.hits, cache.misses), (7, 0))
+        self.assertEqual(results['f'].shape, (7, 1))
+        assert_allclose(results['f'], quadratic(design)['f'])
+
+    def test_falls_back_and_learns(self):
+        function = Counted(smooth)
+        cache = SurrogateCache(function, inputs='xy', outputs='fg', model=GaussianProcess(), threshold=1e-3)
+        cache.sample(BOUNDS, 6, seed=0)
+
+        design = dict(x=array([0.25, 1.6]), y=array([0.5, -0.7]))
+        results = cache(design)
+        assert_allclose(results['f'], smooth(design)['f'])
+        self.assertEqual(cache.misses, 2)
+        self.assertEqual(len(cache.x), 8)
+
+        cache.sample(BOUNDS, 40, seed=1)
+        cache.threshold = 0.05
+        design = dict(x=array([0.7, 1.1, 1.3]), y=array([0.1, -0.2, 0.4]))
+        designs = function.designs
+        results = cache(design)
+        self.assertEqual(function.designs, designs + cache.misses - 2)
+        self.assertGreater(cache.hits, 0)
+        assert_allclose(results['f'], smooth(design)['f'], rtol=0.05)
+
+    def test_training_set_persists(self):
+        path = join(self.directory, 'training.npz')
+        cache = SurrogateCache(quadratic, inputs='xy', outputs='fg', model=ResponseSurface(), path=path)
+        cache.sample(BOUNDS, 10, seed=0)
+
+        restored = SurrogateCache(quadratic, inputs='xy', outputs='fg', model=ResponseSurface(), path=path)
+        assert_allclose(restored.x, cache.x)
+        self.assertTrue(restored.fitted)
+
+        with self.assertRaises(ValueError):
+            SurrogateCache(quadratic, inputs='xy', outputs='f', path=path)
+
+    def test_refits_every_few_samples(self):
+        path = join(self.directory, 'training.npz')
+        model = Refits()
+        cache = SurrogateCache(smooth, inputs='xy', outputs='fg', model=model, path=path, refit_every=4)
+        cache.sample(BOUNDS, 20, seed=0)
+        self.assertEqual(model.fits, 1)
+
+        # The samples learned in between condition the surrogate, without fitting it again or saving them
+        x = array([[0.3, 0.2], [1.1, -0.4], [1.7, 0.8], [0.9, 0.1], [0.5, -0.9]])
+        y = cache.evaluate(x)
+        for i in range(3):
+            cache.learn(x[i:i + 1], y[i:i + 1])
+            mean, _ = model.predict(x[:i + 1])
+            assert_allclose(mean, y[:i + 1], rtol=1e-3)
+        self.assertEqual((model.fits, cache.pending), (1, 3))
+        self.assertEqual(len(SurrogateCache(smooth, inputs='xy', outputs='fg', model=ResponseSurface(),
+                                            path=path).x), 20)
+
+        # As conditioned on them in one factorization
+        conditioned = [output[1:] for output in model._outputs]
+        model._outputs = [(length_scales,) + model._factor(model._u, model._v[:, j], length_scales)
+                          for j, (length_scales, _, _, _) in enumerate(model._outputs)]
+        for extended, factored in zip(conditioned, model._outputs):
+            assert_allclose(extended[0], factored[1], atol=1e-9)
+            assert_allclose(extended[1], factored[2], rtol=1e-6)
+
+        cache.learn(x[3:], y[3:])
+        self.assertEqual((model.fits, cache.pending), (2, 0))
+        self.assertEqual(len(SurrogateCache(smooth, inputs='xy', outputs='fg', model=ResponseSurface(),
+                                            path=path).x), 25)
+
+    def test_sizing_surrogate(self):
+        def evaluate(design):
+            values, _ = sizing_partials(build, dict(DESIGN, **design), wrt=[], quantity=200)
+            return values
+
+        cache = SurrogateCache(evaluate, inputs=('k_aero', 'cruise_speed'), outputs=('w_to', 'acquisition_cost'),
+                               threshold=0.01)
+        cache.sample(dict(k_aero=(0.3, 0.8), cruise_speed=(600, 800)), 20, seed=0)
+
+        design = dict(k_aero=0.55, cruise_speed=720.0)
+        results = cache(design)
+        expected = evaluate(design)
+        self.assertEqual(cache.hits, 1)
+        assert_allclose(results['w_to'], expected['w_to'], rtol=0.01)
+        assert_allclose(results['acquisition_cost'], expected['acquisition_cost'], rtol=0.01)
@@ -0,0 +1,62 @@
+import sys
+from subprocess import check_output
+from unittest import TestCase, skipUnless
+
+from numpy import linspace
+from numpy.testing import assert_allclose
+
+from assist.derivatives import sizing_outputs
+from assist.test.fixtures import build, DESIGN
+from assist.trade import trade_surface
+
+try:
+    import matplotlib
+    matplotlib.use('Agg')
+except ImportError:
+    matplotlib = None
+
+
+class TradeSurfaceTest(TestCase):
+    def test_matches_sizing_of_each_design(self):
+        surface = trade_surface(build, dict(k_aero=linspace(0.3, 0.8, 4), cruise_speed=linspace(500, 900, 3)),
+                                design=DESIGN, batch_size=5, quantity=200)
+
+        self.assertEqual(surface.shape, (4, 3))
+        self.assertEqual(surface['w_to'].shape, (4, 3))
+        self.assertEqual(surface.active.shape, (6, 4, 3))
+        for i, j in ((0, 0), (2, 1), (3, 2)):
+            design = dict(DESIGN, k_aero=surface.coords['k_aero'][i], cruise_speed=surface.coords['cruise_speed'][j])
+            expected = sizing_outputs(build, design, quantity=200)
+            for name in ('w_to', 't_to_w', 'acquisition_cost'):
+                assert_allclose(surface[name][i, j], expected[name], err_msg=name)
+
+        # At the design point the required thrust loading is that of the binding constraint
+        self.assertTrue(surface.feasible.all())
+        self.assertTrue((surface.active_constraint() >= 0).all())
+        assert_allclose(surface.required.max(0), surface['t_to_w'])
+
+    def test_design_point_axes(self):
+        surface = trade_surface(build, dict(w_to_s=linspace(40, 200, 5), t_to_w=linspace(0.6, 1.6, 6)),
+                                design=DESIGN, quantity=200)
+
+        assert_allclose(surface['w_to_s'], surface.coords['w_to_s'][:, None].repeat(6, 1))
+        assert_allclose(surface['t_to_w'], surface.coords['t_to_w'][None, :].repeat(5, 0))
+
+        # Designs with less thrust than a segment requires violate its constraint
+        violated = (surface.required > surface['t_to_w'][None] * 1.001).any(0)
+        self.assertTrue(violated.any())
+        self.assertFalse((surface.feasible & violated).any())
+        self.assertTrue((surface.active_constraint()[violated] >= 0).all())
+
+    def test_matplotlib_is_not_imported(self):
+        imported = check_output([sys.executable, '-c', "import sys, assist.trade; print('matplotlib' in sys.modules)"])
+        self.assertEqual(imported.strip(), b'False')
+
+    @skipUnless(matplotlib, "matplotlib is not installed")
+    def test_carpet_plot(self):
+        surface = trade_surface(build, dict(w_to_s=linspace(40, 200, 3), k_aero=linspace(0.3, 0.8, 3),
+                                            t_to_w=[1.0, 1.2]), design=DESIGN, quantity=200)
+        ax = surface.carpet('k_aero', 'w_to_s', 'w_to', t_to_w=1)
+        self.assertEqual(len(ax.lines), 7)
+        with self.assertRaises(ValueError):
+            surface.carpet('k_aero', 'w_to_s')
@@ -0,0 +1,92 @@
+from unittest import TestCase
+
+from numpy import array, concatenate, cumprod, diff, linspace, ravel
+from numpy.testing import assert_allclose
+
+from assist.test.fixtures import build, DESIGN, ferry
+from assist.trajectory import TimeHistory, FIELDS
+
+
+def sized(design=DESIGN):
+    aircraft, mission = build(design)
+    aircraft._synthesize(mission)
+    aircraft._size(mission)
+    return aircraft, mission
+
+
+class TimeHistoryTest(TestCase):
+    def test_segment_weight_fractions(self):
+        aircraft, mission = sized()
+        expected = aircraft.w_to * cumprod(aircraft.weight_fractions)
+
+        states = list(TimeHistory(aircraft, mission))
+        self.assertEqual(len(states), len(mission.segments) + 1)
+        self.assertEqual([state.segment for state in states], [0, 0, 1, 2, 3, 4, 5])
+        # The segments of historical weight fraction burn it, the others burn what the engines do
+        assert_allclose([state.weight for state in states[1:4]], expected[:3])
+        assert_allclose(states[-1].fuel_burned, aircraft.w_to - states[-1].weight)
+
+        # However fine the steps, the historical segments end at the same weights
+        history = TimeHistory(aircraft, mission, dt=1 / 360)
+        chunks = list(history.chunks(100))
+        self.assertTrue(all(len(chunk['time']) == 100 for chunk in chunks[:-1]))
+        fine = dict((name, concatenate([chunk[name] for chunk in chunks])) for name in FIELDS)
+        self.assertEqual(len(fine['time']), len(history))
+        ends = [fine['weight'][fine['segment'] == i][-1] for i in range(3)]
+        assert_allclose(ends, expected[:3])
+        self.assertTrue((diff(fine['time']) >= 0).all())
+
+        # The fuel flow integrates to the fuel burned in the cruise
+        cruise = fine['segment'] == 3
+        flow, time = fine['fuel_flow'][cruise], fine['time'][cruise]
+        burned = (0.5 * (flow[1:] + flow[:-1]) * diff(time)).sum()
+        assert_allclose(burned, fine['weight'][cruise][0] - fine['weight'][cruise][-1], rtol=1e-3)
+        self.assertTrue((fine['thrust_required'][cruise] > 0).all())
+        assert_allclose(fine['mach'][cruise], mission.segments[3].mach)
+
+    def test_fuel_flow_of_the_engines(self):
+        aircraft, mission = sized()
+        histories = [next(TimeHistory(aircraft, mission, dt=dt).chunks(10000)) for dt in (None, 1 / 360, 1 / 720)]
+        coarse, half, fine = histories
+
+        # The engines burn fuel at their TSFC times the thrust required
+        flown = (fine['segment'] == 3) | (fine['segment'] == 4)
+        assert_allclose(fine['fuel_flow'][flown], fine['tsfc'][flown] * fine['thrust_required'][flown])
+
+        # A single step through the cruise is its weight fraction at the fuel burned at its start, the
+        # same as in the first of the fine steps
+        cruise = fine['segment'] == 3
+        fraction = [history['weight'][history['segment'] == 3][-1] / history['weight'][history['segment'] == 2][-1]
+                    for history in histories]
+        assert_allclose(fraction[0], (fine['weight'][cruise][0] / fine['weight'][fine['segment'] == 2][-1]) ** cruise.sum())
+
+        # which the integration through the cruise agrees with, the closer the finer
+        self.assertNotEqual(fraction[0], fraction[2])
+        assert_allclose(fraction[2], fraction[0], rtol=0.01)
+        self.assertLess(abs(fraction[1] - fraction[2]), abs(fraction[0] - fraction[2]) / 10)
+
+    def test_batch_of_designs(self):
+        aircraft, mission = sized(dict(DESIGN, cruise_speed=linspace(650, 750, 3)[:, None]))
+        chunk = next(TimeHistory(aircraft, mission, dt=0.05).chunks(10000))
+        self.assertEqual(chunk['weight'].shape[1:], (3,))
+
+        scalar, mission = sized(dict(DESIGN, cruise_speed=750.0))
+        expected = next(TimeHistory(scalar, mission, dt=0.05).chunks(10000))
+        # The cruise of the fastest design is the shortest, it is over when the others still fly it, in
+        # steps as many as theirs, finer than its own
+        assert_allclose(chunk['time'][-1, 2], expected['time'][-1])
+        final = [chunk[name][-1, 2] for name in ('weight', 'fuel_burned')]
+        assert_allclose(final, [expected[name][-1] for name in ('weight', 'fuel_burned')], rtol=1e-3)
+
+    def test_missions_sized_together(self):
+        aircraft, mission = build(DESIGN)
+        missions = [mission, ferry()]
+        aircraft._synthesize(missions)
+        aircraft._size(missions)
+        for result in aircraft._missions:
+            weights = array([state.weight for state in TimeHistory(aircraft, result['mission'])])
+            historical = array([segment._weight_fraction is not None for segment in result['mission'].segments])
+            expected = array([ravel(f)[0] for f in result['weight_fractions']])
+            assert_allclose(weights[0], aircraft.w_to)
+            assert_allclose((weights[1:] / weights[:-1])[historical], expected[historical])
+            self.assertTrue((weights[1:] < weights[:-1]).all())
@@ -0,0 +1,77 @@
+from unittest import TestCase
+
+from numpy import percentile, pi, sin, stack
+from numpy.random import default_rng
+from numpy.testing import assert_allclose
+from scipy import stats
+from scipy.stats import qmc
+
+from assist.test.fixtures import build, DESIGN
+from assist.uncertainty import UncertaintyAnalysis, _Statistics
+
+
+INPUTS = dict(k_aero=stats.uniform(0.45, 0.1),
+              k_to=stats.norm(1.1, 0.02),
+              cd_0_band=stats.uniform(0, 1),
+              w_e_b=stats.norm(1.0, 0.05))
+
+
+def ishigami(x):
+    return sin(x[:, 0]) + 7 * sin(x[:, 1]) ** 2 + 0.1 * x[:, 2] ** 4 * sin(x[:, 0])
+
+
+class StatisticsTest(TestCase):
+    def test_streaming_moments_and_percentiles(self):
+        rng = default_rng(0)
+        values = rng.lognormal(size=50000)
+        statistics = _Statistics(())
+        for start in range(0, len(values), 3000):
+            statistics.update(values[start:start + 3000])
+
+        summary = statistics.summary((1, 50, 95))
+        self.assertEqual(summary.samples, len(values))
+        assert_allclose(summary.mean, values.mean())
+        assert_allclose(summary.std, values.std(ddof=1))
+        for p in (1, 50, 95):
+            assert_allclose(summary.percentiles[p], percentile(values, p), rtol=0.01)
+
+    def test_sobol_indices_of_ishigami(self):
+        u = qmc.Sobol(d=6, seed=0).random(2 ** 14)
+        x = -pi + 2 * pi * u
+        a, b = x[:, :3], x[:, 3:]
+        statistics = _Statistics(('x1', 'x2', 'x3'))
+        for start in range(0, len(x), 4096):
+            rows = slice(start, start + 4096)
+            ab = []
+            for i in range(3):
+                mixed = a[rows].copy()
+                mixed[:, i] = b[rows, i]
+                ab.append(ishigami(mixed))
+            statistics.update(ishigami(a[rows]), ishigami(b[rows]), stack(ab))
+
+        first, total = statistics.indices()
+        # Analytical values for a=7, b=0.1
+        assert_allclose([first['x1'], first['x2'], first['x3']], [0.3139, 0.4424, 0.0], atol=0.02)
+        assert_allclose([total['x1'], total['x2'], total['x3']], [0.5576, 0.4424, 0.2437], atol=0.02)
+
+
+class UncertaintyAnalysisTest(TestCase):
+    def test_sizing_distributions(self):
+        analysis = UncertaintyAnalysis(build, DESIGN, INPUTS, sensitivity=True, batch_size=128, seed=0,
+                                       quantity=200)
+        results = analysis.run(samples=256)
+
+        w_to = results['w_to']
+        self.assertEqual(w_to.samples + w_to.infeasible, 256)
+        self.assertLess(w_to.percentiles[5], w_to.percentiles[50])
+        self.assertLess(w_to.percentiles[50], w_to.percentiles[95])
+        self.assertEqual(max(w_to.total_order, key=w_to.total_order.get), 'w_e_b')
+        self.assertEqual([record.samples for record in analysis.history], [128, 256])
+
+    def test_process_pool_matches_serial(self):
+        serial = UncertaintyAnalysis(build, DESIGN, INPUTS, batch_size=64, seed=1, quantity=200).run(256)
+        pooled = UncertaintyAnalysis(build, DESIGN, INPUTS, batch_size=64, seed=1, processes=2,
+                                     quantity=200).run(256)
+        for name in ('w_to', 'acquisition_cost'):
+            assert_allclose(pooled[name].mean, serial[name].mean)
+            assert_allclose(pooled[name].percentiles[95], serial[name].percentiles[95])
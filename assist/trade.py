@@ -0,0 +1,263 @@
+"""
+Trade surfaces over grids of design inputs.
+
+:func:`trade_surface` sizes every design of a grid of inputs, in vectorized
+batches, instead of building and sizing one aircraft per cell::
+
+    surface = trade_surface(build, dict(k_aero=linspace(0.2, 0.9, 8),
+                                        cruise_speed=linspace(500, 900, 9)),
+                            quantity=200)
+    surface['w_to']          # (8, 9) array
+    surface.active           # binding constraint of each segment, (segments, 8, 9)
+    surface.carpet('k_aero', 'cruise_speed', 'w_to')
+
+where ``build(design)`` returns an ``(aircraft, mission)`` pair, as for the
+stages of :mod:`assist.pipeline`, taking its inputs from ``design``.
+
+Two axes set the design point instead of being passed to ``build``:
+``w_to_s`` sizes each design at the given wing loading rather than the one
+needing the least thrust, and ``t_to_w`` at the given thrust loading rather
+than the least needed, so the classic carpet of takeoff weight against wing
+and thrust loading, with the constraints it violates, is::
+
+    surface = trade_surface(build, dict(w_to_s=linspace(40, 200, 9),
+                                        t_to_w=linspace(0.6, 1.4, 9)))
+
+matplotlib is only imported to draw a carpet plot.
+
+"""
+from __future__ import division
+
+from numpy import (arange, array, asarray, broadcast_arrays, broadcast_to, clip, empty, full, isfinite, meshgrid,
+                   nan, searchsorted, stack, take_along_axis, where)
+
+from assist.cost import Cost
+from assist.derivatives import SIZING_OUTPUTS
+from assist.pipeline import DEFAULT_BATCH_SIZE
+
+
+__all__ = ('TradeSurface', 'trade_surface', 'DESIGN_POINT_AXES')
+
+
+# Axes that set the design point of each design
+DESIGN_POINT_AXES = ('w_to_s', 't_to_w')
+
+# Relative tolerance within which a constraint is binding
+_ACTIVE_TOLERANCE = 1e-6
+
+
+class TradeSurface(object):
+    """
+    Outputs of a grid of designs, labeled by the inputs they vary.
+
+    :param dims: names of the axes of the grid, in order
+    :param coords: values of each axis
+    :param data: outputs, each an array shaped like the grid
+    :param segments: kinds of the mission segments
+    :param required: thrust loading each segment requires at the design point,
+                     shaped (segments,) + grid
+    :param active: whether each segment's constraint is binding, or violated,
+                   at the design point, shaped like ``required``
+    :param feasible: whether each design meets the mission, is sized, and
+                     violates no constraint at its design point
+
+    """
+
+    def __init__(self, dims, coords, data, segments, required, active, feasible):
+        self.dims = tuple(dims)
+        self.coords = coords
+        self.data = data
+        self.segments = tuple(segments)
+        self.required = required
+        self.active = active
+        self.feasible = feasible
+
+    def __repr__(self):
+        return "<TradeSurface {} ({})>".format(
+            ' x '.join('{} {}'.format(len(self.coords[dim]), dim) for dim in self.dims), ', '.join(sorted(self.data)))
+
+    def __getitem__(self, name):
+        return self.data[name]
+
+    def __contains__(self, name):
+        return name in self.data
+
+    @property
+    def shape(self):
+        return tuple(len(self.coords[dim]) for dim in self.dims)
+
+    def active_constraint(self):
+        """
+        Index of the segment whose constraint sets, or is furthest from, the
+        thrust loading of each design, -1 where none is binding or violated.
+
+        """
+
+        key = where(self.active, self.required, -1.0)
+        return where(self.active.any(0), key.argmax(0), -1)
+
+    def to_xarray(self):
+        """
+        The outputs and constraint masks as an :class:`xarray.Dataset`, xarray
+        must be installed.
+
+        """
+
+        import xarray
+
+        variables = dict((name, (self.dims, values)) for name, values in self.data.items())
+        variables.update(required=(('segment',) + self.dims, self.required),
+                         active=(('segment',) + self.dims, self.active),
+                         feasible=(self.dims, self.feasible))
+        coords = dict(self.coords, segment=list(self.segments))
+        return xarray.Dataset(variables, coords=coords)
+
+    def carpet(self, x, y, output='w_to', ax=None, skew=0.5, **fixed):
+        """
+        Draws a carpet plot of ``output`` against the ``x`` and ``y`` axes, with
+        the infeasible designs crossed out.  The other axes, if any, are fixed
+        at the indices given as keyword arguments.
+
+        :param skew: offset of consecutive lines of constant ``y``, as a
+                     fraction of the spacing of the lines of constant ``x``
+        :returns: the axes drawn on
+
+        """
+
+        from matplotlib import pyplot
+
+        if ax is None:
+            ax = pyplot.figure().add_subplot(111)
+
+        index = []
+        for dim in self.dims:
+            if dim in (x, y):
+                index.append(slice(None))
+            elif dim in fixed:
+                index.append(fixed[dim])
+            else:
+                raise ValueError("Axis '{}' must be fixed to an index to plot against '{}' and '{}'".format(dim, x, y))
+        index = tuple(index)
+        z, feasible = self.data[output][index], self.feasible[index]
+        if self.dims.index(x) > self.dims.index(y):
+            z, feasible = z.T, feasible.T
+
+        xs, ys = self.coords[x], self.coords[y]
+        i, j = meshgrid(arange(len(xs)), arange(len(ys)), indexing='ij')
+        cheater = i + skew * j
+
+        for row in range(len(xs)):
+            ax.plot(cheater[row], z[row], color='C0')
+            ax.annotate('{} = {:g}'.format(x, xs[row]), (cheater[row, -1], z[row, -1]), fontsize='small')
+        for column in range(len(ys)):
+            ax.plot(cheater[:, column], z[:, column], color='C1')
+            ax.annotate('{} = {:g}'.format(y, ys[column]), (cheater[0, column], z[0, column]), fontsize='small',
+                        ha='right')
+        ax.plot(cheater[~feasible], z[~feasible], 'x', color='C3', label='infeasible')
+        ax.set_xticks([])
+        ax.set_ylabel(output)
+        return ax
+
+
+def trade_surface(build, axes, design=None, batch_size=DEFAULT_BATCH_SIZE, **kwargs):
+    """
+    Sizes every design of the grid spanned by ``axes`` and estimates its cost.
+
+    :param build: returns the ``(aircraft, mission)`` pair of a design
+    :param axes: the values of each input varied, the grid's axes are in the
+                 order given; :data:`DESIGN_POINT_AXES` set the design point
+    :param design: values of the inputs of ``build`` that are not varied
+    :param batch_size: designs sized per batch
+
+    The other keyword arguments are passed on to :class:`~assist.cost.Cost`,
+    unless an axis has the same name.
+
+    :rtype: :class:`TradeSurface`
+
+    """
+
+    dims = tuple(axes)
+    coords = dict((dim, asarray(axes[dim])) for dim in dims)
+    grids = meshgrid(*[coords[dim] for dim in dims], indexing='ij')
+    shape = grids[0].shape
+    columns = dict((dim, grid.ravel()) for dim, grid in zip(dims, grids))
+    size = grids[0].size
+
+    data = dict((name, empty(size)) for name in SIZING_OUTPUTS)
+    feasible = empty(size, dtype=bool)
+    required = None
+    segments = ()
+    for start in range(0, size, batch_size):
+        rows = slice(start, start + batch_size)
+        batch = dict(design or {})
+        batch.update((dim, column[rows, None]) for dim, column in columns.items())
+        count = len(columns[dims[0]][rows])
+
+        outputs, batch_required, batch_feasible, segments = _evaluate(build, batch, count, kwargs)
+        for name in SIZING_OUTPUTS:
+            data[name][rows] = outputs[name]
+        feasible[rows] = batch_feasible
+        if required is None:
+            required = empty((len(segments), size))
+        required[:, rows] = batch_required
+
+    data = dict((name, values.reshape(shape)) for name, values in data.items())
+    required = required.reshape((len(segments),) + shape)
+    t_to_w = data['t_to_w'][None]
+    active = isfinite(required) & (required >= t_to_w * (1 - _ACTIVE_TOLERANCE))
+    feasible = feasible.reshape(shape) & ~(active & (required > t_to_w * (1 + _ACTIVE_TOLERANCE))).any(0)
+    return TradeSurface(dims, coords, data, segments, required, active, feasible)
+
+
+def _evaluate(build, design, count, kwargs):
+    aircraft, mission = build(design)
+    if 't_to_w' in design:
+        # The cruise weight fractions depend on the thrust loading flown
+        aircraft.t_to_w = design['t_to_w']
+    aircraft._synthesize(mission)
+
+    segments = tuple(segment.kind for segment in mission.segments)
+    thrust_loadings = aircraft._synthesis['t_to_w']
+    if thrust_loadings:
+        curves = stack(broadcast_arrays(*[asarray(curve, dtype=float) for curve in thrust_loadings]))
+        curves = broadcast_to(curves, (len(segments), count, curves.shape[-1]))
+        wing_loadings = aircraft._synthesis['w_to_s']
+        w_to_s = broadcast_to(design['w_to_s'] if 'w_to_s' in design else aircraft.w_to_s, (count, 1))
+        required = _at(curves, wing_loadings, w_to_s)
+    else:
+        required = full((len(segments), count), nan)
+
+    if 'w_to_s' in design:
+        aircraft.w_to_s = where(aircraft.feasibility.feasible, design['w_to_s'], nan)
+        aircraft.t_to_w = required.max(0)[:, None]
+    if 't_to_w' in design:
+        aircraft.t_to_w = where(aircraft.feasibility.feasible, design['t_to_w'], nan)
+
+    aircraft._size(mission)
+    aircraft.engine.size()
+    cost_kwargs = dict(kwargs)
+    cost_kwargs.update((name, design[name]) for name in Cost._DEFAULTS if name in design)
+    outputs = dict(t_to_w=aircraft.t_to_w,
+                   w_to_s=aircraft.w_to_s,
+                   fuel_fraction=aircraft.fuel_fraction,
+                   w_to=aircraft.w_to,
+                   w_empty=aircraft.w_empty,
+                   wing_area=aircraft.wing.area,
+                   max_thrust=aircraft.engine.max_thrust * aircraft.num_engines,
+                   acquisition_cost=Cost(aircraft=aircraft, **cost_kwargs).estimate_acquisition())
+    outputs = dict((name, broadcast_to(value, (count, 1))[:, 0]) for name, value in outputs.items())
+    feasible = broadcast_to(aircraft.feasibility.feasible, (count, 1))[:, 0] & isfinite(outputs['w_to'])
+    return outputs, required, feasible, segments
+
+
+def _at(curves, wing_loadings, w_to_s):
+    # Linear interpolation of each design's curves, on the shared wing loading
+    # grid, at its own wing loading; NaN outside the grid
+    grid = array(wing_loadings, dtype=float)
+    index = clip(searchsorted(grid, w_to_s[:, 0]), 1, len(grid) - 1)
+    x0, x1 = grid[index - 1], grid[index]
+    f0 = take_along_axis(curves, broadcast_to((index - 1)[None, :, None], curves.shape[:2] + (1,)), -1)[..., 0]
+    f1 = take_along_axis(curves, broadcast_to(index[None, :, None], curves.shape[:2] + (1,)), -1)[..., 0]
+    values = f0 + (f1 - f0) * (w_to_s[:, 0] - x0) / (x1 - x0)
+    inside = (w_to_s[:, 0] >= grid[0]) & (w_to_s[:, 0] <= grid[-1])
+    return where(inside, values, nan)
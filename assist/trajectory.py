@@ -0,0 +1,244 @@
+"""
+Time histories of the weight, fuel flow, thrust and Mach number of a sized
+aircraft along its mission.
+
+A :class:`TimeHistory` steps through the segments of the mission an aircraft
+was synthesized and sized for, and generates the state at the end of each
+step lazily, one record at a time, or in chunks of records as arrays, so that
+finely resolved missions are streamed, e.g., to a file or a plot, without
+being held in memory::
+
+    aircraft._synthesize(mission)
+    aircraft._size(mission)
+    history = TimeHistory(aircraft, mission, dt=1 / 60)    # a step a minute at most
+
+    for state in history:
+        state.time, state.weight, state.fuel_flow
+
+    for chunk in history.chunks(4096):
+        numpy.savetxt(f, numpy.column_stack([chunk[name] for name in FIELDS]))
+
+Each segment is flown at its speed and altitude.  The engines burn fuel at
+their TSFC times the thrust required, and the weight is integrated through
+the segment, dW/dt = -TSFC T(W), in exponential Euler steps: a single step
+per segment is the segment's weight fraction exp(-TSFC T/W t), with the
+thrust required at its start, and finer steps follow the weight as it
+drops.  The segments whose weight fraction is historical, e.g., takeoff, burn
+it at a constant rate relative to the weight, in the times of
+:data:`DURATIONS`.
+
+"""
+from __future__ import division
+from collections import namedtuple
+from math import ceil
+
+from numpy import arange, asarray, broadcast_to, concatenate, empty, errstate, exp, full, log, nan, where
+
+from assist.environment import G_0
+
+
+__all__ = ('TimeHistory', 'State', 'FIELDS', 'DURATIONS')
+
+
+FIELDS = ('time', 'segment', 'altitude', 'mach', 'weight', 'fuel_burned', 'fuel_flow', 'thrust_required',
+          'thrust_available', 'tsfc')
+
+State = namedtuple('State', FIELDS)
+State.__doc__ = """
+The state of the aircraft at a time of its mission.
+
+:param time: time since the start of the mission (hr)
+:param segment: index of the segment flown, the same for every design
+:param altitude: altitude (ft)
+:param weight: weight (lbm)
+:param fuel_burned: fuel burned since the start of the mission (lbm)
+:param fuel_flow: fuel burned per hour (lbm/hr) by the engines at the thrust
+                  required, or at the rate of a historical weight fraction
+:param thrust_required: thrust required to fly the segment's maneuver (lbf)
+:param thrust_available: largest thrust of the engines (lbf)
+:param tsfc: thrust specific fuel consumption (1/hr)
+
+For a batch of aircraft, the values are arrays, a value per design.
+
+"""
+
+# Times of the segments whose weight fraction does not depend on time (hr),
+# matched to the kinds of segments as in Segment
+DURATIONS = dict(warmup=0.25, taxi=0.1, takeoff=0.01, climb=0.1, descend=0.1, land=0.01)
+
+DEFAULT_CHUNK_SIZE = 1024
+
+
+class TimeHistory(object):
+    """
+    The states of a synthesized and sized aircraft along a mission.
+
+    :param aircraft: the sized aircraft, or a batch of them
+    :param mission: the mission flown, one of those the aircraft was
+                    synthesized for, that of the last synthesis if None
+    :param dt: longest step (hr), or None to take ``steps`` steps per segment
+    :param steps: steps per segment, if ``dt`` is None
+    :param durations: times of the segments whose weight fraction does not
+                      depend on time (hr), see :data:`DURATIONS`
+
+    """
+
+    def __init__(self, aircraft, mission=None, dt=None, steps=1, durations=None):
+        self.aircraft = aircraft
+        self.mission = aircraft.mission if mission is None else mission
+        self.dt = dt
+        self.steps = steps
+        self.durations = DURATIONS if durations is None else durations
+        self.weight_fractions = _weight_fractions(aircraft, self.mission)
+
+    def __repr__(self):
+        return "<TimeHistory {} segments, {} steps>".format(len(self.mission.segments), len(self))
+
+    def __len__(self):
+        # The initial state, then that at the end of each step
+        return 1 + sum(self._steps(self._duration(segment)) for segment in self.mission.segments)
+
+    def __iter__(self):
+        for chunk in self.chunks():
+            for i in range(len(chunk['time'])):
+                yield State(*[chunk[name][i] for name in FIELDS])
+
+    def chunks(self, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Generates the states in chunks of ``chunk_size`` states, the last one
+        excepted, each a dictionary of the :data:`FIELDS` with the states on
+        the first axis, followed by the designs' for a batch of aircraft.
+
+        """
+
+        pending, count = [], 0
+        for block in self._blocks(chunk_size):
+            pending.append(block)
+            count += len(block['time'])
+            while count >= chunk_size:
+                chunk = dict((name, concatenate([part[name] for part in pending])) for name in FIELDS)
+                yield dict((name, values[:chunk_size]) for name, values in chunk.items())
+                pending = [dict((name, values[chunk_size:]) for name, values in chunk.items())]
+                count -= chunk_size
+        if count:
+            yield dict((name, concatenate([part[name] for part in pending])) for name in FIELDS)
+
+    def _duration(self, segment):
+        if segment._weight_fraction is None:
+            return segment.time
+        for kind, duration in self.durations.items():
+            if kind in segment.kind:
+                return duration
+        return 0.0
+
+    def _steps(self, duration):
+        # Steps of a segment, those of the longest for a batch of designs
+        duration = asarray(duration, dtype=float).max()
+        if self.dt is None or duration <= 0:
+            return self.steps
+        return max(int(ceil(duration / self.dt - 1e-9)), 1)
+
+    def _blocks(self, block_size):
+        # The states, a segment's steps at most block_size at a time
+        aircraft = self.aircraft
+        designs = asarray(aircraft.w_to).size
+        shape = (designs,) if designs > 1 else ()
+        per_design = lambda value: broadcast_to(asarray(value, dtype=float).reshape(-1), (designs,)).reshape(shape)
+
+        w_to = per_design(aircraft.w_to)
+        area = w_to / per_design(aircraft.w_to_s)
+        thrust = per_design(aircraft.t_to_w) * w_to
+        loadout, sweep = aircraft.loadout, aircraft.sweep
+        schedule = getattr(aircraft, 'sweep_schedule', None) if aircraft.variable_sweep else None
+
+        time, weight = full(shape, 0.0), w_to
+        try:
+            for i, (segment, fraction) in enumerate(zip(self.mission.segments, self.weight_fractions)):
+                segment._bind(aircraft, weight / w_to)
+                aircraft.configuration = None
+                if schedule is not None and schedule[i] is not None:
+                    aircraft.sweep = schedule[i]
+                conditions = dict((name, per_design(value)) for name, value in self._conditions(segment).items())
+                conditions['q_s'] = conditions.pop('q') * area
+                conditions['thrust_available'] = conditions.pop('lapse') * thrust
+
+                if i == 0:
+                    yield self._states(i, time[None], w_to[None], full((1,) + shape, 0.0), w_to, conditions)
+
+                duration = per_design(self._duration(segment))
+                steps = self._steps(duration)
+                step = duration / steps
+                historical = segment._weight_fraction is not None
+                if historical:
+                    fraction = per_design(fraction)
+                    with errstate(divide='ignore', invalid='ignore'):
+                        rate = where(duration > 0, -log(fraction) / duration, nan)
+                current = weight
+                for start in range(0, steps, block_size):
+                    done = arange(start + 1, min(start + block_size, steps) + 1).reshape((-1,) + (1,) * len(shape))
+                    if historical:
+                        weights = weight * fraction ** (done / steps)
+                    else:
+                        weights = empty((len(done),) + shape)
+                        for k in range(len(done)):
+                            current = weights[k] = current * exp(-_fuel_rate(current, conditions) * step)
+                    flow = weights * rate if historical else None
+                    yield self._states(i, time + step * done, weights, flow, w_to, conditions)
+                    current = weights[-1]
+
+                time = time + duration
+                weight = current
+                aircraft.sweep = sweep
+        finally:
+            aircraft.loadout = loadout
+            aircraft.sweep = sweep
+
+    def _conditions(self, segment):
+        # Drag terms and engine state of a segment, flown at its speed and altitude
+        aircraft = self.aircraft
+        with errstate(divide='ignore', invalid='ignore'):
+            speed = asarray(segment.speed, dtype=float)
+            excess_power = where(speed > 0, segment.climb_rate / speed, 0.0) + segment.acceleration / G_0
+        return dict(q=segment.dynamic_pressure, cd=aircraft.cd_0 + aircraft.cd_r, k_1=aircraft.k_1, k_2=aircraft.k_2,
+                    n=segment.n, excess_power=excess_power, altitude=segment.altitude, mach=segment.mach,
+                    lapse=aircraft.thrust_lapse(segment.altitude, segment.mach),
+                    tsfc=aircraft.engine.tsfc(segment.mach, segment.altitude, segment.afterburner))
+
+    def _states(self, index, time, weights, flow, w_to, conditions):
+        # The fuel flow of the engines at the thrust required, if not given
+        required = _thrust_required(weights, conditions)
+        if flow is None:
+            flow = conditions['tsfc'] * required
+
+        shape = weights.shape
+        values = dict(time=time, segment=index, weight=weights, fuel_burned=w_to - weights, fuel_flow=flow,
+                      thrust_required=required, altitude=conditions['altitude'], mach=conditions['mach'],
+                      thrust_available=conditions['thrust_available'], tsfc=conditions['tsfc'])
+        states = dict((name, broadcast_to(values[name], shape).astype(float)) for name in FIELDS)
+        states['segment'] = full(len(weights), index)
+        return states
+
+
+def _weight_fractions(aircraft, mission):
+    # The weight fractions of the segments, as the aircraft was sized with them
+    if getattr(aircraft, 'mission', None) is mission and getattr(aircraft, 'weight_fractions', None) is not None:
+        return aircraft.weight_fractions
+    for result in getattr(aircraft, '_missions', None) or ():
+        if result['mission'] is mission and result['weight_fractions'] is not None:
+            return result['weight_fractions']
+    raise ValueError("The aircraft was not synthesized for this mission, or it cannot fly it")
+
+
+def _thrust_required(weights, conditions):
+    # Drag in the maneuver, and the thrust to climb or accelerate; none on the ground at rest
+    with errstate(divide='ignore', invalid='ignore'):
+        q_s = conditions['q_s']
+        lift = conditions['n'] * weights
+        drag = q_s * conditions['cd'] + conditions['k_1'] * lift * lift / q_s + conditions['k_2'] * lift
+        return where(q_s > 0, drag + conditions['excess_power'] * weights, 0.0)
+
+
+def _fuel_rate(weights, conditions):
+    # Fuel burned per hour relative to the weight, -dW/dt / W (1/hr)
+    with errstate(divide='ignore', invalid='ignore'):
+        return where(weights > 0, conditions['tsfc'] * _thrust_required(weights, conditions) / weights, 0.0)
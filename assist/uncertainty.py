@@ -0,0 +1,343 @@
+"""
+Monte Carlo propagation of uncertain inputs through the sizing chain.
+
+An :class:`UncertaintyAnalysis` samples the uncertain inputs of a design,
+pushes the samples through the vectorized sizing and cost code in batches,
+and accumulates streaming statistics of the outputs, so only one batch of
+samples is ever held in memory::
+
+    analysis = UncertaintyAnalysis(build, design,
+                                   inputs=dict(k_aero=stats.uniform(0.4, 0.2),
+                                               k_to=stats.norm(1.1, 0.02),
+                                               cd_0_band=stats.uniform(0, 1),
+                                               w_e_b=stats.norm(1.0, 0.05)),
+                                   sensitivity=True, quantity=200)
+    results = analysis.run(samples=2 ** 17)
+    results['w_to'].percentiles[95], results['w_to'].total_order['k_to']
+
+where ``build(design)`` returns an ``(aircraft, mission)`` pair, as for the
+stages of :mod:`assist.pipeline`.  Each input is given a distribution with a
+``ppf`` method, e.g., a frozen :mod:`scipy.stats` distribution.  The samples
+of the inputs in :data:`MODEL_INPUTS` are applied to the objects ``build``
+returns, those of any other input are passed to ``build`` in the design.
+
+Sensitivity indices are estimated with the Saltelli scheme, which evaluates
+``len(inputs) + 2`` designs per sample, see Saltelli, A., et al., "Variance
+based sensitivity analysis of model output," Computer Physics Communications,
+Vol. 181, No. 2, 2010.
+
+"""
+from __future__ import division
+from collections import namedtuple
+from functools import partial
+from multiprocessing import Pool
+
+from numpy import (argsort, bincount, broadcast_to, concatenate, cumsum, floor, interp, isfinite, minimum,
+                   ones, sqrt, stack, zeros)
+from numpy.random import default_rng
+
+from assist.derivatives import sizing_outputs
+
+
+__all__ = ('UncertaintyAnalysis', 'Summary', 'Convergence', 'MODEL_INPUTS')
+
+
+DEFAULT_BATCH_SIZE = 1024
+
+# Size of the quantile sketches, the percentiles are accurate to about 1/_SKETCH_SIZE in rank
+_SKETCH_SIZE = 4096
+
+
+def _set(name):
+    def apply(aircraft, mission, value):
+        setattr(aircraft, name, value)
+    return apply
+
+
+def _set_cl_max_band(aircraft, mission, value):
+    wing = aircraft.wing
+    wing.cl_max_band = value
+    wing._reset()
+    # The aircraft keeps the CL_max of the configuration the wing was built in
+    configuration, wing.configuration = wing.configuration, aircraft.configuration
+    aircraft.cl_max = wing.cl_max
+    wing.configuration = configuration
+
+
+def _scale_empty_weight_coefficient(index):
+    def apply(aircraft, mission, value):
+        coefficients = list(aircraft._W_E_TO_W_TO_COEFFICIENTS[aircraft.type])
+        coefficients[index] = coefficients[index] * value
+        aircraft._W_E_TO_W_TO_COEFFICIENTS = dict(aircraft._W_E_TO_W_TO_COEFFICIENTS)
+        aircraft._W_E_TO_W_TO_COEFFICIENTS[aircraft.type] = tuple(coefficients)
+    return apply
+
+
+# Uncertain inputs of the model that are not inputs of ``build``, each a
+# function that applies a sample to the aircraft and mission
+MODEL_INPUTS = dict(k_to=_set('k_to'),
+                    k_td=_set('k_td'),
+                    cd_0_band=_set('cd_0_band'),
+                    k_1_band=_set('k_1_band'),
+                    cl_max_band=_set_cl_max_band)
+# Factors on the coefficients of the empty weight regression, a, b, c1, ..., c5
+MODEL_INPUTS.update(('w_e_' + name, _scale_empty_weight_coefficient(i))
+                    for i, name in enumerate(('a', 'b', 'c1', 'c2', 'c3', 'c4', 'c5')))
+
+
+Summary = namedtuple('Summary', ('samples', 'infeasible', 'mean', 'std', 'standard_error', 'percentiles',
+                                 'first_order', 'total_order'))
+Summary.__doc__ = """
+Statistics of an output.
+
+:param samples: number of samples with a finite value
+:param infeasible: number of samples without one, e.g., that did not close
+:param standard_error: standard error of the mean
+:param percentiles: the percentiles, keyed by percent
+:param first_order: first-order Sobol index of each input, if estimated
+:param total_order: total-order Sobol index of each input, if estimated
+
+"""
+
+Convergence = namedtuple('Convergence', ('samples', 'mean', 'standard_error', 'first_order', 'total_order'))
+Convergence.__doc__ = """
+Running estimates of the statistics of each output after a batch, each a
+dictionary keyed by output.
+
+"""
+
+
+class _Perturbed(object):
+    # Builds the objects and applies the samples of the model inputs to them
+    def __init__(self, build, names):
+        self.build = build
+        self.names = names
+
+    def __call__(self, design):
+        aircraft, mission = self.build(design)
+        for name in self.names:
+            MODEL_INPUTS[name](aircraft, mission, design[name])
+        return aircraft, mission
+
+
+class _Moments(object):
+    # Count, mean and sum of squared deviations, merged batch by batch
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values):
+        n = len(values)
+        if n == 0:
+            return
+        mean = values.mean()
+        m2 = ((values - mean) ** 2).sum()
+        delta = mean - self.mean
+        total = self.n + n
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+
+    @property
+    def variance(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else float('nan')
+
+
+class _Sketch(object):
+    # Values compressed into equal-weight bins, to estimate quantiles
+    def __init__(self, size=_SKETCH_SIZE):
+        self.size = size
+        self.values = zeros(0)
+        self.weights = zeros(0)
+
+    def update(self, values):
+        values = concatenate((self.values, values))
+        weights = concatenate((self.weights, ones(len(values) - len(self.weights))))
+        order = argsort(values, kind='stable')
+        values, weights = values[order], weights[order]
+        if len(values) > self.size:
+            total = weights.sum()
+            bins = minimum(floor((cumsum(weights) - 0.5 * weights) / total * self.size), self.size - 1).astype(int)
+            sums = bincount(bins, weights, self.size)
+            keep = sums > 0
+            values = (bincount(bins, weights * values, self.size)[keep]) / sums[keep]
+            weights = sums[keep]
+        self.values, self.weights = values, weights
+
+    def quantile(self, q):
+        if len(self.values) == 0:
+            return float('nan')
+        ranks = (cumsum(self.weights) - 0.5 * self.weights) / self.weights.sum()
+        return float(interp(q, ranks, self.values))
+
+
+class _Statistics(object):
+    # Streaming statistics of one output
+    def __init__(self, inputs):
+        self.moments = _Moments()
+        self.sketch = _Sketch()
+        self.infeasible = 0
+        self.inputs = inputs
+        self.pooled = _Moments()
+        self.first = zeros(len(inputs))
+        self.total = zeros(len(inputs))
+        self.pairs = 0
+
+    def update(self, a, b=None, ab=None):
+        finite = isfinite(a)
+        self.infeasible += int((~finite).sum())
+        self.moments.update(a[finite])
+        self.sketch.update(a[finite])
+        if b is not None:
+            # Only the samples where every evaluation is finite enter the indices
+            finite &= isfinite(b) & isfinite(ab).all(0)
+            a, b, ab = a[finite], b[finite], ab[:, finite]
+            self.pooled.update(concatenate((a, b)))
+            self.first += (b * (ab - a)).sum(1)
+            self.total += ((a - ab) ** 2).sum(1)
+            self.pairs += len(a)
+
+    def indices(self):
+        if self.pairs == 0:
+            return None, None
+        variance = self.pooled.variance
+        first = self.first / self.pairs / variance
+        total = 0.5 * self.total / self.pairs / variance
+        return (dict((name, float(value)) for name, value in zip(self.inputs, first)),
+                dict((name, float(value)) for name, value in zip(self.inputs, total)))
+
+    def summary(self, percentiles):
+        n = self.moments.n
+        std = sqrt(self.moments.variance)
+        first, total = self.indices()
+        return Summary(n, self.infeasible, float(self.moments.mean), float(std),
+                       float(std / sqrt(n)) if n else float('nan'),
+                       dict((p, self.sketch.quantile(p / 100)) for p in percentiles), first, total)
+
+
+class UncertaintyAnalysis(object):
+    """
+    Distributions of the sizing and cost outputs of a design with uncertain inputs.
+
+    :param build: returns the ``(aircraft, mission)`` pair of a design, must be
+                  picklable to use ``processes``
+    :param design: the nominal design, a dictionary of scalars
+    :param inputs: the distribution of each uncertain input, see :data:`MODEL_INPUTS`
+    :param outputs: names of the :data:`~assist.derivatives.SIZING_OUTPUTS` to analyze
+    :param method: 'sobol' for a scrambled Sobol sequence, 'random' for
+                   pseudo-random samples
+    :param sensitivity: whether to estimate Sobol sensitivity indices
+    :param percentiles: the percentiles to estimate, in percent
+    :param batch_size: samples evaluated per batch
+    :param processes: number of worker processes the batches are spread
+                      across, 0 to evaluate them in this process
+    :param seed: seed of the sampling
+
+    The other keyword arguments are passed on to :class:`~assist.cost.Cost`.
+
+    """
+
+    def __init__(self, build, design, inputs, outputs=('w_to', 'acquisition_cost'), method='sobol',
+                 sensitivity=False, percentiles=(5, 50, 95), batch_size=DEFAULT_BATCH_SIZE, processes=0,
+                 seed=None, **kwargs):
+        if method not in ('sobol', 'random'):
+            raise ValueError("Sampling method '{}' is not one of 'sobol' or 'random'".format(method))
+        self.names = tuple(sorted(inputs))
+        self.distributions = [inputs[name] for name in self.names]
+        self.design = dict(design)
+        self.outputs = tuple(outputs)
+        self.method = method
+        self.sensitivity = sensitivity
+        self.percentiles = tuple(percentiles)
+        self.batch_size = batch_size
+        self.processes = processes
+        self.seed = seed
+        self.history = []
+
+        model_inputs = tuple(name for name in self.names if name in MODEL_INPUTS)
+        self.evaluate = partial(sizing_outputs, _Perturbed(build, model_inputs), **kwargs)
+
+    def __repr__(self):
+        return "<UncertaintyAnalysis {} inputs, {} outputs>".format(len(self.names), len(self.outputs))
+
+    def run(self, samples):
+        """
+        Propagates ``samples`` samples of the inputs, keeping only streaming
+        statistics of the outputs.
+
+        :returns: a :class:`Summary` of each output
+        :rtype: dict
+
+        """
+
+        self.statistics = dict((name, _Statistics(self.names)) for name in self.outputs)
+        self.history = []
+        self._samples = 0
+        counts = [min(self.batch_size, samples - start) for start in range(0, samples, self.batch_size)]
+        batches = self._batches(counts)
+
+        if self.processes > 1:
+            pool = Pool(self.processes)
+            try:
+                for count, results in zip(counts, pool.imap(self.evaluate, batches)):
+                    self._update(count, results)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            for count, batch in zip(counts, batches):
+                self._update(count, self.evaluate(batch))
+
+        return dict((name, statistics.summary(self.percentiles)) for name, statistics in self.statistics.items())
+
+    @property
+    def _evaluations(self):
+        # Designs evaluated per sample
+        return len(self.names) + 2 if self.sensitivity else 1
+
+    def _batches(self, counts):
+        # With sensitivity, the A and B matrices are the two halves of each sample
+        copies = 2 if self.sensitivity else 1
+        if self.method == 'sobol':
+            # Imported here, so workers that only evaluate samples never load scipy.stats
+            from scipy.stats import qmc
+            draw = qmc.Sobol(d=len(self.names) * copies, seed=self.seed).random
+        else:
+            rng = default_rng(self.seed)
+            draw = lambda n: rng.random((n, len(self.names) * copies))
+
+        for count in counts:
+            u = draw(count)
+            x = stack([distribution.ppf(u[:, j]) for j, distribution in enumerate(self.distributions * copies)], 1)
+            a = x[:, :len(self.names)]
+            rows = [a]
+            if self.sensitivity:
+                b = x[:, len(self.names):]
+                rows.append(b)
+                for i in range(len(self.names)):
+                    ab = a.copy()
+                    ab[:, i] = b[:, i]
+                    rows.append(ab)
+            values = concatenate(rows)
+            design = dict(self.design)
+            design.update((name, values[:, j:j + 1]) for j, name in enumerate(self.names))
+            yield design
+
+    def _update(self, count, results):
+        columns = dict((name, broadcast_to(results[name], (count * self._evaluations, 1))[:, 0])
+                       for name in self.outputs)
+        for name, column in columns.items():
+            blocks = column.reshape(self._evaluations, count)
+            if self.sensitivity:
+                self.statistics[name].update(blocks[0], blocks[1], blocks[2:])
+            else:
+                self.statistics[name].update(blocks[0])
+
+        self._samples += count
+        summaries = dict((name, statistics.summary(())) for name, statistics in self.statistics.items())
+        self.history.append(Convergence(self._samples,
+                                        dict((name, summary.mean) for name, summary in summaries.items()),
+                                        dict((name, summary.standard_error) for name, summary in summaries.items()),
+                                        dict((name, summary.first_order) for name, summary in summaries.items()),
+                                        dict((name, summary.total_order) for name, summary in summaries.items())))
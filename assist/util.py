@@ -1,3 +1,85 @@
+from numpy import any, arange, asarray, atleast_1d, broadcast_arrays, broadcast_to, clip, expand_dims, isfinite, nan, searchsorted, take_along_axis, where
+
+
 def verify_value(name, value, min_value=None, max_value=None, units='unitless'):
-    if value is not None and ((min_value is not None and value < min_value) or (max_value is not None and value > max_value)):
+    if value is None or (min_value is None and max_value is None):
+        return
+    if isinstance(value, (list, tuple)):
+        value = asarray(value)
+    if (min_value is not None and any(value < min_value)) or (max_value is not None and any(value > max_value)):
         raise ValueError("Value for '{}' [{} ({})] outside of bounds [{}, {}]".format(name, value, units, min_value, max_value))
+
+
+def interp(x, xp, fp):
+    """
+    One-dimensional linear interpolation, like :func:`numpy.interp`, but the
+    tabulated points ``xp`` and ``fp`` may carry leading batch dimensions
+    (the last axis holds the table of each design).
+
+    :param x: points at which to interpolate, a scalar or 1-D grid shared by every design
+    :param xp: increasing x-coordinates of the tables, shape (..., T)
+    :param fp: y-coordinates of the tables, broadcastable to ``xp``
+
+    :rtype: array of shape (..., len(x)), or (...) for a scalar ``x``
+
+    """
+
+    scalar = asarray(x).ndim == 0
+    x = atleast_1d(asarray(x, dtype=float))
+    xp, fp = broadcast_arrays(xp, fp)
+
+    if xp.ndim < 2:
+        xp, fp = xp[None], fp[None]
+        squeeze = True
+    else:
+        squeeze = False
+
+    # Tables with non-finite points interpolate to NaN, without disturbing
+    # the ordering the other rows are searched in
+    finite = isfinite(xp).all(-1)[..., None]
+    xp = where(finite, xp, 0.0)
+
+    # Offset every table into its own disjoint band of a single sorted
+    # sequence, so one ``searchsorted`` call locates the bracket of every row
+    shape = xp.shape
+    table = xp.reshape(-1, shape[-1])
+    span = max(table.max(), x.max()) - min(table.min(), x.min()) + 1.0
+    offsets = arange(table.shape[0])[:, None] * span
+    bands = (table + offsets).ravel()
+    points = (x[None, :] + offsets).ravel()
+
+    start = arange(table.shape[0])[:, None] * shape[-1]
+    idx = searchsorted(bands, points).reshape(table.shape[0], -1) - start
+    idx = clip(idx, 1, shape[-1] - 1).reshape(shape[:-1] + (-1,))
+
+    x0 = take_along_axis(xp, idx - 1, -1)
+    x1 = take_along_axis(xp, idx, -1)
+    f0 = take_along_axis(fp, idx - 1, -1)
+    f1 = take_along_axis(fp, idx, -1)
+
+    dx = x1 - x0
+    result = f0 + (f1 - f0) / where(dx == 0, 1.0, dx) * (x - x0)
+    result = where(x <= xp[..., :1], fp[..., :1], result)
+    result = where(x >= xp[..., -1:], fp[..., -1:], result)
+    result = where(finite, result, nan)
+
+    result = result[0] if squeeze else result
+    return result[..., 0] if scalar else result
+
+
+def argmin_select(key, *values):
+    """
+    Picks the entries of each array in ``values`` at the minimum of ``key`` along
+    the last axis.
+
+    Batched inputs keep a trailing singleton axis, so the selections broadcast
+    against per-design parameters; one-dimensional inputs yield scalars.
+
+    """
+
+    idx = expand_dims(key.argmin(-1), -1)
+    picked = []
+    for value in values:
+        value = take_along_axis(broadcast_to(value, key.shape), idx, -1)
+        picked.append(value if value.ndim > 1 else value[0])
+    return picked[0] if len(picked) == 1 else picked
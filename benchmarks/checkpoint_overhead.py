@@ -0,0 +1,51 @@
+"""
+Fraction of the wall-clock time of a pipeline sweep spent saving its
+:class:`~assist.pipeline.Checkpoint`, which saves as often as its
+``overhead`` target allows, against the 1% it must stay under.
+
+The sweep runs for seconds, so that the first and last saves are a small
+part of the 1%.  Exits with an error if the overhead is over it.
+
+Usage::
+
+    python benchmarks/checkpoint_overhead.py [designs] [fsync]
+
+"""
+from __future__ import division, print_function
+import os
+import sys
+from shutil import rmtree
+from tempfile import mkdtemp
+from time import perf_counter
+
+from assist.pipeline import Checkpoint, Pipeline, Sample, Size, Synthesize, collect
+from assist.test.fixtures import build
+
+
+# Largest fraction of the run time spent saving
+BOUND = 0.01
+
+
+def overhead(designs, fsync):
+    directory = mkdtemp()
+    try:
+        checkpoint = Checkpoint(os.path.join(directory, 'sweep'), interval=0, overhead=0.005, fsync=fsync)
+        start = perf_counter()
+        collect(Pipeline(Sample(designs, seed=0, batch_size=256, k_aero=(0.2, 0.9), cruise_speed=(500, 900)),
+                         Synthesize(build), Size(build), checkpoint=checkpoint))
+        elapsed = perf_counter() - start
+    finally:
+        rmtree(directory)
+    return checkpoint.seconds / elapsed, checkpoint.saves, elapsed
+
+
+def main(designs=16384, fsync=0):
+    fraction, saves, elapsed = overhead(designs, bool(fsync))
+    print("{} designs in {:.2f} s, {} saves{}".format(designs, elapsed, saves, " with fsync" if fsync else ""))
+    print("  overhead {:6.2%} (bound {:.0%})".format(fraction, BOUND))
+    if fraction >= BOUND:
+        sys.exit("Checkpoint overhead {:.2%} is over {:.0%}".format(fraction, BOUND))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,42 @@
+"""
+Time it takes a fresh interpreter to import the package, which dominates the
+start up of short-lived worker processes.
+
+Each statement is run in a new interpreter, ``repeats`` times, and the median
+time spent importing is reported, i.e., excluding the interpreter start up.
+
+Usage::
+
+    python benchmarks/import_time.py [repeats]
+
+"""
+from __future__ import division, print_function
+import sys
+from subprocess import check_output
+
+
+STATEMENTS = (('package', "import assist"),
+              ('model', "import assist; assist.Aircraft"),
+              ('worker', "from assist.derivatives import sizing_outputs"),
+              ('optimizer', "from assist.optimize import NSGA2"),
+              ('uncertainty', "from assist.uncertainty import UncertaintyAnalysis"),
+              ('surrogate', "from assist.surrogate import SurrogateCache"),
+              ('everything', "from assist import *"))
+
+_TIMER = "import time; start = time.perf_counter(); {}; print(time.perf_counter() - start)"
+
+
+def import_time(statement, repeats):
+    times = sorted(float(check_output([sys.executable, '-c', _TIMER.format(statement)]))
+                   for _ in range(repeats))
+    return times[len(times) // 2]
+
+
+def main(repeats=9):
+    print("Median import time of {} fresh interpreters".format(repeats))
+    for name, statement in STATEMENTS:
+        print("  {:<12} {:8.1f} ms   {}".format(name, 1000 * import_time(statement, repeats), statement))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,57 @@
+"""
+Evaluations per second of the :class:`~assist.openmdao_wrapper.Fighter`
+component inside an OpenMDAO DOE driver, one design per case against a
+population of ``vec_size`` designs per case.
+
+Usage::
+
+    python benchmarks/openmdao_doe.py [designs] [vec_size]
+
+"""
+from __future__ import division, print_function
+import sys
+from time import time
+
+import openmdao.api as om
+
+from assist.openmdao_wrapper import Fighter
+
+
+DESIGN_VARIABLES = dict(k_aero=(0.2, 0.9),
+                        sweep=(10.0, 50.0),
+                        cruise_speed=(500.0, 900.0),
+                        tofl=(2000.0, 4000.0))
+
+
+def problem(vec_size, cases):
+    prob = om.Problem(reports=False)
+    prob.model.add_subsystem('fighter', Fighter(vec_size=vec_size), promotes=['*'])
+    for name, (lower, upper) in DESIGN_VARIABLES.items():
+        prob.model.add_design_var(name, lower=lower, upper=upper)
+    prob.model.add_objective('acq_cost', index=0)
+    prob.model.add_constraint('togw', lower=0.0)
+    prob.driver = om.DOEDriver(om.LatinHypercubeGenerator(samples=cases, seed=0))
+    prob.setup()
+    return prob
+
+
+def evaluations_per_second(designs, vec_size):
+    cases = designs // vec_size
+    prob = problem(vec_size, cases)
+    start = time()
+    prob.run_driver()
+    elapsed = time() - start
+    prob.cleanup()
+    return cases * vec_size / elapsed
+
+
+def main(designs=256, vec_size=64):
+    scalar = evaluations_per_second(designs, 1)
+    vectorized = evaluations_per_second(designs, vec_size)
+    print("{} designs in a DOE driver".format(designs))
+    print("  vec_size=1:   {:10.1f} evaluations/s".format(scalar))
+    print("  vec_size={:<3} {:10.1f} evaluations/s ({:.1f}x)".format(vec_size, vectorized, vectorized / scalar))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,142 @@
+"""
+Benchmarks of the hot paths of sizing, each for a single design and for a
+batch of designs (vectorized along the first axis), with pytest-benchmark.
+
+Usage::
+
+    python -m pytest benchmarks --benchmark-autosave
+
+stores the results as JSON in ``.benchmarks/``, labeled with the commit, and::
+
+    python -m pytest benchmarks --benchmark-compare --benchmark-compare-fail=median:10%
+
+compares a run against the last one saved, failing on regressions of the
+median time over 10%.  ``--benchmark-json=<path>`` writes a run to a given
+file instead.
+
+"""
+from __future__ import division
+
+import pytest
+from numpy import linspace
+
+from assist.cost import Cost
+from assist.environment import Atmosphere
+from assist.mission import Segment
+from assist.test.fixtures import build, DESIGN
+
+
+pytest.importorskip('pytest_benchmark')
+
+# Designs per batch of the batch variants
+BATCH = 256
+
+# Inputs of the batch designs, a column each
+_RANGES = dict(k_aero=(0.3, 0.7), sweep=(20.0, 40.0), tofl=(2500.0, 3500.0), cruise_speed=(600.0, 800.0))
+
+# A segment of each kind, as flown by the benchmarked aircraft
+SEGMENTS = dict(warmup=Segment('warmup', altitude=0, speed=0, time=60),
+                takeoff=Segment('takeoff', altitude=0, speed=150, field_length=3000),
+                climb=Segment('climb', altitude=0, speed=500, climb_rate=200),
+                cruise=Segment('cruise', altitude=30000, speed=700, range=150),
+                dash=Segment('dash', altitude=30000, speed=1492, range=100),
+                loiter=Segment('loiter', altitude=10000, speed=300, time=0.5),
+                combat=Segment('combat', altitude=15000, speed=500, turn_rate=0.2, time=0.05),
+                land=Segment('land', altitude=0, speed=150, field_length=1500))
+
+WING_LOADINGS = linspace(10, 299, 290)
+
+
+def design(variant):
+    if variant == 'scalar':
+        return dict(DESIGN)
+    columns = dict(DESIGN)
+    columns.update((name, linspace(lower, upper, BATCH)[:, None]) for name, (lower, upper) in _RANGES.items())
+    return columns
+
+
+def synthesized(variant):
+    aircraft, mission = build(design(variant))
+    aircraft._synthesize(mission)
+    return aircraft, mission
+
+
+def sized(variant):
+    aircraft, mission = synthesized(variant)
+    aircraft._size(mission)
+    aircraft.engine.size()
+    return aircraft, mission
+
+
+@pytest.fixture(params=['scalar', 'batch'])
+def variant(request):
+    return request.param
+
+
+@pytest.fixture
+def altitudes(variant):
+    return 30000.0 if variant == 'scalar' else linspace(0, 70000, BATCH)[:, None]
+
+
+@pytest.mark.parametrize('query', ['density', 'temperature', 'speed_of_sound', 'specific_heat_ratio'])
+def test_atmosphere(benchmark, altitudes, query):
+    benchmark(getattr(Atmosphere(), query), altitudes)
+
+
+def test_engine_thrust_lapse(benchmark, altitudes):
+    engine = sized('scalar')[0].engine
+    benchmark(engine.thrust_lapse, altitudes, mach=0.9)
+
+
+def test_engine_tsfc(benchmark, altitudes):
+    engine = sized('scalar')[0].engine
+    benchmark(engine.tsfc, 0.9, altitudes)
+
+
+def test_engine_size(benchmark, variant):
+    benchmark(sized(variant)[0].engine.size)
+
+
+@pytest.mark.parametrize('configuration', ['takeoff', 'landing'])
+def test_wing_cl_max(benchmark, variant, configuration):
+    wing = build(design(variant))[0].wing
+    wing.configuration = configuration
+
+    def cl_max():
+        wing._reset()
+        return wing.cl_max
+
+    benchmark(cl_max)
+
+
+@pytest.mark.parametrize('kind', sorted(SEGMENTS))
+def test_thrust_to_weight_required(benchmark, variant, kind):
+    aircraft = synthesized(variant)[0]
+    benchmark(SEGMENTS[kind].thrust_to_weight_required, aircraft, WING_LOADINGS, prior_weight_fraction=0.9)
+
+
+def test_best_cruise(benchmark):
+    # Only evaluated one design at a time
+    aircraft = synthesized('scalar')[0]
+    benchmark(lambda: aircraft.best_cruise)
+
+
+def test_synthesize(benchmark, variant):
+    aircraft, mission = build(design(variant))
+    benchmark(aircraft._synthesize, mission)
+
+
+@pytest.mark.parametrize('angles', [1, 4, 16])
+def test_synthesize_variable_sweep(benchmark, variant, angles):
+    aircraft, mission = build(dict(design(variant), sweep=list(linspace(20.0, 60.0, angles))))
+    benchmark(aircraft._synthesize, mission)
+
+
+def test_size(benchmark, variant):
+    aircraft, mission = synthesized(variant)
+    benchmark(aircraft._size, mission)
+
+
+def test_estimate_acquisition(benchmark, variant):
+    cost = Cost(aircraft=sized(variant)[0], quantity=200)
+    benchmark(cost.estimate_acquisition)
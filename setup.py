@@ -1,11 +1,9 @@
 #!/usr/bin/env python
-from pip.req import parse_requirements
-from pip.download import PipSession
 from setuptools import setup, find_packages
 
 
-install_reqs = parse_requirements('requirements.txt', session=PipSession())
-requirements = [str(ir.req) for ir in install_reqs]
+with open('requirements.txt') as lines:
+    requirements = [line.strip() for line in lines if line.strip() and not line.startswith('#')]
 
 setup(name='assist',
       version='0.0.5',
@@ -19,6 +17,7 @@ setup(name='assist',
       license='MIT',
       packages=find_packages(),
       install_requires=requirements,
+      python_requires='>=3.9',
       classifiers=['Development Status :: 2 - Pre-Alpha',
                    'License :: OSI Approved :: MIT License',
                    'Natural Language :: English',
@@ -28,6 +27,6 @@ setup(name='assist',
                    'Operating System :: POSIX :: Linux',
                    'Operating System :: Microsoft :: Windows',
                    'Topic :: Scientific/Engineering',
-                   'Programming Language :: Python :: 2.7',
-                   ],
-      py_modules=['assist'])
+                   'Programming Language :: Python :: 3',
+                   'Programming Language :: Python :: 3 :: Only',
+                   ])